@@ -2,7 +2,8 @@ from fastapi import APIRouter, Request, HTTPException, Depends
 from sqlalchemy.orm import Session
 
 from app.api import get_request_params
-from app.task.tasks import crawl_book_task, crawl_books_task
+from app.config import settings
+from app.task.tasks import crawl_book_task, crawl_books_task, crawl_series_books_task
 from app.database import Book, get_depend_db
 
 router = APIRouter()
@@ -16,7 +17,8 @@ async def crawl_books_api(
     try:
         params = await get_request_params(request)
         page = int(params.pop("page", 1))
-        crawl_books_task.delay(series, page)
+        incremental = str(params.pop("incremental", False)).lower() in ("1", "true")
+        crawl_books_task.delay(series, page, incremental=incremental)
         return {"message": "Book list crawl task start."}
     except Exception as e:
         return {"error": str(e)}
@@ -37,3 +39,14 @@ async def crawl_book_api(
         return {"message": "Book crawl task start."}
     except Exception as e:
         return {"error": str(e)}
+
+
+@router.post("/crawl/series/{series}")
+async def crawl_series_books_api(request: Request, series: str):
+    try:
+        params = await get_request_params(request)
+        concurrency = int(params.pop("concurrency", settings.CRAWLER_DETAIL_CONCURRENCY))
+        crawl_series_books_task.delay(series, concurrency)
+        return {"message": f"Series {series} details crawl task start."}
+    except Exception as e:
+        return {"error": str(e)}
@@ -1,10 +1,13 @@
+import json
 from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import get_request_params
 from app.database import Book, get_depend_db
+from app.downloader import get_download_governor, get_progress_broker
 from app.task.tasks import download_book_task
 
 router = APIRouter()
@@ -42,3 +45,32 @@ async def download_book_api(
         return {"message": f"Book {book.title} download task start."}
     except Exception as e:
         return {"error": str(e)}
+
+
+@router.get("/download/status")
+async def download_status_api():
+    """获取下载槽位和带宽使用情况"""
+    try:
+        return get_download_governor().utilisation()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@router.get("/download/progress")
+async def download_progress_api(request: Request):
+    """以 Server-Sent Events 推送下载进度"""
+
+    async def event_stream():
+        async for event in get_progress_broker().subscribe():
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['status']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -38,6 +38,10 @@ celery_app.conf.beat_schedule = {
         "task": "app.task.schedulers.download_books_scheduler",
         "schedule": 60 * 30,
     },
+    "evict_downloads": {
+        "task": "app.task.schedulers.evict_downloads_scheduler",
+        "schedule": 60 * 30,
+    },
     "distribute_books": {
         "task": "app.task.schedulers.distribute_books_scheduler",
         "schedule": 60 * 10,
@@ -122,20 +122,85 @@ class Settings(BaseSettings):
     MAX_BOOK_SIZE: int = 100 * 1024 * 1024
 
     # 爬虫配置
-    CRAWLER_DELAY: int = 3  # 爬虫延迟（秒）
+    CRAWLER_DELAY: float = 3  # 同一域名两次请求的平均间隔（秒），所有 worker 共享
+    CRAWLER_RATE_BURST: int = 3  # 同一域名允许的突发请求数
+    RATE_LIMIT_BACKEND: str = "redis"  # 限流器存储: redis 或 memory
     MAX_RETRIES: int = 3  # 最大重试次数
     MAX_WAIT_TIME: int = 180  # 最大等待时间（秒）
+    CRAWLER_BROWSER_POOL: bool = True  # 是否在 worker 内复用浏览器进程
+    CRAWLER_POOL_MAX_CONTEXTS: int = 2  # 浏览器池最大上下文数
+    CRAWLER_CONTEXT_MAX_PAGES: int = 50  # 单个上下文服务多少页面后回收
+    CRAWLER_CONTEXT_MAX_MEMORY_MB: int = 512  # 上下文 JS 堆超过该值（MB）后回收
+    CRAWLER_DETAIL_CONCURRENCY: int = 4  # 批量爬取详情时同时打开的标签页数
+    CRAWLER_SAVE_SCREENSHOTS: bool = False  # 是否保存 Cloudflare 验证截图用于调试
+    CRAWLER_CLEARANCE_BACKEND: str = "redis"  # Cloudflare 验证缓存存储: redis 或 file
+    CRAWLER_CLEARANCE_TTL: int = 60 * 60  # Cloudflare 验证缓存最长有效期（秒）
+    CRAWLER_HTTP_FAST_PATH: bool = True  # 是否先用 HTTP 请求页面，失败再使用浏览器
+    CRAWLER_HTTP_MIN_SAMPLES: int = 5  # 判断 HTTP 成功率前的最少样本数
+    CRAWLER_HTTP_MIN_SUCCESS_RATE: float = 0.2  # HTTP 成功率低于该值的 URL 模式直接使用浏览器
+    CRAWLER_HTTP_PROBE_INTERVAL: int = 20  # 跳过 HTTP 的模式每隔多少次重新试探
+    CRAWLER_INCREMENTAL_MAX_PAGES: int = 20  # 增量爬取书籍列表时最多翻多少页
+    CRAWLER_HTML_PARSER: str = "selectolax"  # HTML 解析后端: html.parser、lxml 或 selectolax
+    CRAWLER_BLOCK_RESOURCES: bool = True  # 浏览器是否拦截图片、字体等不需要的资源
+    CRAWLER_BLOCKED_RESOURCE_TYPES: list[str] = ["image", "media", "font"]  # 拦截的资源类型
+    CRAWLER_BLOCKED_DOMAINS: list[str] = [  # 拦截的广告/统计域名
+        "googlesyndication.com",
+        "doubleclick.net",
+        "googletagmanager.com",
+        "googletagservices.com",
+        "google-analytics.com",
+        "adservice.google.com",
+        "amazon-adsystem.com",
+        "facebook.net",
+        "scorecardresearch.com",
+        "quantserve.com",
+        "hotjar.com",
+        "mc.yandex.ru",
+    ]
 
     # 分发器配置
-    MAX_DOWNLOAD_CONCURRENT: int = 5  # 最大并发下载数
-    DOWNLOAD_SPEED_LIMIT: int = 1024 * 1024  # 1MB/s
+    MAX_DOWNLOAD_CONCURRENT: int = 5  # 所有 worker 合计的最大并发下载数
+    DOWNLOAD_SPEED_LIMIT: int = 1024 * 1024  # 所有 worker 合计的下载速度上限（字节/秒），0 表示不限
     DISTRIBUTOR_TYPE: str = "smtp"
+    DISTRIBUTE_BUNDLE: bool = False  # 多本书籍的邮件打包为一个压缩包发送一个下载链接
 
     # Download settings
     DOWNLOADER_TYPE: str = "file"
+    DOWNLOAD_CHUNK_SIZE: int = 128 * 1024  # 下载分块大小（字节）
+    DOWNLOAD_SEGMENTS: int = 4  # 单个文件分段并发下载的最大连接数，1 表示不分段
+    DOWNLOAD_MIN_SEGMENT_SIZE: int = 8 * 1024 * 1024  # 每段最小字节数，文件不足两段时不分段
+    DOWNLOAD_SLOT_TTL: int = 60  # 下载槽位心跳过期时间（秒），worker 崩溃后槽位在此时间后释放
+    DOWNLOAD_SLOT_TIMEOUT: int = 10 * 60  # 等待下载槽位的最长时间（秒）
+    DOWNLOAD_LEASE_TTL: int = 60  # 下载租约心跳过期时间（秒），超时后其他 worker 可接管下载
+    DOWNLOAD_TEE_UPLOAD: bool = False  # 下载时同时分片上传到对象存储
+    DOWNLOAD_KEEP_LOCAL: bool = True  # 同时上传时是否保留本地文件，磁盘较小的节点可关闭
+    DOWNLOAD_PROGRESS_INTERVAL: float = 1  # 下载进度事件的发布间隔（秒）
+    DOWNLOAD_PROGRESS_BACKEND: str = "redis"  # 下载进度事件的传递方式: redis 或 memory（仅本进程）
+    DOWNLOAD_DIR_BUDGET: int = 0  # 下载目录最多占用的字节数，超出时清理已上传的旧文件，0 表示不限
+    DOWNLOAD_MIN_FREE_SPACE: int = 512 * 1024 * 1024  # 下载前磁盘至少保留的剩余空间（字节）
+    DOWNLOAD_BATCH_SIZE: int = 0  # 批量下载任务每次领取的书籍数，0 表示每本书一个下载任务
+
+    # PDF 优化配置
+    PDF_OPTIMIZE: bool = False  # 下载后重新压缩 PDF 图片，生成更小的副本用于分发
+    PDF_OPTIMIZE_WORKERS: int = 2  # PDF 优化进程池大小
+    PDF_IMAGE_QUALITY: int = 60  # 重新压缩图片的 JPEG 质量
+    PDF_MAX_IMAGE_SIZE: int = 2000  # 图片最长边像素数，超过时缩小
+    PDF_OPTIMIZE_MIN_REDUCTION: float = 0.05  # 至少缩小该比例才保留优化结果
+
+    # 压缩配置
+    COMPRESS_WORKERS: int = 2  # 压缩进程池大小
+    COMPRESS_TIME_BUDGET: float = 60  # 单个压缩包的压缩时间预算（秒），据此选择压缩方式和级别
 
     # Uploader settings
     UPLOADER_TYPE: str = "r2"
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024  # 分片上传的分片大小（字节），S3 要求至少 5MB
+    UPLOAD_MULTIPART_THRESHOLD: int = 16 * 1024 * 1024  # 超过该大小（字节）的文件使用分片上传，分片大小为 UPLOAD_PART_SIZE
+    UPLOAD_MAX_CONCURRENCY: int = 4  # 单个文件同时上传的分片数
+    UPLOAD_FILES_CONCURRENCY: int = 2  # 批量上传时同时上传的文件数
+    UPLOAD_PROGRESS_INTERVAL: float = 5  # 上传进度日志的间隔（秒）
+    UPLOAD_URL_CACHE: bool = True  # 是否缓存预签名URL，同一文件在有效期内复用同一链接
+    UPLOAD_URL_CACHE_MARGIN: int = 24 * 3600  # 缓存的URL剩余有效期不足该值（秒）时重新签名
+    UPLOAD_URL_CACHE_BACKEND: str = "redis"  # 预签名URL缓存存储: redis 或 memory
 
     # Celery configuration
     CELERY_WORKER_CONCURRENCY: int = int(os.getenv("CELERY_WORKER_CONCURRENCY", 4))
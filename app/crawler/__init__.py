@@ -4,6 +4,7 @@ Crawler module for The Economist Magazine
 
 from app.crawler.economist_crawler import EconomistCrawler
 from app.crawler.base import BaseCrawler
+from app.crawler.browser_pool import BrowserPool, get_browser_pool
 from app.crawler.factory import create_crawler
 
-__all__ = ["EconomistCrawler", "BaseCrawler", "create_crawler"]
+__all__ = ["EconomistCrawler", "BaseCrawler", "create_crawler", "BrowserPool", "get_browser_pool"]
@@ -1,11 +1,36 @@
-import asyncio
-import random
-from typing import List
+import time
+from collections import deque
+from typing import Deque, List, Sequence
+
+import httpx
+from loguru import logger
+
+from app.config import settings
+from app.crawler.fetch_strategy import FetchStats, FetchStrategy, fetch_stats, url_pattern
+from app.crawler.html_parser import BaseHtmlParser, ParseTarget, create_html_parser
+from app.utils.http_client import get_http_client
+from app.utils.rate_limiter import RateLimiter, get_rate_limiter
 
 
 class BaseCrawler:
     def __init__(self,base_url=''):
         self.base_url = base_url
+        self.fetch_stats: FetchStats = fetch_stats
+        self.http_fast_path = settings.CRAWLER_HTTP_FAST_PATH
+        self.timings: Deque[dict] = deque(maxlen=100)
+        self.rate_limiter: RateLimiter = get_rate_limiter()
+        self.parser: BaseHtmlParser = create_html_parser(settings.CRAWLER_HTML_PARSER)
+        self.headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": "gzip, deflate",
+            "Upgrade-Insecure-Requests": "1",
+            "Sec-Fetch-Dest": "document",
+            "Sec-Fetch-Mode": "navigate",
+            "Sec-Fetch-Site": "none",
+            "Sec-Fetch-User": "?1",
+        }
 
     async def __aenter__(self):
         """异步上下文管理器入口"""
@@ -15,12 +40,98 @@ class BaseCrawler:
         """异步上下文管理器退出"""
         await self.close()
 
-    async def delay(self, min_seconds=1, max_seconds=3):
-        """异步延迟"""
-        delay_time = random.uniform(min_seconds, max_seconds)
-        await asyncio.sleep(delay_time)
+    async def delay(self, url: str) -> float:
+        """按域名限流，等待到允许请求 url 为止"""
+        return await self.rate_limiter.acquire(url)
+
+    def record_timing(self, url: str, strategy: str, timings: dict):
+        """记录一次页面获取各阶段耗时（秒），最近的记录保存在 self.timings"""
+        self.timings.append({"url": url, "strategy": strategy, **timings})
+        phases = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in timings.items())
+        logger.info(f"Fetch timings [{strategy}] {url}: {phases}")
+
+    def parse(self, html: str, parse_only: Sequence[ParseTarget] | None = None):
+        """用配置的解析后端解析 HTML，``parse_only`` 限定只构建需要的子树"""
+        return self.parser.parse(html, parse_only)
+
+    async def get_http_headers(self) -> dict:
+        """HTTP 快速路径使用的请求头，子类可加入验证 cookies"""
+        return dict(self.headers)
+
+    @staticmethod
+    def is_challenge(response: httpx.Response) -> bool:
+        """判断响应是否为 Cloudflare 验证页"""
+        if response.headers.get("cf-mitigated") == "challenge":
+            return True
+        return response.status_code in (403, 503) and "Just a moment" in response.text
+
+    async def fetch_http(self, url, loaded_selector=None, parse_only=None):
+        """用共享的 httpx 客户端获取页面，遇到验证页或缺少 loaded_selector 时返回 None
+
+        部分解析（``parse_only``）时 loaded_selector 通常不在保留的子树中，
+        因此在完整文档上检查。
+        """
+        start_time = time.monotonic()
+        try:
+            response = await get_http_client("crawler").get(
+                url, headers=await self.get_http_headers()
+            )
+        except httpx.HTTPError as e:
+            logger.debug(f"HTTP fetch failed for {url}: {e}")
+            return None
 
-    async def get(self, url):
+        if self.is_challenge(response):
+            logger.debug(f"HTTP fetch got challenge page: {url}")
+            return None
+        if response.status_code != 200:
+            logger.debug(f"HTTP fetch got status {response.status_code}: {url}")
+            return None
+
+        response_time = time.monotonic() - start_time
+        soup = self.parse(response.text, parse_only)
+        if loaded_selector is not None and not (
+            self.parser.contains(response.text, loaded_selector)
+            if parse_only
+            else soup.select_one(loaded_selector) is not None
+        ):
+            logger.debug(f"HTTP fetch missing {loaded_selector}: {url}")
+            return None
+        self.record_timing(
+            url,
+            FetchStrategy.HTTP,
+            {
+                "response": response_time,
+                "parse": time.monotonic() - start_time - response_time,
+                "total": time.monotonic() - start_time,
+            },
+        )
+        return soup
+
+    async def fetch(self, url, loaded_selector=None, parse_only=None, **kwargs):
+        """先尝试 HTTP，必要时回退到 get（浏览器），并记录各方式的成功情况
+
+        返回解析后的文档，``parse_only`` 见 ``parse``。
+        """
+        pattern = url_pattern(url)
+        if self.http_fast_path and self.fetch_stats.should_try_http(pattern):
+            await self.delay(url)
+            soup = await self.fetch_http(url, loaded_selector, parse_only)
+            self.fetch_stats.record(pattern, FetchStrategy.HTTP, soup is not None)
+            if soup is not None:
+                return soup
+
+        try:
+            await self.delay(url)
+            soup = await self.get(
+                url, loaded_selector=loaded_selector, parse_only=parse_only, **kwargs
+            )
+        except Exception:
+            self.fetch_stats.record(pattern, FetchStrategy.BROWSER, False)
+            raise
+        self.fetch_stats.record(pattern, FetchStrategy.BROWSER, True)
+        return soup
+
+    async def get(self, url, **kwargs):
         raise NotImplementedError
 
     async def get_books(self, page: int = 1) -> List[dict]:
@@ -28,6 +139,12 @@ class BaseCrawler:
 
     async def get_book(self, book_dict: dict) -> dict:
         raise NotImplementedError
-    
+
+    async def get_books_details(
+        self, book_dicts: List[dict], concurrency: int = 1
+    ) -> List[dict]:
+        """批量获取书籍详情，默认逐本调用 get_book"""
+        return [await self.get_book(book_dict) for book_dict in book_dicts]
+
     async def close(self):
         pass
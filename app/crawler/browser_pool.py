@@ -0,0 +1,246 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+from loguru import logger
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+
+from app.config import settings
+from app.crawler.resource_policy import ResourcePolicy
+
+
+class _ContextSlot:
+    """浏览器池中的一个上下文"""
+
+    def __init__(self, context: BrowserContext):
+        self.context = context
+        self.pages_served = 0
+        self.memory_mb = 0.0
+        self.created_at = time.time()
+
+
+class BrowserLease:
+    """浏览器租约，持有一个上下文及其中打开的页面"""
+
+    def __init__(self, pool: "BrowserPool", slot: _ContextSlot, page: Page):
+        self.pool = pool
+        self.slot = slot
+        self.page = page
+        self.pages: List[Page] = [page]
+        self.released = False
+
+    @property
+    def context(self) -> BrowserContext:
+        return self.slot.context
+
+    async def new_page(self) -> Page:
+        """在租约所属的上下文中再打开一个页面"""
+        page = await self.pool._new_page(self.slot)
+        self.pages.append(page)
+        return page
+
+    async def release(self):
+        await self.pool.release(self)
+
+
+class BrowserPool:
+    """Worker 内常驻的 Chromium 浏览器池
+
+    浏览器进程在多次任务调用之间保持运行，通过租约分发上下文和页面。
+    上下文在服务一定数量的页面或内存超过阈值后被回收重建。
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = settings.CRAWLER_POOL_MAX_CONTEXTS,
+        max_pages_per_context: int = settings.CRAWLER_CONTEXT_MAX_PAGES,
+        max_memory_mb: int = settings.CRAWLER_CONTEXT_MAX_MEMORY_MB,
+        headless: bool = True,
+        resource_policy: ResourcePolicy | None = None,
+    ):
+        self.max_contexts = max_contexts
+        self.max_pages_per_context = max_pages_per_context
+        self.max_memory_mb = max_memory_mb
+        self.headless = headless
+        if resource_policy is None and settings.CRAWLER_BLOCK_RESOURCES:
+            resource_policy = ResourcePolicy()
+        self.resource_policy = resource_policy
+        self.playwright: Playwright | None = None
+        self.browser: Browser | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._idle: List[_ContextSlot] = []
+        self._leases: List[BrowserLease] = []
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._closed = False
+
+    async def start(self):
+        """启动 Playwright 和浏览器进程（已启动时直接返回）"""
+        async with self._lock:
+            if self.browser and self.browser.is_connected():
+                return
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            self.loop = asyncio.get_running_loop()
+            self._idle.clear()
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=["--no-sandbox"],
+            )
+            logger.info("Browser pool started")
+
+    async def _new_context(self, storage_state: dict | None = None) -> BrowserContext:
+        if not self.browser:
+            raise RuntimeError("Browser pool not started")
+        context = await self.browser.new_context(
+            viewport={"width": 1920, "height": 1080},
+            storage_state=storage_state,
+        )
+        if self.resource_policy:
+            await self.resource_policy.install(context)
+        return context
+
+    async def _new_page(self, slot: _ContextSlot) -> Page:
+        slot.pages_served += 1
+        return await slot.context.new_page()
+
+    async def acquire(self, storage_state: dict | None = None) -> BrowserLease:
+        """租用一个上下文，返回带有新页面的租约
+
+        ``storage_state`` 用于新建上下文；复用空闲上下文时只把其中的 cookies 加入上下文。
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+
+        await self._semaphore.acquire()
+        try:
+            await self.start()
+            async with self._lock:
+                slot = self._idle.pop() if self._idle else None
+            if slot is None:
+                slot = _ContextSlot(await self._new_context(storage_state))
+            elif storage_state and storage_state.get("cookies"):
+                await slot.context.add_cookies(storage_state["cookies"])
+            page = await self._new_page(slot)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+        lease = BrowserLease(self, slot, page)
+        self._leases.append(lease)
+        return lease
+
+    async def release(self, lease: BrowserLease):
+        """归还租约，根据页面数和内存决定保留或回收上下文"""
+        if lease.released:
+            return
+        lease.released = True
+        self._leases.remove(lease)
+
+        try:
+            lease.slot.memory_mb = await self._measure_memory_mb(lease.pages)
+            for page in lease.pages:
+                if not page.is_closed():
+                    await page.close()
+
+            if self._should_recycle(lease.slot):
+                logger.info(
+                    f"Recycle browser context: pages={lease.slot.pages_served}, "
+                    f"memory={lease.slot.memory_mb:.1f}MB"
+                )
+                await lease.slot.context.close()
+            else:
+                async with self._lock:
+                    self._idle.append(lease.slot)
+        except Exception as e:
+            logger.warning(f"Failed to release browser context: {e}")
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def lease(self, storage_state: dict | None = None) -> AsyncIterator[BrowserLease]:
+        """以上下文管理器形式租用页面"""
+        lease = await self.acquire(storage_state=storage_state)
+        try:
+            yield lease
+        finally:
+            await lease.release()
+
+    def _should_recycle(self, slot: _ContextSlot) -> bool:
+        if self._closed or not (self.browser and self.browser.is_connected()):
+            return True
+        if slot.pages_served >= self.max_pages_per_context:
+            return True
+        return slot.memory_mb >= self.max_memory_mb
+
+    async def _measure_memory_mb(self, pages: List[Page]) -> float:
+        """统计页面 JS 堆占用（MB），仅 Chromium 支持"""
+        total = 0
+        for page in pages:
+            if page.is_closed():
+                continue
+            try:
+                total += await page.evaluate(
+                    "() => performance.memory ? performance.memory.usedJSHeapSize : 0"
+                )
+            except Exception:
+                continue
+        return total / 1024 / 1024
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "max_contexts": self.max_contexts,
+            "leased": len(self._leases),
+            "idle": len(self._idle),
+            "connected": bool(self.browser and self.browser.is_connected()),
+            "resources": self.resource_policy.totals.to_dict()
+            if self.resource_policy
+            else None,
+        }
+
+    async def close(self):
+        """关闭所有上下文、浏览器和 Playwright"""
+        self._closed = True
+        for lease in list(self._leases):
+            await lease.release()
+        for slot in self._idle:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        self._idle.clear()
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+        logger.info("Browser pool closed")
+
+
+_browser_pool: BrowserPool | None = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """获取当前进程共享的浏览器池
+
+    Playwright 对象绑定在创建它的事件循环上，事件循环变化时重建浏览器池。
+    """
+    global _browser_pool
+    loop = asyncio.get_running_loop()
+    if _browser_pool is not None and _browser_pool.loop not in (None, loop):
+        logger.warning("Event loop changed, discarding browser pool")
+        _browser_pool = None
+    if _browser_pool is None or _browser_pool._closed:
+        _browser_pool = BrowserPool()
+    return _browser_pool
+
+
+async def close_browser_pool():
+    """关闭当前进程共享的浏览器池"""
+    global _browser_pool
+    if _browser_pool is not None:
+        pool, _browser_pool = _browser_pool, None
+        await pool.close()
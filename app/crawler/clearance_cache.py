@@ -0,0 +1,138 @@
+import json
+import time
+from pathlib import Path
+
+import redis
+from loguru import logger
+
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+CLEARANCE_COOKIE = "cf_clearance"
+
+
+class ClearanceCache:
+    """Cloudflare 验证结果缓存
+
+    保存通过验证后的 Playwright storage_state（包含 cf_clearance cookie），
+    新建的浏览器上下文加载它即可跳过验证。优先存入 Redis 供所有 worker 共享，
+    Redis 不可用时退回本地文件。
+    """
+
+    def __init__(
+        self,
+        backend: str = settings.CRAWLER_CLEARANCE_BACKEND,
+        cache_dir: Path = settings.TMP_DIR / "clearance",
+        default_ttl: int = settings.CRAWLER_CLEARANCE_TTL,
+    ):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+
+    @staticmethod
+    def _redis_key(domain: str) -> str:
+        return f"book_sender:clearance:{domain}"
+
+    def _file_path(self, domain: str) -> Path:
+        return self.cache_dir / f"{domain}.json"
+
+    @staticmethod
+    def filter_state(storage_state: dict, domain: str) -> dict:
+        """只保留属于该域名的 cookies 和 localStorage"""
+        return {
+            "cookies": [
+                cookie
+                for cookie in storage_state.get("cookies", [])
+                if cookie.get("domain", "").lstrip(".").endswith(domain)
+            ],
+            "origins": [
+                origin
+                for origin in storage_state.get("origins", [])
+                if domain in origin.get("origin", "")
+            ],
+        }
+
+    def get_expires_at(self, storage_state: dict) -> float | None:
+        """根据 cf_clearance cookie 计算过期时间，没有该 cookie 时返回 None"""
+        now = time.time()
+        for cookie in storage_state.get("cookies", []):
+            if cookie.get("name") != CLEARANCE_COOKIE:
+                continue
+            expires = cookie.get("expires", -1)
+            if expires and expires > 0:
+                return min(expires, now + self.default_ttl)
+            return now + self.default_ttl
+        return None
+
+    def save(self, domain: str, storage_state: dict, user_agent: str | None = None) -> bool:
+        """保存验证结果，返回是否保存成功
+
+        cf_clearance 与 User-Agent 绑定，复用 cookies 的 HTTP 请求需使用相同的 ``user_agent``。
+        """
+        storage_state = self.filter_state(storage_state, domain)
+        if not (expires_at := self.get_expires_at(storage_state)):
+            logger.debug(f"No {CLEARANCE_COOKIE} cookie for {domain}, skip caching")
+            return False
+
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return False
+
+        payload = json.dumps(
+            {
+                "expires_at": expires_at,
+                "user_agent": user_agent,
+                "storage_state": storage_state,
+            }
+        )
+        if self.backend == "redis":
+            try:
+                get_redis().set(self._redis_key(domain), payload, ex=ttl)
+                logger.info(f"Cached clearance for {domain} in redis, ttl={ttl}s")
+                return True
+            except redis.RedisError as e:
+                logger.warning(f"Failed to cache clearance in redis, fallback to file: {e}")
+
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+        self._file_path(domain).write_text(payload)
+        logger.info(f"Cached clearance for {domain} in file, ttl={ttl}s")
+        return True
+
+    def load(self, domain: str) -> dict | None:
+        """读取未过期的 storage_state"""
+        if entry := self.load_entry(domain):
+            return entry.get("storage_state")
+        return None
+
+    def load_entry(self, domain: str) -> dict | None:
+        """读取未过期的验证结果，包含 expires_at、user_agent 和 storage_state"""
+        payload = None
+        if self.backend == "redis":
+            try:
+                payload = get_redis().get(self._redis_key(domain))
+            except redis.RedisError as e:
+                logger.warning(f"Failed to load clearance from redis: {e}")
+
+        file_path = self._file_path(domain)
+        if payload is None and file_path.exists():
+            payload = file_path.read_text()
+        if payload is None:
+            return None
+
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return None
+        if data.get("expires_at", 0) <= time.time():
+            file_path.unlink(missing_ok=True)
+            return None
+        return data
+
+    def invalidate(self, domain: str):
+        """删除验证结果"""
+        if self.backend == "redis":
+            try:
+                get_redis().delete(self._redis_key(domain))
+            except redis.RedisError as e:
+                logger.warning(f"Failed to invalidate clearance in redis: {e}")
+        self._file_path(domain).unlink(missing_ok=True)
@@ -1,35 +1,65 @@
-import os
+import asyncio
 import random
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List
+from urllib.parse import urlparse
 
-from bs4 import BeautifulSoup
 from loguru import logger
-from playwright.async_api import async_playwright
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from app.config import settings
 from app.crawler.base import BaseCrawler
+from app.crawler.browser_pool import BrowserLease, BrowserPool, get_browser_pool
+from app.crawler.clearance_cache import ClearanceCache
+from app.crawler.fetch_strategy import FetchStrategy
+from app.crawler.html_parser import ParseTarget
 from app.utils.image_downloader import ImageDownloader
 from app.utils.image_processor import ImageProcessor
 
+CHALLENGE_JS = "() => document.title.includes('Just a moment')"
+CHALLENGE_RECHECK_INTERVAL = 5  # 点击验证框后等待验证通过的时间（秒）
+
+# 各页面只解析需要的子树
+BOOK_LIST_TARGETS = (ParseTarget("article", {"class": "category-all"}),)
+BOOK_DETAIL_TARGETS = (ParseTarget("div", {"class": "vk-att-item"}),)
+DOWNLOAD_PAGE_TARGETS = (ParseTarget("input", {"name": "url"}),)
+
 
 class EconomistCrawler(BaseCrawler):
-    def __init__(self, base_url="https://magazinelib.com/all/the-economist/page/{}/"):
+    def __init__(
+        self,
+        base_url="https://magazinelib.com/all/the-economist/page/{}/",
+        use_pool: bool = settings.CRAWLER_BROWSER_POOL,
+    ):
         super().__init__(base_url)
-        self.playwright = None
+        self.use_pool = use_pool
+        self.pool: BrowserPool | None = None
+        self.lease: BrowserLease | None = None
         self.browser = None
         self.context = None
         self.page = None
         self.image_processor = ImageProcessor(debug=False)
         self.image_downloader = ImageDownloader()
         self.series_name = "the-economist"
+        self.domain = urlparse(base_url).hostname or ""
+        self.clearance_cache = ClearanceCache()
+        self._clearance_entry: dict | None = None
+        self._free_pages: List[Page] = []
+        self._browser_lock = asyncio.Lock()
         logger.info(f"Initialized crawler for series: {self.series_name}")
 
     async def __aenter__(self):
-        """Async context manager entry"""
-        await self.init_browser()
+        """Async context manager entry
+
+        The browser is leased lazily, on the first fetch that needs it.
+        """
+        if not self.http_fast_path:
+            await self.init_browser()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -37,120 +67,253 @@ class EconomistCrawler(BaseCrawler):
         await self.close()
 
     async def init_browser(self):
-        """Initialize Playwright browser"""
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=True,
-            # headless=False,
-            # executable_path='/usr/bin/chromium-browser',
-            args=["--no-sandbox"],
-        )
-        self.context = await self.browser.new_context(
-            viewport={"width": 1920, "height": 1080}
-        )
-        self.page = await self.context.new_page()
+        """Lease a page from the browser pool (no-op if already leased)
+
+        With ``use_pool`` the worker-wide pool is shared across tasks, otherwise
+        a private pool is started and closed together with this crawler.
+        """
+        async with self._browser_lock:
+            if self.lease:
+                return
+            self.pool = get_browser_pool() if self.use_pool else BrowserPool(max_contexts=1)
+            storage_state = self.clearance_cache.load(self.domain)
+            if storage_state:
+                logger.info(f"Loaded cached clearance for {self.domain}")
+            self.lease = await self.pool.acquire(storage_state=storage_state)
+            self.browser = self.pool.browser
+            self.context = self.lease.context
+            self.page = self.lease.page
+            self._free_pages = [self.page]
 
-    async def _find_and_click_checkbox(self, is_saved: bool = False) -> bool:
-        """查找并点击 checkbox"""
-        if not self.page:
+    @asynccontextmanager
+    async def _tab(self) -> AsyncIterator[Page]:
+        """Borrow an idle tab of the leased context, opening a new one if all are busy"""
+        await self.init_browser()
+        page = self._free_pages.pop() if self._free_pages else await self.lease.new_page()
+        try:
+            yield page
+        finally:
+            self._free_pages.append(page)
+
+    async def get_http_headers(self) -> dict:
+        """Browser-like headers plus the cached clearance cookies and user agent"""
+        headers = await super().get_http_headers()
+        if self._clearance_entry is None:
+            self._clearance_entry = self.clearance_cache.load_entry(self.domain) or {}
+        if user_agent := self._clearance_entry.get("user_agent"):
+            headers["User-Agent"] = user_agent
+        cookies = self._clearance_entry.get("storage_state", {}).get("cookies", [])
+        if cookies:
+            headers["Cookie"] = "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+        return headers
+
+    async def _find_and_click_checkbox(
+        self,
+        is_saved: bool = False,
+        page: Page | None = None,
+        clip: dict | None = None,
+    ) -> bool:
+        """查找并点击 checkbox
+
+        截图只在内存中解码，``clip`` 可限定截图区域（页面坐标），
+        ``is_saved`` 或 ``CRAWLER_SAVE_SCREENSHOTS`` 开启时才把截图写入磁盘。
+        """
+        page = page or self.page
+        if not page:
             raise RuntimeError("Browser not initialized")
 
-        screenshot_path = await self._take_screenshot()
-        # 在图像中查找 checkbox
-        checkbox_pos = self.image_processor.find_checkbox(screenshot_path)
-        # 删除截图文件
-        if not is_saved and os.path.exists(screenshot_path):
-            # logger.info(f"Delete screenshot: {screenshot_path}")
-            os.remove(screenshot_path)
-        else:
+        screenshot = await page.screenshot(clip=clip)
+        if is_saved or settings.CRAWLER_SAVE_SCREENSHOTS:
+            screenshot_path = self._save_screenshot(screenshot)
             logger.info(f"Save screenshot: {screenshot_path}")
 
+        # 在图像中查找 checkbox
+        checkbox_pos = self.image_processor.find_checkbox(screenshot)
+
         if checkbox_pos:
             # 如果找到 checkbox，点击它
             x, y = checkbox_pos
+            if clip:
+                x += int(clip["x"])
+                y += int(clip["y"])
             x += random.randint(-5, 5)
             y += random.randint(-5, 5)
-            await self.page.mouse.click(x, y)
+            await page.mouse.click(x, y)
             logger.info(f"Click Cloudflare checkbox ({x}, {y})")
-            await self.delay(1, 3)
             return True
         else:
             # logger.info("未找到 checkbox")
             return False
 
-    async def _take_screenshot(self, save_dir: Path = settings.TMP_DIR / "screenshot"):
-        """Get full page screenshot"""
+    def _save_screenshot(
+        self, screenshot: bytes, save_dir: Path = settings.TMP_DIR / "screenshot"
+    ) -> Path:
+        """Save screenshot bytes for debugging"""
         # 创建保存目录
-        if not self.page:
-            raise RuntimeError("Browser not initialized")
-
         save_dir.mkdir(exist_ok=True, parents=True)
         now = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         screenshot_path = save_dir / f"{now}_{random.randint(1, 50):02d}_full.png"
-
-        # 使用 Playwright 截图
-        await self.page.screenshot(path=screenshot_path)
+        screenshot_path.write_bytes(screenshot)
         return screenshot_path
 
+    async def _save_clearance(self, page: Page):
+        """Persist cookies after passing the challenge so other contexts can reuse them"""
+        try:
+            storage_state = await page.context.storage_state()
+            user_agent = await page.evaluate("() => navigator.userAgent")
+            self.clearance_cache.save(self.domain, storage_state, user_agent=user_agent)
+            self._clearance_entry = None
+        except Exception as e:
+            logger.warning(f"Failed to save clearance for {self.domain}: {e}")
+
     async def get(
-        self, url, max_wait_time=settings.MAX_WAIT_TIME, loaded_selector=None
+        self,
+        url,
+        max_wait_time=settings.MAX_WAIT_TIME,
+        loaded_selector=None,
+        page: Page | None = None,
+        parse_only=None,
     ):
-        """Get page safely, handling Cloudflare verification and other issues"""
+        """Get page safely, handling Cloudflare verification and other issues
 
-        if not self.page:
-            raise RuntimeError("Browser not initialized")
+        Without ``page`` an idle tab of the leased context is used, so concurrent
+        calls never share a tab.
+        """
+
+        if page is None:
+            async with self._tab() as page:
+                return await self.get(
+                    url, max_wait_time, loaded_selector, page=page, parse_only=parse_only
+                )
 
         logger.info(f"Get page: {url}")
-        await self.page.goto(url)
-        start_time = time.time()
-        while time.time() - start_time < max_wait_time:
+        resource_policy = self.pool.resource_policy if self.pool else None
+        if resource_policy:
+            # 丢弃该标签页之前加载留下的统计
+            resource_policy.pop_page_stats(page)
+        start_time = time.monotonic()
+        deadline = start_time + max_wait_time
+        timings = {}
+        challenged = False
+
+        await page.goto(
+            url, wait_until="domcontentloaded", timeout=max_wait_time * 1000
+        )
+        timings["goto"] = time.monotonic() - start_time
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            state = await self._wait_for_ready_or_challenge(
+                page, loaded_selector, remaining
+            )
+            if state == "ready":
+                break
+            if state != "challenge":
+                continue
+
+            if not challenged:
+                challenged = True
+                timings["challenge_detected"] = time.monotonic() - start_time
+            await self._find_and_click_checkbox(page=page)
+            # 等待验证页消失，未消失则重新截图检测
+            await self._wait_for_challenge_passed(
+                page, min(CHALLENGE_RECHECK_INTERVAL, deadline - time.monotonic())
+            )
+        else:
+            # 超时抛出异常
+            raise TimeoutError(f"Timeout for {max_wait_time}s to load {url}")
+
+        timings["ready"] = time.monotonic() - start_time
+        if challenged:
+            await self._save_clearance(page)
+        content = await page.content()
+        timings["content"] = time.monotonic() - start_time
+        soup = self.parse(content, parse_only)
+        timings["total"] = time.monotonic() - start_time
+        self.record_timing(url, FetchStrategy.BROWSER, timings)
+        if resource_policy:
+            self.timings[-1]["resources"] = resource_policy.log_page_stats(url, page)
+        return soup
+
+    async def _wait_for_ready_or_challenge(
+        self, page: Page, loaded_selector: str | None, timeout: float
+    ) -> str:
+        """Race "loaded_selector attached" against "challenge page shown"
+
+        Returns ``"ready"``, ``"challenge"`` or ``"retry"`` (timeout or a
+        navigation interrupted the waits).
+        """
+        timeout_ms = max(timeout, 0.001) * 1000
+        if loaded_selector is None:
             try:
-                if "Just a moment" in await self.page.title():
-                    # await self.delay(5, 10)
-                    if not await self._find_and_click_checkbox():
-                        await self.delay(5, 10)
-                        continue
-                    else:
-                        await self.delay(5, 10)
-
-                if loaded_selector is not None:
-                    loaded_element = await self.page.query_selector(loaded_selector)
-                    if loaded_element:
-                        content = await self.page.content()
-                        return BeautifulSoup(content, "html.parser")
-                else:
-                    content = await self.page.content()
-                    return BeautifulSoup(content, "html.parser")
-            except Exception as e:
-                logger.error(f"Error occurred while getting page content: {e}")
-            # 随机延迟后继续检测
-            await self.delay(1, 2)
-        # 超时抛出异常
-        raise TimeoutError(f"Timeout for {max_wait_time}s to load {url}")
+                await page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+                return "challenge" if "Just a moment" in await page.title() else "ready"
+            except PlaywrightError:
+                return "retry"
+
+        waiters = {
+            asyncio.ensure_future(
+                page.wait_for_selector(
+                    loaded_selector, state="attached", timeout=timeout_ms
+                )
+            ): "ready",
+            asyncio.ensure_future(
+                page.wait_for_function(CHALLENGE_JS, timeout=timeout_ms)
+            ): "challenge",
+        }
+        done, pending = await asyncio.wait(
+            waiters, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for task in done:
+            if task.exception() is None:
+                return waiters[task]
+        for task in done:
+            if not isinstance(task.exception(), PlaywrightTimeoutError):
+                logger.debug(f"Waiting for page interrupted: {task.exception()}")
+                if page.is_closed():
+                    raise RuntimeError("Page closed while waiting for it to load")
+                # 导航中断时稍后重新等待，避免空转
+                await asyncio.sleep(0.2)
+        return "retry"
+
+    async def _wait_for_challenge_passed(self, page: Page, timeout: float) -> bool:
+        """Wait until the challenge title is gone"""
+        if timeout <= 0:
+            return False
+        try:
+            await page.wait_for_function(
+                f"() => !({CHALLENGE_JS})()", timeout=timeout * 1000
+            )
+            return True
+        except PlaywrightError:
+            return False
 
     async def get_books(self, page: int = 1) -> List[dict]:
         url = self.base_url.format(page)
-        soup = await self.get(url, loaded_selector="div#page")
-
-        book_elements = soup.find_all("article", class_="category-all")
+        soup = await self.fetch(
+            url, loaded_selector="div#page", parse_only=BOOK_LIST_TARGETS
+        )
+        book_dicts = self.parse_books(soup)
+        logger.info(f"Found {len(book_dicts)} issues on page {page}")
+        return book_dicts
 
+    def parse_books(self, soup) -> List[dict]:
+        """Extract issues from a parsed listing page"""
         book_dicts = []
-        for book_element in book_elements:
-            title_element = book_element.find("h3", class_="entry-title")
+        for book_element in soup.select("article.category-all"):
+            title_element = book_element.select_one("h3.entry-title")
             title = title_element.text.strip()
-            link_element = title_element.find("a")
-            detail_link = link_element["href"]
-            date_element = book_element.find("time", class_="entry-date")
+            detail_link = title_element.select_one("a")["href"]
+            date_element = book_element.select_one("time.entry-date")
             date = date_element.text.strip() if date_element else None
             if date:
                 date = datetime.strptime(date, "%d.%m.%Y, %H:%M").strftime("%Y-%m-%d")
 
-            cover_element = book_element.find("img", class_="wp-post-image")
-            cover_link = (
-                cover_element["data-src"]
-                if cover_element and "data-src" in cover_element.attrs
-                else None
-            )
+            cover_element = book_element.select_one("img.wp-post-image")
+            cover_link = cover_element.get("data-src") if cover_element else None
 
             book_dict = {
                 "title": title,
@@ -161,44 +324,90 @@ class EconomistCrawler(BaseCrawler):
             }
 
             book_dicts.append(book_dict)
-        logger.info(f"Found {len(book_dicts)} issues on page {page}")
         return book_dicts
 
-    async def get_book(self, book_dict: dict) -> dict:
+    @staticmethod
+    def parse_download_page_link(soup) -> str | None:
+        """Extract the download page link from a parsed detail page"""
+        link_element = soup.select_one("div.vk-att-item a")
+        return link_element.get("href") if link_element else None
+
+    @staticmethod
+    def parse_download_link(soup) -> str | None:
+        """Extract the file link from a parsed download page"""
+        download_input = soup.select_one('input[name="url"]')
+        return download_input.get("value") if download_input else None
+
+    async def get_book(self, book_dict: dict, page: Page | None = None) -> dict:
         logger.info(f"Getting book details: {book_dict['title']}")
-        soup = await self.get(book_dict["detail_link"], loaded_selector="div#page")
-        if not soup:
+        soup = await self.fetch(
+            book_dict["detail_link"],
+            loaded_selector="div#page",
+            parse_only=BOOK_DETAIL_TARGETS,
+            page=page,
+        )
+        if soup is None:
             logger.error("Failed to load book detail page")
             return {}
 
-        download_page_element = soup.find("div", class_="vk-att-item")
-        if not download_page_element or not download_page_element.find("a"):
+        if not (download_page_link := self.parse_download_page_link(soup)):
             logger.error(f"Failed to find download page link for {book_dict['title']}")
             return book_dict
 
-        download_page_link = download_page_element.find("a")["href"]
         download_url = f"https://magazinelib.com{download_page_link}"
 
-        soup = await self.get(download_url, loaded_selector="div.docs_panel")
+        soup = await self.fetch(
+            download_url,
+            loaded_selector="div.docs_panel",
+            parse_only=DOWNLOAD_PAGE_TARGETS,
+            page=page,
+        )
+        if soup is None:
+            logger.error("Failed to load download page")
+            return book_dict
 
-        download_input = soup.find("input", {"name": "url"})
-        if not download_input:
+        if not (download_link := self.parse_download_link(soup)):
             logger.error("Failed to find download link")
             return book_dict
 
-        download_link = download_input["value"]
         logger.info(f"Found download link: {download_link}")
         book_dict["download_link"] = download_link
         return book_dict
 
+    async def get_books_details(
+        self,
+        book_dicts: List[dict],
+        concurrency: int = settings.CRAWLER_DETAIL_CONCURRENCY,
+    ) -> List[dict]:
+        """Resolve download links for many books concurrently
+
+        At most ``concurrency`` books are crawled at once. Pages that need the
+        browser borrow their own tab of one leased context, and tabs are reused
+        between books. A failing book is logged and returned unchanged.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def crawl(book_dict: dict) -> dict:
+            async with semaphore:
+                try:
+                    return await self.get_book(book_dict)
+                except Exception as e:
+                    logger.error(f"Failed to get book details {book_dict.get('title')}: {e}")
+                    return book_dict
+
+        logger.info(f"Getting details of {len(book_dicts)} books, concurrency={concurrency}")
+        return list(await asyncio.gather(*(crawl(book_dict) for book_dict in book_dicts)))
+
     async def close(self):
-        """Close browser and Playwright"""
-        if self.page:
-            await self.page.close()
-        if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
-        logger.info("Browser closed")
+        """Return the lease; close the browser only when the pool is private"""
+        if self.lease:
+            await self.lease.release()
+            self.lease = None
+        self._free_pages = []
+        if self.pool and not self.use_pool:
+            await self.pool.close()
+        self.pool = None
+        self.browser = None
+        self.context = None
+        self.page = None
+        logger.info("Browser released")
@@ -0,0 +1,101 @@
+import re
+from urllib.parse import urlparse
+
+from app.config import settings
+
+
+class FetchStrategy:
+    """页面获取方式"""
+
+    HTTP = "http"
+    BROWSER = "browser"
+
+
+def url_pattern(url: str) -> str:
+    """把 URL 归一化为统计用的模式
+
+    保留域名和第一级路径，数字段替换为 ``{n}``，其余段替换为 ``*``，
+    例如 ``/all/the-economist/page/2/`` -> ``host/all/*/*/{n}``。
+    """
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    pattern = segments[:1] + [
+        "{n}" if re.fullmatch(r"\d+", segment) else "*" for segment in segments[1:]
+    ]
+    return "/".join([parsed.hostname or "", *pattern])
+
+
+class _PatternStats:
+    def __init__(self):
+        self.success = {FetchStrategy.HTTP: 0, FetchStrategy.BROWSER: 0}
+        self.failure = {FetchStrategy.HTTP: 0, FetchStrategy.BROWSER: 0}
+        self.http_skipped = 0
+
+
+class FetchStats:
+    """按 URL 模式统计各获取方式的成功率，决定是否先尝试 HTTP
+
+    HTTP 成功率长期过低的模式直接走浏览器，但每隔 ``probe_interval`` 次仍会
+    重新试探一次 HTTP，以便站点策略变化后恢复快速路径。
+    """
+
+    def __init__(
+        self,
+        min_samples: int = settings.CRAWLER_HTTP_MIN_SAMPLES,
+        min_success_rate: float = settings.CRAWLER_HTTP_MIN_SUCCESS_RATE,
+        probe_interval: int = settings.CRAWLER_HTTP_PROBE_INTERVAL,
+        max_samples: int = 100,
+    ):
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.probe_interval = probe_interval
+        self.max_samples = max_samples
+        self._stats: dict[str, _PatternStats] = {}
+
+    def _get(self, pattern: str) -> _PatternStats:
+        return self._stats.setdefault(pattern, _PatternStats())
+
+    def http_success_rate(self, pattern: str) -> float | None:
+        stats = self._get(pattern)
+        total = stats.success[FetchStrategy.HTTP] + stats.failure[FetchStrategy.HTTP]
+        if total == 0:
+            return None
+        return stats.success[FetchStrategy.HTTP] / total
+
+    def should_try_http(self, pattern: str) -> bool:
+        stats = self._get(pattern)
+        total = stats.success[FetchStrategy.HTTP] + stats.failure[FetchStrategy.HTTP]
+        if total < self.min_samples:
+            return True
+        if (self.http_success_rate(pattern) or 0) >= self.min_success_rate:
+            return True
+
+        stats.http_skipped += 1
+        if stats.http_skipped >= self.probe_interval:
+            stats.http_skipped = 0
+            return True
+        return False
+
+    def record(self, pattern: str, strategy: str, success: bool):
+        stats = self._get(pattern)
+        counter = stats.success if success else stats.failure
+        counter[strategy] += 1
+
+        # 样本过多时减半，让较新的结果占更大权重
+        if stats.success[strategy] + stats.failure[strategy] > self.max_samples:
+            stats.success[strategy] //= 2
+            stats.failure[strategy] //= 2
+
+    def snapshot(self) -> dict:
+        return {
+            pattern: {
+                "success": dict(stats.success),
+                "failure": dict(stats.failure),
+                "http_success_rate": self.http_success_rate(pattern),
+            }
+            for pattern, stats in self._stats.items()
+        }
+
+
+# 进程内共享的统计，所有爬虫实例共同学习
+fetch_stats = FetchStats()
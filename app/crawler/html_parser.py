@@ -0,0 +1,183 @@
+import re
+from html.parser import HTMLParser
+from typing import Sequence, Type
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+class ParseTarget:
+    """部分解析时需要保留的子树：标签名及需要匹配的属性
+
+    ``class`` 属性按单个类名匹配，例如 ``ParseTarget("article", {"class": "category-all"})``。
+    """
+
+    def __init__(self, name: str, attrs: dict | None = None):
+        self.name = name
+        self.attrs = attrs or {}
+
+    def matches(self, name: str, attrs: dict) -> bool:
+        if name != self.name:
+            return False
+        for key, value in self.attrs.items():
+            actual = attrs.get(key)
+            if actual is None:
+                return False
+            if key == "class":
+                classes = actual.split() if isinstance(actual, str) else actual
+                if value not in classes:
+                    return False
+            elif actual != value:
+                return False
+        return True
+
+    @classmethod
+    def from_selector(cls, selector: str) -> "ParseTarget | None":
+        """把 ``tag``、``tag#id``、``tag.class`` 形式的简单选择器转为 ParseTarget，其他形式返回 None"""
+        match = re.fullmatch(r"([a-zA-Z][\w-]*)(?:#([\w-]+)|\.([\w-]+))?", selector.strip())
+        if match is None:
+            return None
+        name, id_, class_ = match.groups()
+        if id_:
+            return cls(name, {"id": id_})
+        if class_:
+            return cls(name, {"class": class_})
+        return cls(name)
+
+
+class _Found(Exception):
+    pass
+
+
+class _TargetScanner(HTMLParser):
+    """只扫描开始标签，遇到第一个匹配的元素即停止，不构建文档树"""
+
+    def __init__(self, target: ParseTarget):
+        super().__init__(convert_charrefs=False)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        if self.target.matches(tag, dict(attrs)):
+            raise _Found
+
+    handle_startendtag = handle_starttag
+
+
+class BaseHtmlParser:
+    """HTML 解析后端
+
+    ``parse`` 返回的文档及其节点都提供 ``select``、``select_one``、``text``、
+    ``get`` 和 ``[]`` 取属性，爬虫只依赖这些接口。
+    """
+
+    name = ""
+
+    def parse(self, html: str, parse_only: Sequence[ParseTarget] | None = None):
+        raise NotImplementedError
+
+    def contains(self, html: str, selector: str) -> bool:
+        """完整文档中是否存在匹配 selector 的元素
+
+        部分解析的结果中可能没有页面加载完成的标志元素，需要在完整文档上检查。
+        简单选择器只扫描开始标签，其他选择器完整解析后查找。
+        """
+        target = ParseTarget.from_selector(selector)
+        if target is None:
+            return self.parse(html).select_one(selector) is not None
+
+        scanner = _TargetScanner(target)
+        try:
+            scanner.feed(html)
+            scanner.close()
+        except _Found:
+            return True
+        return False
+
+
+class SoupHtmlParser(BaseHtmlParser):
+    """BeautifulSoup 解析，``parse_only`` 通过 SoupStrainer 只构建需要的子树"""
+
+    def __init__(self, features: str = "html.parser"):
+        self.features = features
+        self.name = features
+
+    def parse(self, html: str, parse_only: Sequence[ParseTarget] | None = None):
+        strainer = None
+        if parse_only:
+            strainer = SoupStrainer(
+                lambda name, attrs: any(
+                    target.matches(name, dict(attrs or {})) for target in parse_only
+                )
+            )
+        return BeautifulSoup(html, self.features, parse_only=strainer)
+
+
+class _LexborNode:
+    """selectolax 节点包装，提供与 bs4 Tag 相同的常用接口"""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector: str) -> list["_LexborNode"]:
+        return [_LexborNode(node) for node in self.node.css(selector)]
+
+    def select_one(self, selector: str) -> "_LexborNode | None":
+        node = self.node.css_first(selector)
+        return _LexborNode(node) if node is not None else None
+
+    @property
+    def text(self) -> str:
+        return self.node.text()
+
+    @property
+    def attrs(self) -> dict:
+        return self.node.attributes
+
+    def get(self, key: str, default=None):
+        value = self.node.attributes.get(key)
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        if (value := self.get(key)) is None:
+            raise KeyError(key)
+        return value
+
+
+class SelectolaxHtmlParser(BaseHtmlParser):
+    """selectolax 解析，不支持部分解析，但完整解析也比 bs4 快得多"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser_class = LexborHTMLParser
+
+    def parse(self, html: str, parse_only: Sequence[ParseTarget] | None = None):
+        return _LexborNode(self._parser_class(html).root)
+
+    def contains(self, html: str, selector: str) -> bool:
+        return self.parse(html).select_one(selector) is not None
+
+
+def create_html_parser(parser_type: str) -> BaseHtmlParser:
+    """创建 HTML 解析后端
+
+    Args:
+        parser_type: 解析后端，支持 'html.parser'、'lxml' 和 'selectolax'
+
+    Returns:
+        BaseHtmlParser: 解析后端实例
+    """
+    parser_map: dict[str, Type[BaseHtmlParser]] = {
+        "html.parser": SoupHtmlParser,
+        "lxml": SoupHtmlParser,
+        "selectolax": SelectolaxHtmlParser,
+    }
+    if parser_type not in parser_map:
+        raise ValueError(f"Unsupported html parser type: {parser_type}")
+
+    if parser_map[parser_type] is SoupHtmlParser:
+        return SoupHtmlParser(parser_type)
+    return parser_map[parser_type]()
@@ -0,0 +1,143 @@
+from urllib.parse import urlparse
+from weakref import WeakKeyDictionary
+
+from loguru import logger
+from playwright.async_api import BrowserContext, Page, Request, Response, Route
+
+from app.config import settings
+
+# Cloudflare 验证需要的资源，始终放行
+CHALLENGE_DOMAINS = ("challenges.cloudflare.com",)
+CHALLENGE_PATH_PREFIX = "/cdn-cgi/"
+
+# 被拦截资源无法得知实际大小，按类型估算节省的流量（字节）
+ESTIMATED_RESOURCE_SIZES = {
+    "image": 60 * 1024,
+    "media": 500 * 1024,
+    "font": 40 * 1024,
+    "script": 30 * 1024,
+    "stylesheet": 15 * 1024,
+}
+DEFAULT_ESTIMATED_SIZE = 10 * 1024
+
+
+class PageResourceStats:
+    """单个页面的资源加载统计"""
+
+    def __init__(self):
+        self.loaded = 0
+        self.loaded_bytes = 0
+        self.blocked = 0
+        self.saved_bytes = 0
+        self.blocked_types: dict[str, int] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "loaded_bytes": self.loaded_bytes,
+            "blocked": self.blocked,
+            "saved_bytes": self.saved_bytes,
+            "blocked_types": dict(self.blocked_types),
+        }
+
+
+class ResourcePolicy:
+    """浏览器上下文的资源拦截策略
+
+    通过 ``context.route`` 中止图片、媒体、字体等资源以及广告/统计域名的请求，
+    页面主文档和 Cloudflare 验证相关的请求始终放行。
+    """
+
+    def __init__(
+        self,
+        blocked_types: list[str] = settings.CRAWLER_BLOCKED_RESOURCE_TYPES,
+        blocked_domains: list[str] = settings.CRAWLER_BLOCKED_DOMAINS,
+    ):
+        self.blocked_types = set(blocked_types)
+        self.blocked_domains = tuple(blocked_domains)
+        self.totals = PageResourceStats()
+        self._page_stats: WeakKeyDictionary[Page, PageResourceStats] = WeakKeyDictionary()
+
+    @staticmethod
+    def _match_domain(hostname: str, domains: tuple) -> bool:
+        return any(hostname == domain or hostname.endswith(f".{domain}") for domain in domains)
+
+    def should_block(self, url: str, resource_type: str, is_main_document: bool = False) -> bool:
+        """判断请求是否应被拦截"""
+        if is_main_document:
+            return False
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return False
+        hostname = parsed.hostname or ""
+        if self._match_domain(hostname, CHALLENGE_DOMAINS) or parsed.path.startswith(
+            CHALLENGE_PATH_PREFIX
+        ):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return self._match_domain(hostname, self.blocked_domains)
+
+    async def install(self, context: BrowserContext):
+        """在上下文上注册拦截规则和流量统计"""
+        await context.route("**/*", self._handle_route)
+        context.on("response", self._on_response)
+
+    def _stats_for(self, page: Page | None) -> PageResourceStats | None:
+        if page is None:
+            return None
+        if (stats := self._page_stats.get(page)) is None:
+            stats = self._page_stats[page] = PageResourceStats()
+        return stats
+
+    @staticmethod
+    def _page_of(request: Request) -> Page | None:
+        try:
+            return request.frame.page
+        except Exception:
+            return None
+
+    async def _handle_route(self, route: Route):
+        request = route.request
+        is_main_document = (
+            request.is_navigation_request() and request.frame.parent_frame is None
+        )
+        if not self.should_block(request.url, request.resource_type, is_main_document):
+            await route.continue_()
+            return
+
+        saved = ESTIMATED_RESOURCE_SIZES.get(request.resource_type, DEFAULT_ESTIMATED_SIZE)
+        for stats in (self.totals, self._stats_for(self._page_of(request))):
+            if stats is None:
+                continue
+            stats.blocked += 1
+            stats.saved_bytes += saved
+            stats.blocked_types[request.resource_type] = (
+                stats.blocked_types.get(request.resource_type, 0) + 1
+            )
+        await route.abort("blockedbyclient")
+
+    def _on_response(self, response: Response):
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except ValueError:
+            size = 0
+        for stats in (self.totals, self._stats_for(self._page_of(response.request))):
+            if stats is None:
+                continue
+            stats.loaded += 1
+            stats.loaded_bytes += size
+
+    def pop_page_stats(self, page: Page) -> PageResourceStats:
+        """取出并重置页面的统计，用于报告一次页面加载的资源情况"""
+        return self._page_stats.pop(page, None) or PageResourceStats()
+
+    def log_page_stats(self, url: str, page: Page) -> dict:
+        """记录一次页面加载拦截的资源和估算节省的流量"""
+        stats = self.pop_page_stats(page)
+        logger.info(
+            f"Resources for {url}: loaded {stats.loaded} "
+            f"({stats.loaded_bytes / 1024:.0f}KB), blocked {stats.blocked} "
+            f"{stats.blocked_types}, saved ~{stats.saved_bytes / 1024:.0f}KB"
+        )
+        return stats.to_dict()
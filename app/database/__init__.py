@@ -2,11 +2,13 @@ from app.database.base import BaseModel, engine, get_denpend_db, get_depend_db
 from app.database.book import Book, BookFormat
 from app.database.series import BookSeries
 from app.database.task import Task, TaskStatus
+from app.database.upload import Upload
 from app.database.user import User
 from app.database.user_book import UserBook, UserBookStatus
 
 __all__ = [
     "Task",
+    "Upload",
     "User",
     "Book",
     "UserBook",
@@ -150,7 +150,8 @@ class ModelMixin(Generic[T], DictMixin):
         db.refresh(obj)
         return cast(T, obj)
 
-    def update(self, **kwargs):
+    def update(self, commit: bool = True, **kwargs):
+        """更新字段；commit 为 False 时只 flush，由调用方统一提交事务"""
         for key, value in kwargs.items():
             if key in ["id", "created_at", "updated_at"]:
                 continue
@@ -160,6 +161,9 @@ class ModelMixin(Generic[T], DictMixin):
                 setattr(self, key, value)
 
         self.updated_at = datetime.now(UTC)
+        if not commit:
+            self.db.flush()
+            return
         self.db.commit()
         self.db.refresh(self)
 
@@ -1,5 +1,5 @@
 from datetime import UTC, datetime
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from loguru import logger
 from sqlalchemy import Column, DateTime, Integer, String
@@ -50,7 +50,13 @@ class Book(BaseModel, ModelMixin["Book"]):
     file_path = Column(String(500))
     file_size = Column(Integer, default=0)
     file_format = Column(String(20), default=BookFormat.PDF)
+    content_hash = Column(String(64), index=True)  # 文件内容的 SHA-256
     downloaded_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    evicted_at = Column(DateTime, nullable=True)  # 本地文件被清理的时间，之后从云存储分发
+    optimized_path = Column(String(500))  # 优化后的 PDF 路径，原文件保留在 file_path
+    optimized_size = Column(Integer)  # 优化后的文件大小
+    optimized_hash = Column(String(64))  # 优化后文件的 SHA-256，用于上传登记
+    download_attempted_at = Column(DateTime, nullable=True)  # 最近一次批量下载失败的时间
 
     # 关系定义
     user_books = relationship("UserBook", back_populates="book")
@@ -106,26 +112,103 @@ class Book(BaseModel, ModelMixin["Book"]):
 
         return book
 
-    def update(self, **kwargs):
+    def update(self, commit: bool = True, **kwargs):
         kwargs.pop("user_books", None)
         kwargs.pop("users", None)
-        super().update(**kwargs)
+        super().update(commit=commit, **kwargs)
 
-    def downloaded(self, file_path: str, file_size: int, file_format: str) -> None:
-        """实现接口方法：更新下载状态"""
+    @classmethod
+    def _pending_query(cls, db: Session):
+        """有下载链接但未下载的书籍"""
+        return db.query(cls).filter(
+            cls.file_size == 0,
+            (cls.file_path == "") | cls.file_path.is_(None),
+            cls.download_link != "",
+            cls.download_link.isnot(None),
+        )
+
+    @classmethod
+    def count_pending(cls, db: Session) -> int:
+        """可以领取的待下载书籍数"""
+        return cls._pending_query(db).count()
+
+    @classmethod
+    def claim_pending(cls, db: Session, limit: int) -> List["Book"]:
+        """锁定最多 limit 本有下载链接但未下载的书籍
+
+        使用 SELECT ... FOR UPDATE SKIP LOCKED，其他 worker 跳过已被锁定的书籍，
+        锁在当前事务提交或回滚时释放。从未失败的书籍优先，其余按上次失败时间从早到晚，
+        持续失败的书籍不会一直占住每个批次。
+        """
+        return (
+            cls._pending_query(db)
+            .order_by(cls.download_attempted_at.asc().nullsfirst(), cls.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=cls)
+            .all()
+        )
+
+    def download_failed(self, commit: bool = True) -> None:
+        """记录下载失败的时间，批量领取时排到后面"""
+        self.update(commit=commit, download_attempted_at=datetime.now(UTC))
+
+    def downloaded(
+        self,
+        file_path: str,
+        file_size: int,
+        file_format: str,
+        content_hash: str | None = None,
+        commit: bool = True,
+    ) -> None:
+        """实现接口方法：更新下载状态，commit 为 False 时由调用方统一提交"""
         logger.info(
             f"下载后更新书籍{self.title}信息: size={file_size}, path={file_path}, format={file_format}"
         )
         self.update(
+            commit=commit,
+            evicted_at=None,
+            optimized_path=None,
+            optimized_size=None,
+            optimized_hash=None,
+            download_attempted_at=None,
             file_path=file_path,
             file_size=file_size,
             file_format=file_format,
+            content_hash=content_hash,
             downloaded_at=datetime.now(UTC),
         )
         
         if user_books := UserBook.query(self.db, book_id=self.id):
             for user_book in user_books:
-                user_book.downloaded()
+                user_book.downloaded(commit=commit)
+
+    def optimized(
+        self, optimized_path: str, optimized_size: int, optimized_hash: str | None = None
+    ) -> None:
+        """记录优化后的文件，分发时优先使用"""
+        logger.info(
+            f"书籍{self.title}已优化: {self.file_size} -> {optimized_size} 字节"
+        )
+        self.update(
+            optimized_path=optimized_path,
+            optimized_size=optimized_size,
+            optimized_hash=optimized_hash,
+        )
+
+    def optimized_evicted(self) -> None:
+        """优化后的文件已被清理，之后分发原文件"""
+        self.update(optimized_path=None, optimized_size=None, optimized_hash=None)
+
+    @property
+    def size_reduction(self) -> int:
+        """优化减少的字节数"""
+        if not (self.optimized_size and self.file_size):
+            return 0
+        return self.file_size - self.optimized_size
+
+    def evicted(self, evicted_at: datetime | None = None) -> None:
+        """本地文件已清理，分发时从云存储获取"""
+        self.update(evicted_at=evicted_at or datetime.now(UTC))
 
     def distributed(
         self, user_id: int | None = None, email: str | None = None
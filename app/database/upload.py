@@ -0,0 +1,51 @@
+from typing import List
+
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Session
+
+from app.database.base import BaseModel, ModelMixin
+
+
+class Upload(BaseModel, ModelMixin["Upload"]):
+    """已上传到云存储的文件，按内容摘要登记
+
+    分发时先查询登记信息，已上传的文件无需访问云存储即可生成链接。
+    """
+
+    __tablename__ = "uploads"
+    __table_args__ = (UniqueConstraint("bucket", "content_hash"),)
+
+    bucket = Column(String(200), nullable=False)
+    key = Column(String(500), nullable=False)
+    content_hash = Column(String(64), index=True, nullable=False)  # 文件内容的 SHA-256
+    etag = Column(String(100))
+    size = Column(Integer)
+
+    @classmethod
+    def lookup(cls, db: Session, bucket: str, content_hash: str) -> "Upload | None":
+        """查询内容已上传到 bucket 的登记信息"""
+        return cls.query_first(db, bucket=bucket, content_hash=content_hash)
+
+    @classmethod
+    def lookup_many(cls, db: Session, bucket: str, content_hashes: List[str]) -> List["Upload"]:
+        return cls.query(
+            db, bucket=bucket, content_hash={"operator": "in", "value": content_hashes}
+        )
+
+    @classmethod
+    def register(
+        cls,
+        db: Session,
+        bucket: str,
+        key: str,
+        content_hash: str,
+        etag: str | None = None,
+        size: int | None = None,
+    ) -> "Upload":
+        """登记已上传的文件，已登记时更新键名和校验信息"""
+        if upload := cls.lookup(db, bucket, content_hash):
+            upload.update(key=key, etag=etag, size=size)
+            return upload
+        return cls.create(
+            db, bucket=bucket, key=key, content_hash=content_hash, etag=etag, size=size
+        )
@@ -23,9 +23,9 @@ class UserBook(BaseModel, ModelMixin['UserBook']):
     user = relationship("User", back_populates="user_books")
     book = relationship("Book", back_populates="user_books")
     
-    def downloaded(self, force=False):
+    def downloaded(self, force=False, commit=True):
         if self.status == UserBookStatus.PENDING or force:
-            self.update(status=UserBookStatus.DOWNLOADED)
+            self.update(commit=commit, status=UserBookStatus.DOWNLOADED)
 
     def distributed(self):
         self.update(status=UserBookStatus.DISTRIBUTED)
@@ -1,14 +1,18 @@
 import os
 from abc import ABC, abstractmethod
+from datetime import UTC, datetime
 from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from hashlib import sha256
 from typing import List, Tuple
 
 from loguru import logger
 
 from app.config import settings
-from app.uploader import create_uploader
+from app.uploader import UploadRegistry, create_uploader
+from app.uploader.registry import file_sha256
+from app.utils.compressor import get_compression_service
 
 
 
@@ -19,6 +23,7 @@ class BaseDistributor(ABC):
     def __init__(self, sender_email: str):
         self.sender_email = sender_email
         self.uploader = create_uploader(settings.UPLOADER_TYPE)
+        self.registry = UploadRegistry(self.uploader)
 
     @staticmethod
     def get_mime_subtype(file_format: str) -> str:
@@ -97,26 +102,137 @@ class BaseDistributor(ABC):
         """
         pass
 
-    async def _get_url(self, file_path: str, expires_in: int = 604800) -> Tuple[str, str]:
+    async def _get_url(self, file_path: str, expires_in: int = 604800,
+                       content_hash: str | None = None) -> Tuple[str, str, float]:
         """上传文件并获取URL
         
+        文件按内容摘要上传并登记，已登记的内容不访问云存储，只生成预签名URL。
+        本地文件不存在时（已清理或下载时已同时上传）使用云存储中的文件。
+
         Args:
-            file_path: 文件路径
+            file_path: 文件路径，其中的文件名用作下载文件名
             expires_in: URL有效期（秒）
+            content_hash: 文件内容的 SHA-256，未知时由本地文件计算
             
         Returns:
-            Tuple[str, str]: (文件键名, 访问URL)
+            Tuple[str, str, float]: (文件键名, 访问URL, URL过期时间戳)
         """
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"文件不存在: {file_path}")
-            
-        # 获取上传器
-        # 生成文件键名
-        key = os.path.basename(file_path)
-        # 上传文件并获取URL
-        url = self.uploader.get_url(file_path, key, expires_in)
+        if not file_path:
+            raise FileNotFoundError("文件路径为空")
+
+        if os.path.exists(file_path):
+            # 更新使用时间，下载目录按最近使用时间清理
+            os.utime(file_path)
+        # 云存储中也不存在时抛出 FileNotFoundError
+        key = self.registry.resolve(file_path, content_hash)
+        url, expires_at = self.uploader.generate_urls_with_expiry(
+            [key], expires_in, [os.path.basename(file_path)]
+        )[0]
         
-        return key, url
+        return key, url, expires_at
+
+    async def _get_urls(
+        self, files: List[Tuple[str, str | None]], expires_in: int = 604800
+    ) -> List[Tuple[str, str, float] | None]:
+        """批量获取多个文件的URL
+
+        已登记的内容一次查出，其余文件逐个上传；URL 批量生成，可复用的直接取自缓存。
+
+        Args:
+            files: (文件路径, 内容摘要) 列表
+            expires_in: URL有效期（秒）
+
+        Returns:
+            与 files 顺序一致的 (文件键名, 访问URL, URL过期时间戳)，获取失败的文件为 None
+        """
+        known = self.registry.lookup_many([content_hash for _, content_hash in files if content_hash])
+        keys = []
+        for file_path, content_hash in files:
+            try:
+                if not file_path:
+                    raise FileNotFoundError("文件路径为空")
+                if os.path.exists(file_path):
+                    os.utime(file_path)
+                keys.append(known.get(content_hash) or self.registry.resolve(file_path, content_hash))
+            except Exception as e:
+                logger.error(f"文件{file_path}上传失败: {str(e)}")
+                keys.append(None)
+
+        resolved = [(key, os.path.basename(file_path)) for key, (file_path, _) in zip(keys, files) if key]
+        urls = iter(self.uploader.generate_urls_with_expiry(
+            [key for key, _ in resolved], expires_in, [filename for _, filename in resolved]
+        ))
+        return [(key, *next(urls)) if key else None for key in keys]
+
+    @staticmethod
+    def _get_book_file(book_dict: dict) -> Tuple[str, int, str | None]:
+        """分发使用的文件路径、大小和内容摘要，优先使用优化后的 PDF"""
+        optimized_path = book_dict.get('optimized_path')
+        if optimized_path and os.path.exists(optimized_path):
+            size = book_dict.get('optimized_size') or os.path.getsize(optimized_path)
+            return optimized_path, size, book_dict.get('optimized_hash')
+        return (
+            book_dict.get('file_path', ''),
+            book_dict.get('file_size', 0),
+            book_dict.get('content_hash'),
+        )
+
+    async def _get_bundle_url(
+        self, book_dicts: List[dict], expires_in: int = 604800
+    ) -> Tuple[str, float, List[dict]]:
+        """把多本书籍压缩为一个压缩包，上传并获取URL
+
+        只打包本地存在的文件，返回 (访问URL, URL过期时间戳, 实际打包的书籍)。压缩包按书籍内容的摘要
+        登记，同一组书籍再次分发时直接复用已上传的压缩包，无需重新压缩。
+        """
+        packed, file_paths, content_hashes = [], [], []
+        for book_dict in book_dicts:
+            file_path, _, content_hash = self._get_book_file(book_dict)
+            if file_path and os.path.exists(file_path):
+                packed.append(book_dict)
+                file_paths.append(file_path)
+                content_hashes.append(content_hash or file_sha256(file_path))
+        if len(file_paths) < 2:
+            raise FileNotFoundError("本地文件不足两个，无需打包")
+
+        digest = sha256("\n".join(sorted(content_hashes)).encode()).hexdigest()
+        if not (key := self.registry.lookup(digest)):
+            settings.TMP_DIR.mkdir(exist_ok=True, parents=True)
+            result = await get_compression_service().compress(
+                file_paths, settings.TMP_DIR / f"books-{digest[:12]}", codecs=("lzma2", "zip")
+            )
+            bundle_path = result['output_path']
+            suffix = os.path.basename(bundle_path)[len(f"books-{digest[:12]}"):]
+            try:
+                key = self.registry.upload(bundle_path, digest, key=f"bundles/{digest}{suffix}")
+            finally:
+                os.remove(bundle_path)
+        else:
+            logger.info(f"复用已上传的压缩包: {key}")
+
+        suffix = os.path.basename(key)[len(digest):]
+        url, expires_at = self.uploader.generate_urls_with_expiry(
+            [key], expires_in, [f"books-{digest[:12]}{suffix}"]
+        )[0]
+        return url, expires_at, packed
+
+    async def _get_book_links(self, book_dicts: List[dict]) -> List[Tuple[dict, str, float]]:
+        """逐本获取下载链接，返回 (书籍, URL, URL过期时间戳)，获取失败的书籍记录日志并跳过"""
+        books, files = [], []
+        for book_dict in book_dicts:
+            file_path, _, content_hash = self._get_book_file(book_dict)
+            
+            if not file_path:
+                logger.warning(f"文件未找到: {book_dict.get('title', '')}")
+                continue
+            books.append(book_dict)
+            files.append((file_path, content_hash))
+
+        return [
+            (book_dict, result[1], result[2])
+            for book_dict, result in zip(books, await self._get_urls(files))
+            if result
+        ]
 
     def _should_use_uploader(self, file_size: int, max_attachment_size: int = 10 * 1024 * 1024) -> bool:
         """判断是否应该使用上传器
@@ -151,25 +267,30 @@ class BaseDistributor(ABC):
             raise ValueError("收件人邮箱不能为空")
         
         book_title = book_dict.get('title', '')
-        file_path = book_dict.get('file_path', '')
+        file_path, file_size, content_hash = self._get_book_file(book_dict)
         file_format = book_dict.get('file_format', '')
-        file_size = book_dict.get('file_size', 0)
 
         msg = MIMEMultipart()
         msg['Subject'] = subject or f"发送书籍：《{book_title}》"
         msg['From'] = f"Book Sender <{self.sender_email}>"
         msg['To'] = email
 
-        # 如果文件太大，使用上传器
-        if self._should_use_uploader(file_size):
+        # 如果文件太大或本地文件已清理，使用上传器
+        if (
+            self._should_use_uploader(file_size)
+            or book_dict.get('evicted_at')
+            or (file_path and not os.path.exists(file_path))
+        ):
             try:
-                key, url = await self._get_url(file_path)
-                body = message or self._generate_book_email_body_with_url(book_dict, url)
+                key, url, expires_at = await self._get_url(file_path, content_hash=content_hash)
+                body = message or self._generate_book_email_body_with_url(book_dict, url, expires_at)
             except Exception as e:
                 logger.error(f"文件上传失败: {str(e)}")
                 raise e
             msg.attach(MIMEText(body, 'plain', 'utf-8'))
         elif file_path and os.path.exists(file_path):
+            # 更新使用时间，下载目录按最近使用时间清理
+            os.utime(file_path)
             body = message or self._generate_book_email_body(book_dict)
             msg.attach(MIMEText(body, 'plain', 'utf-8'))
             with open(file_path, 'rb') as f:
@@ -212,20 +333,22 @@ class BaseDistributor(ABC):
         msg['From'] = f"Book Sender <{self.sender_email}>"
         msg['To'] = email
 
-        # 处理每本书
-        book_links = []
-        for book_dict in book_dicts:
-            file_path = book_dict.get('file_path', '')
-            
-            if not file_path or not os.path.exists(file_path):
-                logger.warning(f"文件未找到: {file_path}")
-                continue
-                
+        if settings.DISTRIBUTE_BUNDLE and len(book_dicts) > 1:
             try:
-                key, url = await self._get_url(file_path)
-                book_links.append((book_dict, url))
+                url, expires_at, packed = await self._get_bundle_url(book_dicts)
             except Exception as e:
-                logger.error(f"文件{file_path}上传失败: {str(e)}")
+                logger.error(f"打包书籍失败，改为逐本发送链接: {str(e)}")
+            else:
+                # 本地已清理、未打包的书籍单独发送链接
+                packed_ids = {id(book_dict) for book_dict in packed}
+                rest = [book_dict for book_dict in book_dicts if id(book_dict) not in packed_ids]
+                book_links = await self._get_book_links(rest) if rest else []
+                body = message or self._generate_bundle_email_body(packed, url, expires_at, book_links)
+                msg.attach(MIMEText(body, 'plain', 'utf-8'))
+                return msg
+
+        # 处理每本书
+        book_links = await self._get_book_links(book_dicts)
 
         # 设置邮件正文
         if book_links:
@@ -255,7 +378,12 @@ class BaseDistributor(ABC):
         由 Book Sender 自动发送
         """
 
-    def _generate_book_email_body_with_url(self, book_dict: dict, url: str) -> str:
+    @staticmethod
+    def _format_expiry(expires_at: float) -> str:
+        """下载链接的过期时间，复用缓存的链接时可能早于 7 天"""
+        return datetime.fromtimestamp(expires_at, UTC).strftime("%Y-%m-%d %H:%M (UTC)")
+
+    def _generate_book_email_body_with_url(self, book_dict: dict, url: str, expires_at: float) -> str:
         """生成带下载链接的邮件正文"""
         book_title = book_dict.get('title', '')
         file_size = book_dict.get('file_size', 0)
@@ -271,15 +399,55 @@ class BaseDistributor(ABC):
         下载链接：
         {url}
 
-        注意：此链接将在7天后过期，请及时下载。
+        注意：此链接将于 {self._format_expiry(expires_at)} 过期，请及时下载。
+
+        祝您阅读愉快！
+        """
+
+    def _generate_bundle_email_body(
+        self,
+        book_dicts: List[dict],
+        url: str,
+        expires_at: float,
+        book_links: List[Tuple[dict, str, float]] | None = None,
+    ) -> str:
+        """生成打包下载的多本书籍邮件正文，book_links 为未打包、单独下载的书籍"""
+        books_info = ''.join(
+            f"""
+        - 《{book_dict.get('title', '')}》"""
+            for book_dict in book_dicts
+        )
+        links_info = ''.join(
+            f"""
+        《{book_dict.get('title', '')}》
+        - 下载链接：{book_url}"""
+            for book_dict, book_url, _ in book_links or []
+        )
+        expires_at = min([expires_at] + [link_expires_at for _, _, link_expires_at in book_links or []])
+        if links_info:
+            links_info = f"""
+        以下书籍请单独下载：
+        {links_info}
+"""
+        return f"""
+        您好，
+
+        已为您将以下书籍打包：
+        {books_info}
+
+        下载链接：
+        {url}
+        {links_info}
+
+        注意：下载链接将于 {self._format_expiry(expires_at)} 过期，请及时下载。
 
         祝您阅读愉快！
         """
 
-    def _generate_books_email_body_with_urls(self, book_links: List[Tuple[dict, str]]) -> str:
-        """生成带下载链接的多本书籍邮件正文"""
+    def _generate_books_email_body_with_urls(self, book_links: List[Tuple[dict, str, float]]) -> str:
+        """生成带下载链接的多本书籍邮件正文，过期时间取最早过期的链接"""
         books_info = []
-        for book_dict, url in book_links:
+        for book_dict, url, _ in book_links:
             book_title = book_dict.get('title', '')
             file_size = book_dict.get('file_size', 0)
             books_info.append(f"""
@@ -294,7 +462,7 @@ class BaseDistributor(ABC):
 
         {''.join(books_info)}
 
-        注意：下载链接将在7天后过期，请及时下载。
+        注意：下载链接将于 {self._format_expiry(min(expires_at for _, _, expires_at in book_links))} 过期，请及时下载。
 
         祝您阅读愉快！
         """
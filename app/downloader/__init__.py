@@ -1,5 +1,15 @@
 from app.downloader.base import BaseDownloader
 from app.downloader.economist_downloader import FileDownloader
 from app.downloader.factory import create_downloader
+from app.downloader.governor import DownloadGovernor, get_download_governor
+from app.downloader.progress import ProgressBroker, get_progress_broker
 
-__all__ = ["BaseDownloader", "create_downloader", "FileDownloader"]
+__all__ = [
+    "BaseDownloader",
+    "create_downloader",
+    "FileDownloader",
+    "DownloadGovernor",
+    "get_download_governor",
+    "ProgressBroker",
+    "get_progress_broker",
+]
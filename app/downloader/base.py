@@ -1,14 +1,30 @@
 import asyncio
+import hashlib
+import json
 import os
 import random
+import uuid
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import Awaitable, Callable
 
-import requests
+import aiofiles
+import httpx
 from loguru import logger
 
 from app.config import settings
 from app.database.book import BookFormat
+from app.downloader.governor import DownloadGovernor, get_download_governor
+from app.downloader.lease import DownloadLeases, get_download_leases
+from app.downloader.progress import ProgressBroker, current_progress, get_progress_broker
+from app.downloader.storage import InsufficientStorageError, StorageManager
+from app.utils.http_client import get_http_client
+from app.uploader import BaseUploader, UploadRegistry, create_uploader
+from app.utils.rate_limiter import get_rate_limiter
+
+
+class SegmentMismatchError(IOError):
+    """分段响应与请求的范围不一致，通常是文件已变化，需要重新下载"""
 
 
 class BaseDownloader:
@@ -19,7 +35,8 @@ class BaseDownloader:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate, br",
+            # 文件本身已压缩，要求原样传输，保证字节数与 Content-Length 一致
+            "Accept-Encoding": "identity",
             "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
             "Sec-Fetch-Dest": "document",
@@ -28,28 +45,30 @@ class BaseDownloader:
             "Sec-Fetch-User": "?1",
             "Cache-Control": "max-age=0",
         }
+        self.chunk_size = settings.DOWNLOAD_CHUNK_SIZE
+        self.segments = settings.DOWNLOAD_SEGMENTS
+        self.min_segment_size = settings.DOWNLOAD_MIN_SEGMENT_SIZE
+        self.governor: DownloadGovernor = get_download_governor()
+        self.leases: DownloadLeases = get_download_leases()
+        self.progress: ProgressBroker = get_progress_broker()
+        self.storage = StorageManager(self.download_dir)
+        self.tee_upload = settings.DOWNLOAD_TEE_UPLOAD
+        self.keep_local = settings.DOWNLOAD_KEEP_LOCAL
+        self._uploader: BaseUploader | None = None
 
-    async def _check_downloading(self, file_path: Path, check_interval: int = 15) -> bool:
-        """检查文件是否正在下载中"""
-        if not file_path.exists():
-            return False
-        
-        initial_size = os.path.getsize(file_path)
-        logger.info(f"检测到已存在文件: {file_path}，大小: {initial_size} 字节。")
-        if initial_size == 0:
-            logger.info("文件大小为0，不在下载")
-            return False
-
-        logger.info(f"监测文件大小 {check_interval} 秒...")
-        await asyncio.sleep(check_interval)
-        new_size = os.path.getsize(file_path)
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """当前事件循环共享的下载客户端，多个下载复用连接池"""
+        return get_http_client(
+            "downloader", timeout=httpx.Timeout(60.0, connect=10.0)
+        )
 
-        if new_size == initial_size:
-            logger.info("文件在监测期间未变化，不在下载")
-            return False
-
-        logger.info(f"文件大小: {initial_size} -> {new_size}，正在下载")
-        return True
+    @property
+    def uploader(self) -> BaseUploader:
+        """同时上传模式使用的上传器，首次使用时创建"""
+        if self._uploader is None:
+            self._uploader = create_uploader(settings.UPLOADER_TYPE)
+        return self._uploader
 
     async def download_book(self, book_dict: dict) -> dict:
         """下载文件并返回文件信息"""
@@ -64,39 +83,445 @@ class BaseDownloader:
         file_name = f"{book_dict.get('title', '')}.{file_format}"
         file_path = self.download_dir / file_name
         
-        if await self._check_downloading(file_path):
-            logger.info(f"文件正在下载，跳过下载: {file_path}")
-            return book_dict
+        async with self.leases.hold(download_link) as acquired:
+            if not acquired:
+                owner = self.leases.owner_of(download_link)
+                logger.info(f"文件正在由 {owner} 下载，跳过下载: {file_path}")
+                return book_dict
+
+            logger.info(f"开始下载: {file_name}")
+            await get_rate_limiter().acquire(download_link)
+
+            tracker = self.progress.tracker(download_link, file_name, book_dict.get("id"))
+            token = current_progress.set(tracker)
+            try:
+                async with self.governor.slot(file_name):
+                    if self.tee_upload:
+                        file_size, content_hash = await self._download_tee(
+                            download_link, file_path
+                        )
+                    else:
+                        file_size, content_hash = await self._download_file(
+                            download_link, file_path
+                        )
+                if not self.tee_upload or self.keep_local:
+                    self._store_blob(file_path, content_hash, file_format)
+                logger.info(f"下载完成: {file_path}, sha256={content_hash}")
+
+                book_dict["downloaded_at"] = datetime.now(UTC)
+                book_dict["file_path"] = str(file_path)
+                book_dict["file_size"] = file_size
+                book_dict["file_format"] = file_format
+                book_dict["content_hash"] = content_hash
+                tracker.finish()
+                return book_dict
+
+            except (Exception, asyncio.CancelledError) as e:
+                logger.error(f"下载失败: {str(e) or type(e).__name__}")
+                tracker.finish(e)
+                raise e
+            finally:
+                current_progress.reset(token)
+
+    async def _ensure_space(self, size: int):
+        """写入 size 字节前检查空间，不足时清理旧文件，仍不足时抛出 InsufficientStorageError"""
+        if not await asyncio.to_thread(self.storage.ensure_space, size):
+            raise InsufficientStorageError(
+                f"下载目录空间不足: 需要 {size / 1024 / 1024:.2f} MB"
+            )
+
+    def blob_path(self, content_hash: str, file_format: str) -> Path:
+        """按内容摘要存放文件的实际路径"""
+        return self.download_dir / "blobs" / content_hash[:2] / f"{content_hash}.{file_format}"
+
+    def _store_blob(self, file_path: Path, content_hash: str, file_format: str) -> Path:
+        """把下载的文件移入内容寻址存储，file_path 改为指向它的链接
 
-        logger.info(f"开始下载: {file_name}")
+        内容相同的文件只保存一份；file_path 作为逻辑路径保留，仍可直接读取。
+        """
+        blob_path = self.blob_path(content_hash, file_format)
+        blob_path.parent.mkdir(exist_ok=True, parents=True)
+        if blob_path.exists():
+            logger.info(f"内容已存在，复用: {blob_path}")
+            file_path.unlink()
+        else:
+            os.replace(file_path, blob_path)
 
+        link_path = file_path.with_name(f"{file_path.name}.link")
+        link_path.unlink(missing_ok=True)
         try:
-            response = requests.get(download_link, headers=self.headers, stream=True)
+            os.link(blob_path, link_path)
+        except OSError:
+            link_path.symlink_to(blob_path.resolve())
+        os.replace(link_path, file_path)
+        return blob_path
+
+    @staticmethod
+    def _hash_file(file_path: Path):
+        """计算文件的 SHA-256，返回 hashlib 对象以便继续更新"""
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while block := f.read(1024 * 1024):
+                hasher.update(block)
+        return hasher
+
+    @staticmethod
+    def _part_paths(file_path: Path) -> tuple[Path, Path]:
+        """下载中的临时文件和记录续传信息的 manifest 文件"""
+        return (
+            file_path.with_name(f"{file_path.name}.part"),
+            file_path.with_name(f"{file_path.name}.part.json"),
+        )
+
+    @staticmethod
+    def _load_manifest(url: str, part_path: Path, manifest_path: Path) -> dict | None:
+        """读取可用于续传的 manifest，链接不同或缺少校验信息时返回 None"""
+        if not (part_path.exists() and manifest_path.exists()):
+            return None
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except ValueError:
+            return None
+        if manifest.get("url") != url or not manifest.get("validator"):
+            return None
+        return manifest
+
+    @staticmethod
+    def _save_manifest(manifest_path: Path, manifest: dict):
+        manifest_path.write_text(json.dumps(manifest))
+
+    @staticmethod
+    def _get_validator(headers: httpx.Headers) -> str | None:
+        """If-Range 可用的校验值：强 ETag，其次 Last-Modified"""
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            return etag
+        return headers.get("last-modified")
+
+    @staticmethod
+    def _parse_content_range(content_range: str | None) -> tuple[int | None, int]:
+        """解析 Content-Range，返回 (起始字节, 总大小)，未知时为 None/0"""
+        if not content_range or " " not in content_range:
+            return None, 0
+        byte_range, _, total = content_range.split(" ", 1)[1].partition("/")
+        start = None if byte_range == "*" else int(byte_range.split("-")[0])
+        return start, int(total) if total.isdigit() else 0
+
+    async def _download_file(self, url: str, file_path: Path) -> tuple[int, str]:
+        """下载 url 到 file_path，返回文件字节数和 SHA-256
+
+        服务器支持范围请求且文件足够大时分段并发下载，否则单连接流式下载。
+        """
+        part_path, manifest_path = self._part_paths(file_path)
+        if manifest := self._load_manifest(url, part_path, manifest_path):
+            if manifest.get("segments"):
+                return await self._download_segmented(url, file_path, manifest)
+            return await self._download_stream(url, file_path)
+
+        if self.segments > 1 and (probe := await self._probe(url)):
+            total_size, validator = probe
+            if total_size >= self.min_segment_size * 2:
+                manifest = self._plan_segments(url, total_size, validator)
+                return await self._download_segmented(url, file_path, manifest)
+        return await self._download_stream(url, file_path)
+
+    async def _download_stream(self, url: str, file_path: Path) -> tuple[int, str]:
+        """单连接流式下载 url 到 file_path，返回文件字节数和边下载边计算的 SHA-256
+
+        下载写入 .part 文件并在 manifest 中记录链接和校验值。失败后保留它们，
+        下次用 Range + If-Range 从已写入的位置继续；服务器不支持范围请求或
+        文件已变化时重新完整下载。完成后原子地重命名为 file_path。
+        """
+        part_path, manifest_path = self._part_paths(file_path)
+        manifest = self._load_manifest(url, part_path, manifest_path)
+        offset = part_path.stat().st_size if manifest else 0
+        hasher = hashlib.sha256()
+
+        headers = dict(self.headers)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = manifest["validator"]
+            logger.info(f"断点续传: {file_path.name} 从 {offset} 字节继续")
+            # 续传时先计算已下载部分的摘要
+            hasher = await asyncio.to_thread(self._hash_file, part_path)
+
+        written = 0
+        restart = False
+        try:
+            async with self.client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 416 and offset:
+                    _, total_size = self._parse_content_range(
+                        response.headers.get("content-range")
+                    )
+                    restart = total_size != offset
+                else:
+                    response.raise_for_status()
+                    if response.status_code == 206 and offset:
+                        start, total_size = self._parse_content_range(
+                            response.headers.get("content-range")
+                        )
+                        if start != offset:
+                            raise IOError(f"续传起始位置不一致: {start}/{offset}")
+                        mode = "ab"
+                    else:
+                        if offset:
+                            logger.info(f"服务器未接受续传，重新下载: {file_path.name}")
+                        offset = 0
+                        hasher = hashlib.sha256()
+                        total_size = int(response.headers.get("content-length", 0))
+                        mode = "wb"
+
+                    manifest = {
+                        "url": url,
+                        "validator": self._get_validator(response.headers),
+                        "total_size": total_size,
+                        "bytes_written": offset,
+                    }
+                    self._save_manifest(manifest_path, manifest)
+                    await self._ensure_space(max(total_size - offset, 0))
+                    if tracker := current_progress.get():
+                        tracker.begin(total_size, offset)
+                    async with aiofiles.open(part_path, mode) as f:
+                        written = await self._write_stream(
+                            response, f, file_path.name, total_size, offset, hasher=hasher
+                        )
+
+            size = offset + written
+            if total_size and size != total_size:
+                raise IOError(f"文件大小不一致: {size}/{total_size} 字节")
+        except Exception:
+            if manifest and manifest.get("validator") and part_path.exists():
+                manifest["bytes_written"] = part_path.stat().st_size
+                self._save_manifest(manifest_path, manifest)
+                logger.info(f"保留未完成的下载: {part_path}，已写入 {manifest['bytes_written']} 字节")
+            else:
+                part_path.unlink(missing_ok=True)
+                manifest_path.unlink(missing_ok=True)
+            raise
+
+        if restart:
+            logger.info(f"续传范围无效，重新下载: {file_path.name}")
+            part_path.unlink(missing_ok=True)
+            manifest_path.unlink(missing_ok=True)
+            return await self._download_stream(url, file_path)
+
+        os.replace(part_path, file_path)
+        manifest_path.unlink(missing_ok=True)
+        return size, hasher.hexdigest()
+
+    async def _download_tee(self, url: str, file_path: Path) -> tuple[int, str]:
+        """边下载边分片上传到对象存储，返回文件字节数和 SHA-256
+
+        下载完成前内容摘要未知，先上传到临时键名，完成后移到内容键名并登记，分发时无需再次上传。
+        keep_local 为 False 时不写本地文件；上传不支持续传，失败时放弃已上传的分片。
+        """
+        part_path, manifest_path = self._part_paths(file_path)
+        temp_key = f"incoming/{uuid.uuid4().hex}{file_path.suffix}"
+        writer = self.uploader.open_stream(temp_key)
+        hasher = hashlib.sha256()
+        try:
+            async with self.client.stream("GET", url, headers=self.headers) as response:
+                response.raise_for_status()
+                total_size = int(response.headers.get("content-length", 0))
+                if tracker := current_progress.get():
+                    tracker.begin(total_size)
+                if self.keep_local:
+                    await self._ensure_space(total_size)
+                    async with aiofiles.open(part_path, "wb") as f:
+                        size = await self._write_stream(
+                            response, f, file_path.name, total_size,
+                            hasher=hasher, tee=writer.write,
+                        )
+                else:
+                    size = await self._write_stream(
+                        response, None, file_path.name, total_size,
+                        hasher=hasher, tee=writer.write,
+                    )
+            if total_size and size != total_size:
+                raise IOError(f"文件大小不一致: {size}/{total_size} 字节")
+            await writer.complete()
+        except BaseException:
+            await writer.abort()
+            part_path.unlink(missing_ok=True)
+            raise
+
+        content_hash = hasher.hexdigest()
+        key = await asyncio.to_thread(
+            UploadRegistry(self.uploader).adopt, temp_key, content_hash, file_path.suffix, size
+        )
+        if self.keep_local:
+            os.replace(part_path, file_path)
+        # 之前失败的普通下载留下的续传文件已无用
+        manifest_path.unlink(missing_ok=True)
+        logger.info(f"已同时上传到对象存储: {file_path.name} -> {key}")
+        return size, content_hash
+
+    async def _probe(self, url: str) -> tuple[int, str | None] | None:
+        """HEAD 探测文件大小和是否支持范围请求，不支持分段时返回 None"""
+        try:
+            response = await self.client.head(url, headers=self.headers)
+        except httpx.HTTPError as e:
+            logger.debug(f"探测文件信息失败: {e}")
+            return None
+        total_size = int(response.headers.get("content-length", 0))
+        if (
+            response.status_code != 200
+            or response.headers.get("accept-ranges", "").lower() != "bytes"
+            or not total_size
+        ):
+            return None
+        return total_size, self._get_validator(response.headers)
+
+    def _plan_segments(self, url: str, total_size: int, validator: str | None) -> dict:
+        """把文件按 DOWNLOAD_SEGMENTS 和 DOWNLOAD_MIN_SEGMENT_SIZE 切分为字节范围"""
+        count = max(1, min(self.segments, total_size // self.min_segment_size))
+        segment_size = -(-total_size // count)
+        return {
+            "url": url,
+            "validator": validator,
+            "total_size": total_size,
+            "segments": [
+                {
+                    "start": start,
+                    "end": min(start + segment_size, total_size) - 1,
+                    "written": 0,
+                }
+                for start in range(0, total_size, segment_size)
+            ],
+        }
+
+    async def _download_segmented(
+        self, url: str, file_path: Path, manifest: dict
+    ) -> tuple[int, str]:
+        """多连接分段下载，各段写入预分配文件的对应位置，完成后计算 SHA-256"""
+        part_path, manifest_path = self._part_paths(file_path)
+        total_size = manifest["total_size"]
+        if not part_path.exists() or part_path.stat().st_size != total_size:
+            await self._ensure_space(total_size)
+            with open(part_path, "wb") as f:
+                f.truncate(total_size)
+            for segment in manifest["segments"]:
+                segment["written"] = 0
+        self._save_manifest(manifest_path, manifest)
+
+        pending = [
+            segment
+            for segment in manifest["segments"]
+            if segment["start"] + segment["written"] <= segment["end"]
+        ]
+        if tracker := current_progress.get():
+            tracker.begin(total_size, sum(segment["written"] for segment in manifest["segments"]))
+        logger.info(
+            f"分段下载: {file_path.name}, {total_size / 1024 / 1024:.2f} MB, "
+            f"{len(manifest['segments'])} 段, 待下载 {len(pending)} 段"
+        )
+        tasks = [
+            asyncio.create_task(self._download_segment(url, part_path, manifest, segment))
+            for segment in pending
+        ]
+        try:
+            if tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if task.exception():
+                        raise task.exception()
+
+            size = sum(segment["written"] for segment in manifest["segments"])
+            if size != total_size:
+                raise IOError(f"文件大小不一致: {size}/{total_size} 字节")
+            # 分段乱序写入，只能在完成后计算摘要
+            content_hash = (await asyncio.to_thread(self._hash_file, part_path)).hexdigest()
+        except BaseException as e:
+            # 包括被取消（如租约丢失）的情况，确保各段不再继续写入
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if manifest.get("validator") and not isinstance(e, SegmentMismatchError):
+                self._save_manifest(manifest_path, manifest)
+                logger.info(f"保留未完成的分段下载: {part_path}")
+            else:
+                part_path.unlink(missing_ok=True)
+                manifest_path.unlink(missing_ok=True)
+            raise
+
+        os.replace(part_path, file_path)
+        manifest_path.unlink(missing_ok=True)
+        return total_size, content_hash
+
+    async def _download_segment(self, url: str, part_path: Path, manifest: dict, segment: dict):
+        """下载一个字节范围并写入文件对应位置，进度记录在 segment["written"]"""
+        start = segment["start"] + segment["written"]
+        headers = dict(self.headers)
+        headers["Range"] = f"bytes={start}-{segment['end']}"
+        if manifest.get("validator"):
+            headers["If-Range"] = manifest["validator"]
+
+        def on_chunk(size: int):
+            segment["written"] += size
+
+        async with self.client.stream("GET", url, headers=headers) as response:
             response.raise_for_status()
+            content_start, total_size = self._parse_content_range(
+                response.headers.get("content-range")
+            )
+            if (
+                response.status_code != 206
+                or content_start != start
+                or total_size != manifest["total_size"]
+            ):
+                raise SegmentMismatchError(f"服务器返回的分段与请求不一致: {headers['Range']}")
 
-            total_size = int(response.headers.get("content-length", 0))
-            with open(file_path, "wb") as f:
-                chunk_size = 128 * 1024
-                last_tm = datetime.now(UTC)
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if not chunk:
-                        continue
-
-                    f.write(chunk)
-                    now_tm = datetime.now(UTC)
-                    if (now_tm - last_tm).seconds >= 10:
-                        logger.debug(f"{file_name}进度: {f.tell()/total_size*100:.2f}%, {f.tell()/1024/1024:.2f}/{total_size/1024/1024:.2f} MB")
-                        last_tm = now_tm
-
-            logger.info(f"下载完成: {file_path}")
-
-            book_dict["downloaded_at"] = datetime.now(UTC)
-            book_dict["file_path"] = str(file_path)
-            book_dict["file_size"] = total_size
-            book_dict["file_format"] = file_format
-            return book_dict
+            async with aiofiles.open(part_path, "r+b") as f:
+                await f.seek(start)
+                await self._write_stream(
+                    response,
+                    f,
+                    f"{part_path.name}[{segment['start']}-{segment['end']}]",
+                    segment["end"] - segment["start"] + 1,
+                    segment["written"],
+                    on_chunk,
+                )
+
+    async def _write_stream(
+        self,
+        response: httpx.Response,
+        f,
+        file_name: str,
+        total_size: int,
+        offset: int = 0,
+        on_chunk: Callable[[int], None] | None = None,
+        hasher=None,
+        tee: Callable[[bytes], Awaitable[None]] | None = None,
+    ) -> int:
+        """把响应内容分块写入文件，定期输出进度，返回本次写入的字节数
+
+        ``on_chunk`` 在每块写入后以块大小调用，用于实时记录进度；
+        ``hasher`` 按顺序接收写入的内容以计算摘要；
+        ``tee`` 同时接收每块内容（如分片上传），此时 ``f`` 可以为 None。
+        """
+        written = 0
+        tracker = current_progress.get()
+        last_tm = datetime.now(UTC)
+        async for chunk in response.aiter_bytes(chunk_size=self.chunk_size):
+            if total_size and offset + written + len(chunk) > total_size:
+                raise IOError(f"{file_name}收到的数据超出预期大小: {total_size} 字节")
+            if f is not None:
+                await f.write(chunk)
+            if tee:
+                await tee(chunk)
+            written += len(chunk)
+            if hasher:
+                hasher.update(chunk)
+            if on_chunk:
+                on_chunk(len(chunk))
+            if tracker:
+                tracker.advance(len(chunk))
+            await self.governor.throttle(len(chunk))
 
-        except Exception as e:
-            logger.error(f"下载失败: {str(e)}")
-            file_path.unlink(missing_ok=True)
-            raise e
+            now_tm = datetime.now(UTC)
+            if (now_tm - last_tm).seconds >= 10:
+                done = offset + written
+                progress = f"{done/total_size*100:.2f}%, " if total_size else ""
+                logger.debug(f"{file_name}进度: {progress}{done/1024/1024:.2f}/{total_size/1024/1024:.2f} MB")
+                last_tm = now_tm
+        return written
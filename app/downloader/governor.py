@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+from uuid import uuid4
+
+import redis
+from loguru import logger
+
+from app.config import settings
+from app.utils.rate_limiter import RateLimiter
+from app.utils.redis_client import get_redis
+
+# 有序集合保存下载槽位，分数为槽位过期时间；持有者定期续期，崩溃的 worker 过期后自动释放
+ACQUIRE_SLOT_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local ttl = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], now + ttl, ARGV[1])
+    redis.call('EXPIRE', KEYS[1], math.ceil(ttl) + 60)
+    return 1
+end
+return 0
+"""
+
+THROUGHPUT_WINDOW = 5  # 统计下载速度的时间窗口（秒）
+
+
+class DownloadGovernor:
+    """集群范围的下载调度器
+
+    用 Redis 信号量限制所有 worker 同时进行的下载数（MAX_DOWNLOAD_CONCURRENT），
+    用共享的令牌桶限制总下载速度（DOWNLOAD_SPEED_LIMIT，字节/秒），
+    Redis 出错时退回进程内实现。
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = settings.MAX_DOWNLOAD_CONCURRENT,
+        speed_limit: int = settings.DOWNLOAD_SPEED_LIMIT,
+        slot_ttl: int = settings.DOWNLOAD_SLOT_TTL,
+        slot_timeout: int = settings.DOWNLOAD_SLOT_TIMEOUT,
+        backend: str = settings.RATE_LIMIT_BACKEND,
+        prefix: str = "book_sender:download",
+    ):
+        self.max_concurrent = max_concurrent
+        self.speed_limit = speed_limit
+        self.slot_ttl = slot_ttl
+        self.slot_timeout = slot_timeout
+        self.backend = backend
+        self.prefix = prefix
+        self.bandwidth = (
+            RateLimiter(
+                rate=speed_limit,
+                burst=speed_limit,
+                backend=backend,
+                prefix=f"{prefix}:bandwidth",
+            )
+            if speed_limit > 0
+            else None
+        )
+        self._script = None
+        self._lock = threading.Lock()
+        self._local_slots: dict[str, float] = {}
+        self._local_bytes: dict[int, int] = {}
+
+    @property
+    def _slots_key(self) -> str:
+        return f"{self.prefix}:slots"
+
+    def _bytes_key(self, second: int) -> str:
+        return f"{self.prefix}:bytes:{second}"
+
+    def _try_acquire_local(self, token: str) -> bool:
+        with self._lock:
+            now = time.time()
+            self._local_slots = {t: exp for t, exp in self._local_slots.items() if exp > now}
+            if token in self._local_slots or len(self._local_slots) < self.max_concurrent:
+                self._local_slots[token] = now + self.slot_ttl
+                return True
+            return False
+
+    def _try_acquire(self, token: str) -> bool:
+        """尝试占用（或续期）一个下载槽位"""
+        if self.backend == "redis":
+            try:
+                if self._script is None:
+                    self._script = get_redis().register_script(ACQUIRE_SLOT_SCRIPT)
+                return bool(
+                    self._script(
+                        keys=[self._slots_key],
+                        args=[token, self.max_concurrent, self.slot_ttl],
+                    )
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Redis 下载槽位不可用，使用进程内槽位: {e}")
+        return self._try_acquire_local(token)
+
+    def _release(self, token: str):
+        with self._lock:
+            self._local_slots.pop(token, None)
+        if self.backend == "redis":
+            try:
+                get_redis().zrem(self._slots_key, token)
+            except redis.RedisError as e:
+                logger.warning(f"释放下载槽位失败: {e}")
+
+    async def _heartbeat(self, token: str):
+        while True:
+            await asyncio.sleep(self.slot_ttl / 3)
+            if not self._try_acquire(token):
+                logger.warning("下载槽位已过期且被占满，继续当前下载")
+
+    @asynccontextmanager
+    async def slot(self, name: str = "") -> AsyncIterator[None]:
+        """占用一个下载槽位，槽位已满时等待，超过 slot_timeout 抛出 TimeoutError"""
+        token = uuid4().hex
+        deadline = time.monotonic() + self.slot_timeout
+        interval = 0.5
+        while not self._try_acquire(token):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"等待下载槽位超时: {name}")
+            logger.debug(f"下载槽位已满，等待: {name}")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 5)
+
+        heartbeat = asyncio.create_task(self._heartbeat(token))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            with suppress(asyncio.CancelledError):
+                await heartbeat
+            self._release(token)
+
+    def _record_bytes(self, size: int):
+        second = int(time.time())
+        with self._lock:
+            self._local_bytes[second] = self._local_bytes.get(second, 0) + size
+            for key in [k for k in self._local_bytes if k <= second - THROUGHPUT_WINDOW]:
+                del self._local_bytes[key]
+        if self.backend == "redis":
+            try:
+                pipeline = get_redis().pipeline(transaction=False)
+                pipeline.incrby(self._bytes_key(second), size)
+                pipeline.expire(self._bytes_key(second), THROUGHPUT_WINDOW * 2)
+                pipeline.execute()
+            except redis.RedisError:
+                pass
+
+    async def throttle(self, size: int) -> float:
+        """记录下载的字节数并按总速度限制等待，返回等待的秒数"""
+        self._record_bytes(size)
+        if not self.bandwidth:
+            return 0.0
+        return await self.bandwidth.wait("all", size)
+
+    def utilisation(self) -> dict:
+        """当前下载槽位和带宽的使用情况"""
+        now = time.time()
+        seconds = range(int(now) - THROUGHPUT_WINDOW, int(now))
+        with self._lock:
+            active = sum(1 for exp in self._local_slots.values() if exp > now)
+            window_bytes = sum(self._local_bytes.get(second, 0) for second in seconds)
+
+        if self.backend == "redis":
+            try:
+                client = get_redis()
+                active = client.zcount(self._slots_key, now, "+inf")
+                window_bytes = sum(
+                    int(value or 0)
+                    for value in client.mget([self._bytes_key(second) for second in seconds])
+                )
+            except redis.RedisError as e:
+                logger.warning(f"读取下载使用情况失败: {e}")
+
+        throughput = window_bytes / THROUGHPUT_WINDOW
+        return {
+            "active_downloads": active,
+            "max_concurrent": self.max_concurrent,
+            "slot_utilisation": active / self.max_concurrent if self.max_concurrent else None,
+            "throughput": throughput,
+            "speed_limit": self.speed_limit,
+            "bandwidth_utilisation": throughput / self.speed_limit if self.speed_limit > 0 else None,
+        }
+
+
+_download_governor: DownloadGovernor | None = None
+
+
+def get_download_governor() -> DownloadGovernor:
+    """获取进程共享的下载调度器"""
+    global _download_governor
+    if _download_governor is None:
+        _download_governor = DownloadGovernor()
+    return _download_governor
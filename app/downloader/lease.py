@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import os
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+from uuid import uuid4
+
+import redis
+from loguru import logger
+
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+# 只有持有者才能续期和释放租约
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLostError(RuntimeError):
+    """持有期间租约被其他 worker 接管或已过期"""
+
+
+class DownloadLeases:
+    """按下载链接分配的下载租约
+
+    下载前以 SET NX 占用租约，下载期间定期续期。其他 worker 发现租约被占用时
+    立即跳过；持有者崩溃后租约在 ttl 秒内过期，可被其他 worker 接管。
+    续期时发现租约已丢失，取消持有租约的任务并抛出 LeaseLostError。
+    Redis 出错时退回进程内租约。
+    """
+
+    def __init__(
+        self,
+        ttl: int = settings.DOWNLOAD_LEASE_TTL,
+        backend: str = settings.RATE_LIMIT_BACKEND,
+        prefix: str = "book_sender:download:lease",
+    ):
+        self.ttl = ttl
+        self.backend = backend
+        self.prefix = prefix
+        self._renew_script = None
+        self._release_script = None
+        self._lock = threading.Lock()
+        self._local: dict[str, tuple[str, float]] = {}
+
+    def _key(self, download_link: str) -> str:
+        return f"{self.prefix}:{hashlib.sha1(download_link.encode()).hexdigest()}"
+
+    @staticmethod
+    def new_owner() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    def _local_owner(self, key: str) -> str | None:
+        owner, expires_at = self._local.get(key, (None, 0))
+        return owner if expires_at > time.time() else None
+
+    def try_acquire(self, download_link: str, owner: str) -> bool:
+        """占用租约，已被其他持有者占用时返回 False"""
+        key = self._key(download_link)
+        if self.backend == "redis":
+            try:
+                return bool(get_redis().set(key, owner, nx=True, ex=self.ttl))
+            except redis.RedisError as e:
+                logger.warning(f"Redis 下载租约不可用，使用进程内租约: {e}")
+        with self._lock:
+            if self._local_owner(key) not in (None, owner):
+                return False
+            self._local[key] = (owner, time.time() + self.ttl)
+            return True
+
+    def renew(self, download_link: str, owner: str) -> bool:
+        """续期租约，租约已不属于 owner 时返回 False
+
+        Redis 暂时不可用时无法确认租约状态，视为仍然持有，下次续期时再检查。
+        """
+        key = self._key(download_link)
+        if self.backend == "redis":
+            try:
+                if self._renew_script is None:
+                    self._renew_script = get_redis().register_script(RENEW_LEASE_SCRIPT)
+                if self._renew_script(keys=[key], args=[owner, self.ttl]):
+                    return True
+            except redis.RedisError as e:
+                logger.warning(f"续期下载租约失败: {e}")
+                with self._lock:
+                    return self._local_owner(key) in (None, owner)
+        # 未找到 Redis 租约时检查占用时退回的进程内租约
+        with self._lock:
+            if self._local_owner(key) != owner:
+                return False
+            self._local[key] = (owner, time.time() + self.ttl)
+            return True
+
+    def release(self, download_link: str, owner: str):
+        """释放 owner 持有的租约"""
+        key = self._key(download_link)
+        with self._lock:
+            if self._local_owner(key) == owner:
+                del self._local[key]
+        if self.backend == "redis":
+            try:
+                if self._release_script is None:
+                    self._release_script = get_redis().register_script(RELEASE_LEASE_SCRIPT)
+                self._release_script(keys=[key], args=[owner])
+            except redis.RedisError as e:
+                logger.warning(f"释放下载租约失败: {e}")
+
+    def owner_of(self, download_link: str) -> str | None:
+        """当前持有租约的 worker"""
+        key = self._key(download_link)
+        if self.backend == "redis":
+            try:
+                owner = get_redis().get(key)
+                return owner.decode() if owner else None
+            except redis.RedisError:
+                pass
+        with self._lock:
+            return self._local_owner(key)
+
+    async def _heartbeat(self, download_link: str, owner: str, holder: asyncio.Task, lost: list):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            if not self.renew(download_link, owner):
+                logger.error(f"下载租约已丢失，停止下载: {download_link}")
+                lost.append(True)
+                holder.cancel()
+                return
+
+    @asynccontextmanager
+    async def hold(self, download_link: str) -> AsyncIterator[bool]:
+        """尝试持有租约，返回是否成功；成功时在退出前持续续期并最终释放
+
+        租约丢失时取消当前任务，退出时抛出 LeaseLostError，避免与接管的 worker 重复下载。
+        """
+        owner = self.new_owner()
+        if not self.try_acquire(download_link, owner):
+            yield False
+            return
+
+        holder = asyncio.current_task()
+        lost = []
+        heartbeat = asyncio.create_task(self._heartbeat(download_link, owner, holder, lost))
+        try:
+            yield True
+        except asyncio.CancelledError:
+            if not lost:
+                raise
+            holder.uncancel()
+            raise LeaseLostError(f"下载租约已丢失: {download_link}") from None
+        finally:
+            heartbeat.cancel()
+            with suppress(asyncio.CancelledError):
+                await heartbeat
+            self.release(download_link, owner)
+
+
+_download_leases: DownloadLeases | None = None
+
+
+def get_download_leases() -> DownloadLeases:
+    """获取进程共享的下载租约管理器"""
+    global _download_leases
+    if _download_leases is None:
+        _download_leases = DownloadLeases()
+    return _download_leases
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import suppress
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+import redis
+from loguru import logger
+
+from app.config import settings
+from app.utils.redis_client import create_async_redis, get_redis
+
+
+class ProgressTracker:
+    """单个下载的进度，按 interval 秒的间隔广播进度事件"""
+
+    def __init__(
+        self,
+        broker: "ProgressBroker",
+        download_link: str,
+        file_name: str,
+        book_id: int | None = None,
+        interval: float = settings.DOWNLOAD_PROGRESS_INTERVAL,
+    ):
+        self.broker = broker
+        self.download_link = download_link
+        self.file_name = file_name
+        self.book_id = book_id
+        self.interval = interval
+        self.total = 0
+        self.done = 0
+        self._resumed = 0
+        self._started_at = time.monotonic()
+        self._published_at = 0.0
+
+    def begin(self, total: int, done: int = 0):
+        """开始传输，done 为续传时已有的字节数"""
+        self.total = total
+        self.done = self._resumed = done
+        self._started_at = time.monotonic()
+        self.publish("started")
+
+    def advance(self, size: int):
+        self.done += size
+        if time.monotonic() - self._published_at >= self.interval:
+            self.publish("progress")
+
+    def finish(self, error: Exception | None = None):
+        self.publish("failed" if error else "completed", error=str(error) if error else None)
+
+    def snapshot(self, status: str) -> dict:
+        elapsed = time.monotonic() - self._started_at
+        rate = (self.done - self._resumed) / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done if self.total else None
+        return {
+            "status": status,
+            "book_id": self.book_id,
+            "file_name": self.file_name,
+            "download_link": self.download_link,
+            "bytes_done": self.done,
+            "total": self.total,
+            "rate": rate,
+            "eta": remaining / rate if remaining is not None and rate > 0 else None,
+            "timestamp": time.time(),
+        }
+
+    def publish(self, status: str, **extra):
+        self._published_at = time.monotonic()
+        event = self.snapshot(status)
+        event.update({k: v for k, v in extra.items() if v is not None})
+        self.broker.publish(event)
+
+
+# 当前任务正在进行的下载，分段下载创建的子任务会继承它
+current_progress: ContextVar[ProgressTracker | None] = ContextVar(
+    "current_progress", default=None
+)
+
+
+class ProgressBroker:
+    """下载进度事件广播
+
+    默认通过 Redis pub/sub 发布，API 进程可以收到所有 worker 的下载进度；
+    Redis 出错时退回进程内广播。
+    """
+
+    def __init__(
+        self,
+        backend: str = settings.DOWNLOAD_PROGRESS_BACKEND,
+        channel: str = "book_sender:download:progress",
+    ):
+        self.backend = backend
+        self.channel = channel
+        self._lock = threading.Lock()
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+
+    def tracker(
+        self, download_link: str, file_name: str, book_id: int | None = None
+    ) -> ProgressTracker:
+        return ProgressTracker(self, download_link, file_name, book_id)
+
+    def publish(self, event: dict):
+        """发布进度事件"""
+        if self.backend == "redis":
+            try:
+                get_redis().publish(self.channel, json.dumps(event))
+                return
+            except redis.RedisError as e:
+                logger.debug(f"发布下载进度失败，使用进程内广播: {e}")
+        self._publish_local(event)
+
+    def _publish_local(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        # 订阅者处理不过来时丢弃事件，进度事件只需要最新的
+        if not queue.full():
+            queue.put_nowait(event)
+
+    async def subscribe(self, heartbeat: float = 15) -> AsyncIterator[dict | None]:
+        """订阅进度事件，超过 heartbeat 秒没有事件时产出 None 以便保持连接"""
+        if self.backend == "redis":
+            client = create_async_redis()
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+            except redis.RedisError as e:
+                logger.warning(f"订阅下载进度失败，使用进程内广播: {e}")
+                await client.aclose()
+            else:
+                try:
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=heartbeat
+                        )
+                        yield json.loads(message["data"]) if message else None
+                finally:
+                    with suppress(redis.RedisError):
+                        await pubsub.aclose()
+                        await client.aclose()
+                return
+
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=1000))
+        with self._lock:
+            self._subscribers.add(entry)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(entry[1].get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers.discard(entry)
+
+
+_progress_broker: ProgressBroker | None = None
+
+
+def get_progress_broker() -> ProgressBroker:
+    """获取进程共享的下载进度广播"""
+    global _progress_broker
+    if _progress_broker is None:
+        _progress_broker = ProgressBroker()
+    return _progress_broker
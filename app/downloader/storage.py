@@ -0,0 +1,173 @@
+import os
+import shutil
+import time
+from collections import defaultdict
+from datetime import UTC, datetime
+from pathlib import Path
+
+from loguru import logger
+
+from app.config import settings
+from app.database import Book, Upload, get_denpend_db
+from app.uploader import BaseUploader, create_uploader
+
+
+class InsufficientStorageError(OSError):
+    """下载目录空间不足且无法通过清理腾出空间"""
+
+
+class StorageManager:
+    """下载目录的空间管理
+
+    下载目录占用超过 budget 字节、或磁盘剩余空间低于 min_free 字节时，按最近
+    使用时间从旧到新删除本地文件。只删除已存在于云存储中的文件，并在对应书籍上
+    记录 evicted_at，之后分发时直接使用云存储中的文件。
+
+    内容相同的书籍共用 blobs 下的同一个文件，只有该内容的所有本地路径都被删除后
+    才释放空间，因此以内容为单位清理。书籍重新下载后内容变化时，旧的 blob 不再有
+    任何本地路径，这类孤立的 blob 无需检查是否已上传，最先清理。
+    """
+
+    ORPHAN_GRACE = 60  # 孤立 blob 的最短存在秒数，避免删除正在建立链接的 blob
+
+    def __init__(
+        self,
+        download_dir: Path | None = None,
+        budget: int = settings.DOWNLOAD_DIR_BUDGET,
+        min_free: int = settings.DOWNLOAD_MIN_FREE_SPACE,
+    ):
+        self.download_dir = download_dir or settings.DOWNLOAD_DIR
+        self.budget = budget
+        self.min_free = min_free
+        self._uploader: BaseUploader | None = None
+
+    @property
+    def uploader(self) -> BaseUploader:
+        if self._uploader is None:
+            self._uploader = create_uploader(settings.UPLOADER_TYPE)
+        return self._uploader
+
+    @property
+    def blobs_dir(self) -> Path:
+        return self.download_dir / "blobs"
+
+    def _scan(self) -> tuple[int, list[dict]]:
+        """统计下载目录占用的字节数，并按内容汇总可清理的文件
+
+        Returns:
+            (占用字节数, 孤立 blob 在前、其余按最近使用时间从旧到新排列的内容列表)；
+            每项包含 size、last_used、changed、paths（书籍文件路径）和 blob（blobs 下的文件，可能为 None）
+        """
+        sizes: dict[tuple[int, int], int] = {}
+        contents: dict[tuple[int, int], dict] = defaultdict(
+            lambda: {"paths": [], "blob": None, "last_used": 0.0, "changed": 0.0}
+        )
+        for root, _, names in os.walk(self.download_dir):
+            for name in names:
+                path = Path(root) / name
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    # 指向的文件已不存在的链接
+                    continue
+                inode = (st.st_dev, st.st_ino)
+                sizes[inode] = st.st_size
+                if path.name.endswith((".part", ".part.json", ".link")):
+                    continue
+
+                content = contents[inode]
+                content["size"] = st.st_size
+                content["last_used"] = max(content["last_used"], st.st_atime, st.st_mtime)
+                content["changed"] = st.st_ctime
+                if path.is_relative_to(self.blobs_dir) and not path.is_symlink():
+                    content["blob"] = path
+                else:
+                    content["paths"].append(path)
+
+        usage = sum(sizes.values())
+        candidates = sorted(
+            (content for content in contents.values() if content["paths"] or content["blob"]),
+            key=lambda content: (bool(content["paths"]), content["last_used"]),
+        )
+        return usage, candidates
+
+    def _required(self, usage: int, size: int) -> int:
+        """还需要腾出的字节数"""
+        need = 0
+        if self.budget > 0:
+            need = usage + size - self.budget
+        if self.min_free > 0:
+            free = shutil.disk_usage(self.download_dir).free
+            need = max(need, self.min_free + size - free)
+        return max(need, 0)
+
+    def ensure_space(self, size: int = 0) -> bool:
+        """为即将写入的 size 字节腾出空间，无法腾出足够空间时返回 False"""
+        usage, candidates = self._scan()
+        if not (need := self._required(usage, size)):
+            return True
+
+        logger.info(f"下载目录需要腾出 {need / 1024 / 1024:.2f} MB")
+        freed = self.evict(need, candidates)
+        if freed < need:
+            logger.warning(
+                f"下载目录空间不足: 需要 {need / 1024 / 1024:.2f} MB，"
+                f"只腾出 {freed / 1024 / 1024:.2f} MB"
+            )
+            return False
+        return True
+
+    def _is_uploaded(self, db, content: dict, content_hashes: set[str]) -> bool:
+        """内容是否已上传：优先按内容摘要查上传登记，查不到时按文件名检查云存储（旧文件）"""
+        if blob := content["blob"]:
+            content_hashes = content_hashes | {blob.name.split(".")[0]}
+        if any(Upload.lookup(db, self.uploader.bucket_name, h) for h in content_hashes):
+            return True
+        return all(self.uploader.file_exists(path.name) for path in content["paths"])
+
+    def evict(self, need: int, candidates: list[dict] | None = None) -> int:
+        """先删除孤立的 blob，再按最近使用时间从旧到新删除已上传的文件，直到腾出 need 字节，返回腾出的字节数"""
+        if candidates is None:
+            _, candidates = self._scan()
+
+        freed = 0
+        with get_denpend_db() as db:
+            for content in candidates:
+                if freed >= need:
+                    break
+                if not content["paths"]:
+                    # 移入 blobs 与建立链接之间 ctime 会更新，最近变化的可能正在使用
+                    if time.time() - content["changed"] < self.ORPHAN_GRACE:
+                        continue
+                    content["blob"].unlink(missing_ok=True)
+                    freed += content["size"]
+                    logger.info(
+                        f"已清理孤立的文件: {content['blob'].name}, "
+                        f"{content['size'] / 1024 / 1024:.2f} MB"
+                    )
+                    continue
+
+                paths = {"operator": "in", "value": [str(p) for p in content["paths"]]}
+                books = Book.query(db, file_path=paths)
+                # 优化后的 PDF 没有 blob，按书籍记录的摘要判断是否已上传
+                optimized_books = Book.query(db, optimized_path=paths)
+                content_hashes = {book.content_hash for book in books if book.content_hash}
+                content_hashes |= {book.optimized_hash for book in optimized_books if book.optimized_hash}
+                if not self._is_uploaded(db, content, content_hashes):
+                    logger.debug(f"文件未上传，跳过清理: {content['paths'][0]}")
+                    continue
+
+                for path in content["paths"] + [content["blob"]]:
+                    if path is not None:
+                        path.unlink(missing_ok=True)
+                now = datetime.now(UTC)
+                for book in books:
+                    book.evicted(now)
+                for book in optimized_books:
+                    book.optimized_evicted()
+                freed += content["size"]
+                logger.info(
+                    f"已清理本地文件: {', '.join(p.name for p in content['paths'])}, "
+                    f"{content['size'] / 1024 / 1024:.2f} MB"
+                )
+        return freed
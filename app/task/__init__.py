@@ -2,10 +2,10 @@ from app.task.schedulers import (distribute_books_scheduler,
                                  download_books_scheduler,
                                  crawl_books_scheduler)
 from app.task.tasks import (crawl_book_task, crawl_books_task,
-                            distribute_book_task, distribute_books_task,
-                            download_book_task)
+                            crawl_series_books_task, distribute_book_task,
+                            distribute_books_task, download_book_task)
 
-__all__ = ["crawl_books_task", "crawl_book_task", 
+__all__ = ["crawl_books_task", "crawl_book_task", "crawl_series_books_task",
            "download_book_task", "download_books_scheduler",
            "distribute_book_task", "distribute_books_task", 
            "distribute_books_scheduler",
@@ -3,10 +3,54 @@ from functools import wraps
 from typing import Any, Dict
 
 from celery import Task as CeleryTask
+from celery.signals import worker_process_shutdown, worker_shutdown
 from loguru import logger
 
 from app.config import settings
+from app.crawler.browser_pool import close_browser_pool
 from app.database import Task, get_denpend_db
+from app.utils.http_client import close_http_clients
+from app.utils.compressor import shutdown_compression_service
+from app.utils.pdf_optimizer import shutdown_pdf_executor
+
+_event_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """获取 worker 进程常驻的事件循环
+
+    与 asyncio.run 每次新建事件循环不同，常驻事件循环让浏览器池等
+    绑定在事件循环上的资源可以在多次任务调用之间复用。
+    """
+    global _event_loop
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_event_loop)
+    return _event_loop
+
+
+def run_async(coro):
+    """在常驻事件循环中运行协程"""
+    return get_event_loop().run_until_complete(coro)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_resources(**kwargs):
+    """worker 退出时释放浏览器池、HTTP 连接池、PDF 优化进程池等常驻资源"""
+    global _event_loop
+    shutdown_pdf_executor()
+    shutdown_compression_service()
+    if _event_loop is None or _event_loop.is_closed():
+        return
+    try:
+        _event_loop.run_until_complete(close_browser_pool())
+        _event_loop.run_until_complete(close_http_clients())
+    except Exception as e:
+        logger.error(f"释放 worker 资源失败: {e}")
+    finally:
+        _event_loop.close()
+        _event_loop = None
 
 
 class BaseTask(CeleryTask):
@@ -74,7 +118,7 @@ class BaseTask(CeleryTask):
             @wraps(func)
             def wrapper(self, *args, **kwargs):
                 if is_async:
-                    return self.run_with_retry(lambda: asyncio.run(func(*args, **kwargs)))
+                    return self.run_with_retry(lambda: run_async(func(*args, **kwargs)))
                 return self.run_with_retry(func, *args, **kwargs)
 
             return wrapper
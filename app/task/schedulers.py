@@ -3,12 +3,15 @@ from loguru import logger
 from app.celery_app import celery_app
 from app.config import settings
 from app.database import Book, BookSeries, User, UserBookStatus, get_denpend_db
+from app.downloader.storage import StorageManager
 from app.task.base import BaseTask
 from app.task.tasks import (
     crawl_book_task,
     crawl_books_task,
+    crawl_series_books_task,
     distribute_books_task,
     download_book_task,
+    download_books_batch_task,
 )
 
 max_retries = settings.CELERY_TASK_MAX_RETRIES
@@ -17,7 +20,7 @@ SERIES_LIST = BookSeries.get_series_list()
 
 @celery_app.task(bind=True, base=BaseTask)
 @BaseTask.retry_decorator()
-def crawl_books_scheduler(page=1):
+def crawl_books_scheduler(page=1, incremental=True):
     # 查询新书籍逻辑
     filtered_series_list = list(
         set(series for series in SERIES_LIST if series != BookSeries.OTHER)
@@ -26,7 +29,7 @@ def crawl_books_scheduler(page=1):
     logger.info(f"开始爬取书籍列表: {len(filtered_series_list)}个系列")
     for series in filtered_series_list:
         logger.info(f"开始爬取{series}新书籍列表")
-        crawl_books_task.delay(series, page=page)
+        crawl_books_task.delay(series, page=page, incremental=incremental)
 
 
 @celery_app.task(bind=True, base=BaseTask)
@@ -41,18 +44,35 @@ def crawl_book_scheduler():
             book_dicts = [book.to_dict() for book in books]
 
     logger.info(f"开始爬取书籍详情: {len(book_dicts)}本")
+    series_set = set()
     for book_dict in book_dicts:
+        if book_dict["series"] != BookSeries.OTHER:
+            series_set.add(book_dict["series"])
+            continue
         logger.info(f"开始爬取{book_dict['title']}详情")
         crawl_book_task.delay(
             BookSeries.simplify_series(book_dict["series"]), book_dict
         )
 
+    for series in series_set:
+        logger.info(f"开始批量爬取{series}书籍详情")
+        crawl_series_books_task.delay(series)
+
 
 @celery_app.task(bind=True, base=BaseTask)
 @BaseTask.retry_decorator()
 def download_books_scheduler():
     # 查询未下载书籍逻辑
     logger.info("开始查询未下载书籍")
+    if (batch_size := settings.DOWNLOAD_BATCH_SIZE) > 0:
+        # 每个批量任务自行领取书籍，这里只按可领取的书籍数决定任务数
+        with get_denpend_db() as db:
+            pending = Book.count_pending(db)
+        logger.info(f"开始批量下载书籍: {pending}本")
+        for _ in range(-(-pending // batch_size)):
+            download_books_batch_task.delay(batch_size)
+        return
+
     with get_denpend_db() as db:
         book_dicts = []
         if books := (
@@ -66,6 +86,14 @@ def download_books_scheduler():
         download_book_task.delay(book_dict)
 
 
+@celery_app.task(bind=True, base=BaseTask)
+@BaseTask.retry_decorator()
+def evict_downloads_scheduler():
+    # 下载目录超出空间预算时清理已上传的旧文件
+    if not StorageManager().ensure_space():
+        logger.warning("下载目录仍超出空间预算，没有更多已上传的文件可以清理")
+
+
 @celery_app.task(bind=True, base=BaseTask)
 @BaseTask.retry_decorator()
 def distribute_books_scheduler():
@@ -1,40 +1,83 @@
+import asyncio
+from pathlib import Path
+
 from loguru import logger
 
 from app.celery_app import celery_app
 from app.config import settings
 from app.crawler import create_crawler
-from app.database import Book, BookSeries, get_denpend_db
+from app.database import Book, BookFormat, BookSeries, get_denpend_db
 from app.distributor import create_distributor
 from app.downloader import create_downloader
 from app.task.base import BaseTask
+from app.utils.pdf_optimizer import optimize_pdf_in_pool
 
 
 @celery_app.task(bind=True, base=BaseTask)
 @BaseTask.retry_decorator(is_async=True)
-async def crawl_books_task(series: str, page: int = 1):
-    """爬取书籍列表任务"""
-    async with create_crawler(BookSeries.simplify_series(series)) as crawler:
-        book_dicts = await crawler.get_books(page)
-
-    if not book_dicts:
-        logger.warning("No books found.")
-        return
-
-    logger.info(f"Book list is crawled, got {len(book_dicts)} books.")
-
-    for book_dict in book_dicts:
-        detail_link = book_dict.get("detail_link", "")
-        if not detail_link:
-            continue
-
-        with get_denpend_db() as db:
-            if not (book := Book.query_first(db, detail_link=detail_link)):
-                book = Book.create(db, **book_dict)
-                logger.info(f"Book {book.title} added to the database.")
+async def crawl_books_task(
+    series: str,
+    page: int = 1,
+    incremental: bool = False,
+    max_pages: int = settings.CRAWLER_INCREMENTAL_MAX_PAGES,
+):
+    """爬取书籍列表任务
+
+    incremental 为 True 时从 page 开始逐页爬取，直到某一页的书籍全部已入库
+    或达到 max_pages 页；否则只爬取 page 这一页。
+    只为新书或仍缺少下载链接的书籍创建详情爬取任务。
+    """
+    last_page = page + max_pages - 1 if incremental else page
+    pending_series = set()
+    pending_book_dicts = []
 
+    async with create_crawler(BookSeries.simplify_series(series)) as crawler:
+        for current_page in range(page, last_page + 1):
+            book_dicts = [
+                book_dict
+                for book_dict in await crawler.get_books(current_page)
+                if book_dict.get("detail_link")
+            ]
+            if not book_dicts:
+                logger.warning(f"No books found on page {current_page}.")
+                break
+
+            logger.info(f"Book list page {current_page} is crawled, got {len(book_dicts)} books.")
+            detail_links = {book_dict["detail_link"] for book_dict in book_dicts}
+            with get_denpend_db() as db:
+                known_books = {
+                    book.detail_link: book
+                    for book in Book.query(
+                        db, detail_link={"operator": "in", "value": list(detail_links)}
+                    )
+                }
+                existing_links = set(known_books)
+                for book_dict in book_dicts:
+                    if not (book := known_books.get(book_dict["detail_link"])):
+                        book = Book.create(db, **book_dict)
+                        known_books[book.detail_link] = book
+                        logger.info(f"Book {book.title} added to the database.")
+                    elif book.download_link:
+                        continue
+
+                    if book.series == BookSeries.OTHER:
+                        pending_book_dicts.append(book_dict)
+                    else:
+                        pending_series.add(book.series)
+
+            if incremental and not (detail_links - existing_links):
+                logger.info(f"All books on page {current_page} are known, stop crawling.")
+                break
+
+    for book_dict in pending_book_dicts:
         crawl_book_task.delay(series, book_dict)
+    for book_series in pending_series:
+        crawl_series_books_task.delay(book_series)
 
-    logger.info(f"Book list page {page} is crawled.")
+    logger.info(
+        f"Book list of {series} is crawled, {len(pending_series)} series and "
+        f"{len(pending_book_dicts)} other books to crawl details."
+    )
 
 
 @celery_app.task(bind=True, base=BaseTask)
@@ -66,6 +109,35 @@ async def crawl_book_task(series: str, book_dict: dict):
 
 
 
+@celery_app.task(bind=True, base=BaseTask)
+@BaseTask.retry_decorator(is_async=True)
+async def crawl_series_books_task(series: str, concurrency: int = settings.CRAWLER_DETAIL_CONCURRENCY):
+    """在一个爬虫会话中批量爬取某系列所有待爬取的书籍详情"""
+    with get_denpend_db() as db:
+        books = Book.query(
+            db, series=series, download_link={"operator": "is empty"}, file_size=0
+        )
+        book_dicts = [book.to_dict() for book in books]
+
+    if not book_dicts:
+        logger.info(f"No pending book details for series {series}.")
+        return
+
+    async with create_crawler(BookSeries.simplify_series(series)) as crawler:
+        book_dicts = await crawler.get_books_details(book_dicts, concurrency=concurrency)
+
+    crawled_count = 0
+    with get_denpend_db() as db:
+        for book_dict in book_dicts:
+            if not book_dict.get("download_link"):
+                continue
+            if book := Book.query_first(db, detail_link=book_dict["detail_link"]):
+                book.update(**book_dict)
+                crawled_count += 1
+
+    logger.info(f"Series {series} details are crawled: {crawled_count}/{len(book_dicts)}.")
+
+
 @celery_app.task(bind=True, base=BaseTask)
 @BaseTask.retry_decorator(is_async=True)
 async def download_book_task(book_dict: dict):
@@ -89,15 +161,107 @@ async def download_book_task(book_dict: dict):
     file_size = book_dict.get("file_size", 0)
     file_path = book_dict.get("file_path", "")
     file_format = book_dict.get("file_format", "")
+    content_hash = book_dict.get("content_hash")
 
     if file_size == 0 or file_path == "" or file_format == "":
         raise Exception("下载失败")
 
     with get_denpend_db() as db:
+        if content_hash and (
+            duplicate := Book.query_first(db, content_hash=content_hash)
+        ):
+            logger.info(f"书籍内容与 {duplicate.title} 相同，共用同一文件。")
         if book := Book.query_first(db, download_link=download_link):
             logger.info(f"更新书籍 {book.title} 下载信息: size={file_size}, path={file_path}, format={file_format}")
-            book.downloaded(file_path, file_size, file_format)
+            book.downloaded(file_path, file_size, file_format, content_hash)
             logger.info(f"书籍 {book.title} 下载完成。")
+            if settings.PDF_OPTIMIZE and file_format == BookFormat.PDF:
+                optimize_book_task.delay(book.id)
+
+
+@celery_app.task(bind=True, base=BaseTask)
+@BaseTask.retry_decorator(is_async=True)
+async def download_books_batch_task(limit: int = settings.DOWNLOAD_BATCH_SIZE):
+    """批量下载任务
+
+    用 SELECT ... FOR UPDATE SKIP LOCKED 领取最多 limit 本待下载书籍，多个 worker
+    同时运行时各自领取不同的书籍；用同一个下载器（共享连接池）并发下载，
+    最后在领取书籍的事务中一次性写入结果并释放锁。
+    """
+    with get_denpend_db() as db:
+        if not (books := Book.claim_pending(db, limit)):
+            logger.info("没有待下载的书籍。")
+            return 0
+
+        logger.info(f"批量下载书籍: {len(books)}本")
+        downloader = create_downloader(settings.DOWNLOADER_TYPE)
+        semaphore = asyncio.Semaphore(settings.MAX_DOWNLOAD_CONCURRENT)
+
+        async def download(book_dict: dict) -> dict:
+            async with semaphore:
+                return await downloader.download_book(book_dict)
+
+        results = await asyncio.gather(
+            *(download(book.to_dict()) for book in books), return_exceptions=True
+        )
+
+        downloaded_ids = []
+        for book, result in zip(books, results):
+            if isinstance(result, BaseException):
+                logger.error(f"书籍 {book.title} 下载失败: {result}")
+                book.download_failed(commit=False)
+                continue
+            if not (result.get("file_size") and result.get("file_path") and result.get("file_format")):
+                logger.warning(f"书籍 {book.title} 未下载。")
+                book.download_failed(commit=False)
+                continue
+
+            content_hash = result.get("content_hash")
+            if content_hash and (
+                duplicate := Book.query_first(db, content_hash=content_hash)
+            ):
+                logger.info(f"书籍 {book.title} 内容与 {duplicate.title} 相同，共用同一文件。")
+            book.downloaded(
+                result["file_path"],
+                result["file_size"],
+                result["file_format"],
+                content_hash,
+                commit=False,
+            )
+            downloaded_ids.append(book.id)
+
+    logger.info(f"批量下载完成: {len(downloaded_ids)}/{len(books)}本")
+    if settings.PDF_OPTIMIZE:
+        for book_id in downloaded_ids:
+            optimize_book_task.delay(book_id)
+    return len(downloaded_ids)
+
+
+@celery_app.task(bind=True, base=BaseTask)
+@BaseTask.retry_decorator(is_async=True)
+async def optimize_book_task(book_id: int):
+    """优化已下载的 PDF，生成更小的副本用于分发，原文件保留"""
+    with get_denpend_db() as db:
+        if not (book := Book.get_by_id(db, book_id)):
+            logger.warning("书籍未在数据库中找到。")
+            return
+        if book.file_format != BookFormat.PDF or not book.file_path or book.optimized_path:
+            return
+        file_path = book.file_path
+
+    # 同时上传且不保留本地文件时，或文件已被清理时，没有可优化的文件
+    if not Path(file_path).exists():
+        logger.info(f"本地文件不存在，跳过 PDF 优化: {file_path}")
+        return
+
+    if not (result := await optimize_pdf_in_pool(file_path)):
+        return
+
+    with get_denpend_db() as db:
+        if book := Book.get_by_id(db, book_id):
+            book.optimized(
+                result["output_path"], result["optimized_size"], result["optimized_hash"]
+            )
 
 
 @celery_app.task(bind=True, base=BaseTask)
@@ -2,5 +2,6 @@ from app.uploader.base import BaseUploader
 from app.uploader.r2 import R2Uploader
 from app.uploader.s3 import S3Uploader
 from app.uploader.factory import create_uploader
+from app.uploader.registry import UploadRegistry
 
-__all__ = ["BaseUploader", "R2Uploader", "S3Uploader", "create_uploader"]
+__all__ = ["BaseUploader", "R2Uploader", "S3Uploader", "UploadRegistry", "create_uploader"]
@@ -1,10 +1,20 @@
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from loguru import logger
 
 
 class BaseUploader(ABC):
     """基础上传器接口"""
+
+    bucket_name: str = ""
+
+    @staticmethod
+    def content_key(content_hash: str, suffix: str = "") -> str:
+        """按内容摘要生成的文件键名，文件名相同而内容不同的文件不会互相覆盖"""
+        return f"books/{content_hash[:2]}/{content_hash}{suffix}"
     
     @abstractmethod
     def upload_file(self, file_path: str, key: str | None = None) -> str:
@@ -18,19 +28,82 @@ class BaseUploader(ABC):
             str: 云存储中的文件键名
         """
         pass
+
+    def upload_files(self, file_paths: List[str], keys: List[str] | None = None) -> Dict[str, str]:
+        """上传多个文件
+        
+        Args:
+            file_paths: 本地文件路径列表
+            keys: 与 file_paths 对应的键名，如果不指定则使用文件名
+            
+        Returns:
+            Dict[str, str]: 上传成功的文件路径到键名的映射，失败的文件会记录日志并跳过
+        """
+        keys = keys or [None] * len(file_paths)
+        results = {}
+        for file_path, key in zip(file_paths, keys):
+            try:
+                results[file_path] = self.upload_file(file_path, key)
+            except Exception as e:
+                logger.error(f"文件上传失败: {file_path}, {str(e)}")
+        return results
     
     @abstractmethod
-    def generate_url(self, key: str, expires_in: int = 604800) -> str:
+    def generate_url(self, key: str, expires_in: int = 604800, filename: str | None = None) -> str:
         """生成预签名URL
         
         Args:
             key: 云存储中的文件键名
             expires_in: URL有效期（秒），默认7天
+            filename: 下载时使用的文件名，默认使用键名中的文件名
             
         Returns:
             str: 预签名URL
         """
         pass
+
+    def generate_urls(
+        self,
+        keys: List[str],
+        expires_in: int = 604800,
+        filenames: List[str | None] | None = None,
+    ) -> List[str]:
+        """批量生成预签名URL
+        
+        Args:
+            keys: 云存储中的文件键名列表
+            expires_in: URL有效期（秒），默认7天
+            filenames: 与 keys 对应的下载文件名，默认使用键名中的文件名
+            
+        Returns:
+            List[str]: 与 keys 顺序一致的预签名URL
+        """
+        filenames = filenames or [None] * len(keys)
+        return [
+            self.generate_url(key, expires_in, filename)
+            for key, filename in zip(keys, filenames)
+        ]
+
+    def generate_urls_with_expiry(
+        self,
+        keys: List[str],
+        expires_in: int = 604800,
+        filenames: List[str | None] | None = None,
+    ) -> List[Tuple[str, float]]:
+        """批量生成预签名URL，同时返回各URL的过期时间戳
+
+        复用缓存的URL时，实际剩余有效期可能短于 expires_in，需要告知用户过期时间时使用。
+
+        Args:
+            keys: 云存储中的文件键名列表
+            expires_in: URL有效期（秒），默认7天
+            filenames: 与 keys 对应的下载文件名，默认使用键名中的文件名
+
+        Returns:
+            List[Tuple[str, float]]: 与 keys 顺序一致的 (预签名URL, 过期时间戳)
+        """
+        expires_at = time.time() + expires_in
+        return [(url, expires_at) for url in self.generate_urls(keys, expires_in, filenames)]
     
     @abstractmethod
     def file_exists(self, key: str) -> bool:
@@ -92,6 +165,30 @@ class BaseUploader(ABC):
         """
         pass
 
+    def move_file(self, src_key: str, dst_key: str) -> str:
+        """在云存储内移动文件
+
+        Args:
+            src_key: 原文件键名
+            dst_key: 新文件键名
+
+        Returns:
+            str: 新文件的 ETag
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持移动文件")
+
+    def open_stream(self, key: str, content_type: str | None = None):
+        """打开一个流式上传，边写入边上传到云存储
+
+        Args:
+            key: 云存储中的文件键名
+            content_type: 文件 MIME 类型
+
+        Returns:
+            支持 ``await write(chunk)``、``await complete()`` 和 ``await abort()`` 的写入器
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持流式上传")
+
     def upload_and_get_url(self, file_path: str, 
                           key: str | None = None,
                           expires_in: int = 604800) -> str:
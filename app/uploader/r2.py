@@ -1,5 +1,6 @@
 from app.config import settings
 from app.uploader.s3 import S3Uploader
+from app.uploader.url_cache import get_url_cache
 
 
 class R2Uploader(S3Uploader):
@@ -14,6 +15,7 @@ class R2Uploader(S3Uploader):
         self.access_key_id = settings.R2_ACCESS_KEY_ID
         self.secret_access_key = settings.R2_SECRET_ACCESS_KEY
         self.endpoint_url = settings.R2_ENDPOINT_URL
+        self.url_cache = get_url_cache() if settings.UPLOAD_URL_CACHE else None
         self.build_client()
 
     # def build_client(self):
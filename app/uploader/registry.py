@@ -0,0 +1,96 @@
+import hashlib
+import os
+from pathlib import Path
+
+from loguru import logger
+
+from app.database import Upload, get_denpend_db
+from app.uploader.base import BaseUploader
+
+
+def file_sha256(file_path: str | Path) -> str:
+    """计算文件的 SHA-256"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class UploadRegistry:
+    """上传登记
+
+    文件按内容摘要上传（键名见 BaseUploader.content_key），上传后在数据库中登记
+    键名、ETag 和大小。已登记的内容不再访问云存储，分发时只需生成预签名 URL。
+    """
+
+    def __init__(self, uploader: BaseUploader):
+        self.uploader = uploader
+
+    @property
+    def bucket(self) -> str:
+        return self.uploader.bucket_name
+
+    def lookup(self, content_hash: str) -> str | None:
+        """已上传内容的键名，未登记时返回 None"""
+        with get_denpend_db() as db:
+            if upload := Upload.lookup(db, self.bucket, content_hash):
+                return upload.key
+        return None
+
+    def lookup_many(self, content_hashes: list[str]) -> dict[str, str]:
+        """批量查询已上传内容的键名，返回 {内容摘要: 键名}"""
+        with get_denpend_db() as db:
+            return {
+                upload.content_hash: upload.key
+                for upload in Upload.lookup_many(db, self.bucket, content_hashes)
+            }
+
+    def register(self, key: str, content_hash: str, etag: str | None = None, size: int | None = None):
+        """登记已上传的文件"""
+        with get_denpend_db() as db:
+            Upload.register(db, self.bucket, key, content_hash, etag, size)
+
+    def upload(self, file_path: str | Path, content_hash: str | None = None, key: str | None = None) -> str:
+        """上传文件（内容已登记时跳过）并返回键名，key 默认按内容摘要生成"""
+        content_hash = content_hash or file_sha256(file_path)
+        if existing := self.lookup(content_hash):
+            return existing
+
+        key = key or self.uploader.content_key(content_hash, Path(file_path).suffix)
+        self.uploader.upload_file(str(file_path), key)
+        info = self.uploader.get_file_info(key)
+        self.register(key, content_hash, info.get("etag"), info.get("size"))
+        logger.info(f"已登记上传文件: {os.path.basename(file_path)} -> {key}")
+        return key
+
+    def adopt(self, temp_key: str, content_hash: str, suffix: str = "", size: int | None = None) -> str:
+        """把上传到临时键名的文件移到内容键名并登记，内容已登记时删除临时文件，返回键名"""
+        if key := self.lookup(content_hash):
+            self.uploader.delete_file(temp_key)
+            return key
+
+        key = self.uploader.content_key(content_hash, suffix)
+        etag = self.uploader.move_file(temp_key, key)
+        self.register(key, content_hash, etag, size)
+        return key
+
+    def resolve(self, file_path: str | Path, content_hash: str | None = None) -> str:
+        """获取文件内容在云存储中的键名，必要时上传
+
+        依次尝试：已登记的内容、上传本地文件、按文件名上传的旧文件（找到后登记）。
+        云存储和本地都没有时抛出 FileNotFoundError。
+        """
+        if content_hash and (key := self.lookup(content_hash)):
+            return key
+        if os.path.exists(file_path):
+            return self.upload(file_path, content_hash)
+
+        # 之前按文件名上传、本地文件已清理的内容
+        key = os.path.basename(file_path)
+        if not self.uploader.file_exists(key):
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        if content_hash:
+            info = self.uploader.get_file_info(key)
+            self.register(key, content_hash, info.get("etag"), info.get("size"))
+        return key
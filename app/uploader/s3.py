@@ -1,14 +1,176 @@
+import asyncio
 import os
-from typing import Any, Dict, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple
 from urllib.parse import quote
 
 import boto3
+from boto3.s3.transfer import S3UploadFailedError, TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from loguru import logger
 
 from app.config import settings
 from app.uploader.base import BaseUploader
+from app.uploader.url_cache import get_url_cache
+
+MB = 1024 * 1024
+
+
+class S3MultipartWriter:
+    """S3 分片上传写入器
+
+    写入的数据攒够 part_size 后在线程中上传一个分片，最多同时上传
+    max_inflight 个分片，写入方无需等待每个分片完成。
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket_name: str,
+        key: str,
+        content_type: str | None = None,
+        part_size: int = settings.UPLOAD_PART_SIZE,
+        max_inflight: int = 2,
+    ):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.max_inflight = max_inflight
+        self.upload_id: str | None = None
+        self.size = 0
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self._inflight: List[asyncio.Task] = []
+
+    async def _start(self):
+        params = {"Bucket": self.bucket_name, "Key": self.key}
+        if self.content_type:
+            params["ContentType"] = self.content_type
+        response = await asyncio.to_thread(self.client.create_multipart_upload, **params)
+        self.upload_id = response["UploadId"]
+        logger.debug(f"开始分片上传: s3://{self.bucket_name}/{self.key}")
+
+    def _upload_part(self, part_number: int, body: bytes) -> Dict[str, Any]:
+        response = self.client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    async def _flush(self):
+        if self.upload_id is None:
+            await self._start()
+        while len(self._inflight) >= self.max_inflight:
+            self._parts.append(await self._inflight.pop(0))
+
+        part_number = len(self._parts) + len(self._inflight) + 1
+        body = bytes(self._buffer)
+        self._buffer.clear()
+        self._inflight.append(
+            asyncio.create_task(asyncio.to_thread(self._upload_part, part_number, body))
+        )
+
+    async def write(self, chunk: bytes):
+        self._buffer.extend(chunk)
+        self.size += len(chunk)
+        if len(self._buffer) >= self.part_size:
+            await self._flush()
+
+    async def complete(self) -> str:
+        """上传剩余数据并完成分片上传，返回文件键名"""
+        if self._buffer or self.upload_id is None:
+            await self._flush()
+        for task in self._inflight:
+            self._parts.append(await task)
+        self._inflight.clear()
+
+        await asyncio.to_thread(
+            self.client.complete_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": sorted(self._parts, key=lambda p: p["PartNumber"])},
+        )
+        logger.info(f"分片上传完成: s3://{self.bucket_name}/{self.key}, {len(self._parts)} 个分片")
+        return self.key
+
+    async def abort(self):
+        """放弃分片上传，清理已上传的分片"""
+        for task in self._inflight:
+            task.cancel()
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._inflight.clear()
+        if self.upload_id is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self.client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=self.key,
+                UploadId=self.upload_id,
+            )
+            logger.info(f"已取消分片上传: s3://{self.bucket_name}/{self.key}")
+        except ClientError as e:
+            logger.error(f"取消分片上传失败: {str(e)}")
+
+
+class UploadProgress:
+    """上传进度回调
+
+    boto3 在多个线程中以增量字节数调用，定期记录进度日志，完成后记录平均速度。
+    """
+
+    def __init__(self, name: str, total: int, interval: float = settings.UPLOAD_PROGRESS_INTERVAL):
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.bytes_done = 0
+        self.started_at = time.monotonic()
+        self._logged_at = self.started_at
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int):
+        with self._lock:
+            self.bytes_done += bytes_amount
+            now = time.monotonic()
+            if now - self._logged_at < self.interval:
+                return
+            self._logged_at = now
+        logger.info(
+            f"上传进度: {self.name}, {self.bytes_done / MB:.2f}/{self.total / MB:.2f} MB "
+            f"({self.bytes_done / max(self.total, 1):.0%}), {self.rate / MB:.2f} MB/s"
+        )
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """平均速度（字节/秒）"""
+        return self.bytes_done / self.elapsed if self.elapsed else 0.0
+
+
+def transfer_config(
+    multipart_threshold: int = settings.UPLOAD_MULTIPART_THRESHOLD,
+    multipart_chunksize: int = settings.UPLOAD_PART_SIZE,
+    max_concurrency: int = settings.UPLOAD_MAX_CONCURRENCY,
+) -> TransferConfig:
+    """上传使用的分片配置"""
+    return TransferConfig(
+        multipart_threshold=multipart_threshold,
+        multipart_chunksize=multipart_chunksize,
+        max_concurrency=max_concurrency,
+        use_threads=max_concurrency > 1,
+    )
 
 
 class S3Uploader(BaseUploader):
@@ -22,9 +184,11 @@ class S3Uploader(BaseUploader):
         self.access_key_id = settings.AWS_ACCESS_KEY_ID
         self.secret_access_key = settings.AWS_SECRET_ACCESS_KEY
         self.endpoint_url = settings.AWS_S3_ENDPOINT_URL
+        self.url_cache = get_url_cache() if settings.UPLOAD_URL_CACHE else None
         self.build_client()
     
     def build_client(self):
+        self.transfer_config = transfer_config()
         config = Config(
             region_name=self.region,
             retries={
@@ -34,7 +198,10 @@ class S3Uploader(BaseUploader):
             # 上传大文件的配置
             connect_timeout=10,
             read_timeout=60,
-            max_pool_connections=10,
+            # 批量上传时所有分片共用连接池
+            max_pool_connections=max(
+                10, settings.UPLOAD_FILES_CONCURRENCY * settings.UPLOAD_MAX_CONCURRENCY
+            ),
             tcp_keepalive=True
         )
         self.client = boto3.client(
@@ -87,44 +254,173 @@ class S3Uploader(BaseUploader):
         
         try:
             logger.debug(f"正在上传文件 {file_path} 到 bucket '{self.bucket_name}'...")
-            self.client.upload_file(file_path, self.bucket_name, key)
-            logger.info(f"文件上传成功: s3://{self.bucket_name}/{key}")
+            progress = UploadProgress(key, os.path.getsize(file_path))
+            self.client.upload_file(
+                file_path, self.bucket_name, key,
+                Config=self.transfer_config, Callback=progress,
+            )
+            logger.info(
+                f"文件上传成功: s3://{self.bucket_name}/{key}, "
+                f"{progress.total / MB:.2f} MB, {progress.elapsed:.2f} 秒, {progress.rate / MB:.2f} MB/s"
+            )
             return key
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             logger.error(f"文件上传失败: {str(e)}")
             raise
+
+    def upload_files(self, file_paths: List[str], keys: List[str] | None = None) -> Dict[str, str]:
+        """同时上传多个文件，最多 UPLOAD_FILES_CONCURRENCY 个文件共用客户端的连接池
+        
+        Args:
+            file_paths: 本地文件路径列表
+            keys: 与 file_paths 对应的键名，如果不指定则使用文件名
+            
+        Returns:
+            Dict[str, str]: 上传成功的文件路径到键名的映射，失败的文件会记录日志并跳过
+        """
+        keys = keys or [None] * len(file_paths)
+        started_at = time.monotonic()
+        results = {}
+        with ThreadPoolExecutor(max_workers=settings.UPLOAD_FILES_CONCURRENCY) as executor:
+            futures = {
+                executor.submit(self.upload_file, file_path, key): file_path
+                for file_path, key in zip(file_paths, keys)
+            }
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    results[file_path] = future.result()
+                except Exception as e:
+                    logger.error(f"文件上传失败: {file_path}, {str(e)}")
+
+        total = sum(os.path.getsize(file_path) for file_path in results)
+        elapsed = time.monotonic() - started_at
+        logger.info(
+            f"批量上传完成: {len(results)}/{len(file_paths)} 个文件, {total / MB:.2f} MB, "
+            f"{elapsed:.2f} 秒, {total / MB / elapsed if elapsed else 0:.2f} MB/s"
+        )
+        return results
     
-    def generate_url(self, key: str, expires_in: int = 604800) -> str:
+    def open_stream(self, key: str, content_type: str | None = None) -> S3MultipartWriter:
+        """打开分片上传写入器，边写入边上传
+
+        Args:
+            key: 文件键名
+            content_type: 文件 MIME 类型
+
+        Returns:
+            S3MultipartWriter: 分片上传写入器
+        """
+        return S3MultipartWriter(
+            self.client, self.bucket_name, key, content_type, settings.UPLOAD_PART_SIZE
+        )
+
+    def move_file(self, src_key: str, dst_key: str) -> str:
+        """在 bucket 内复制文件到新键名并删除原文件，返回新文件的 ETag"""
+        try:
+            self.client.copy({'Bucket': self.bucket_name, 'Key': src_key}, self.bucket_name, dst_key)
+            self.client.delete_object(Bucket=self.bucket_name, Key=src_key)
+            logger.info(f"文件已移动: s3://{self.bucket_name}/{src_key} -> {dst_key}")
+            return self.get_file_info(dst_key)['etag']
+        except ClientError as e:
+            logger.error(f"移动文件失败: {str(e)}")
+            raise
+
+    def generate_url(self, key: str, expires_in: int = 604800, filename: str | None = None) -> str:
         """生成预签名URL
         
+        开启 UPLOAD_URL_CACHE 时，剩余有效期足够的已签名URL直接复用。
+        
         Args:
             key: 文件键名
             expires_in: URL有效期（秒），默认7天
+            filename: 下载时使用的文件名，默认使用键名中的文件名
             
         Returns:
             str: 预签名URL
         """
+        return self.generate_urls([key], expires_in, [filename])[0]
+
+    @staticmethod
+    def _content_disposition(key: str, filename: str | None = None) -> str:
+        # 对文件名进行URL编码
+        encoded_filename = quote(filename or os.path.basename(key))
+        return f'attachment; filename="{encoded_filename}"'
+
+    def _presign(self, key: str, disposition: str, expires_in: int) -> str:
         try:
-            # 对文件名进行URL编码
-            filename = os.path.basename(key)
-            encoded_filename = quote(filename)
-            
-            # 生成预签名URL
             url = self.client.generate_presigned_url(
                 'get_object',
                 Params={
                     'Bucket': self.bucket_name,
                     'Key': key,
-                    'ResponseContentDisposition': f'attachment; filename="{encoded_filename}"'
+                    'ResponseContentDisposition': disposition
                 },
                 ExpiresIn=expires_in
             )
-            
             logger.debug(f"生成预签名URL成功: {url}")
             return url
         except ClientError as e:
             logger.error(f"生成预签名URL失败: {str(e)}")
             raise
+
+    def generate_urls(
+        self,
+        keys: List[str],
+        expires_in: int = 604800,
+        filenames: List[str | None] | None = None,
+    ) -> List[str]:
+        """批量生成预签名URL，缓存中可复用的URL一次查出，只为其余的键名签名
+        
+        Args:
+            keys: 文件键名列表
+            expires_in: URL有效期（秒），默认7天
+            filenames: 与 keys 对应的下载文件名，默认使用键名中的文件名
+            
+        Returns:
+            List[str]: 与 keys 顺序一致的预签名URL
+        """
+        return [url for url, _ in self.generate_urls_with_expiry(keys, expires_in, filenames)]
+
+    def generate_urls_with_expiry(
+        self,
+        keys: List[str],
+        expires_in: int = 604800,
+        filenames: List[str | None] | None = None,
+    ) -> List[Tuple[str, float]]:
+        """批量生成预签名URL并返回过期时间戳，复用的URL返回缓存中记录的过期时间
+        
+        Args:
+            keys: 文件键名列表
+            expires_in: URL有效期（秒），默认7天
+            filenames: 与 keys 对应的下载文件名，默认使用键名中的文件名
+            
+        Returns:
+            List[Tuple[str, float]]: 与 keys 顺序一致的 (预签名URL, 过期时间戳)
+        """
+        filenames = filenames or [None] * len(keys)
+        cache_keys = [
+            (self.bucket_name, key, self._content_disposition(key, filename), expires_in)
+            for key, filename in zip(keys, filenames)
+        ]
+        # 在签名前取时间，记录的过期时间不晚于实际过期时间
+        expires_at = time.time() + expires_in
+        if self.url_cache is None:
+            return [
+                (self._presign(key, disposition, expires_in), expires_at)
+                for _, key, disposition, _ in cache_keys
+            ]
+
+        entries = self.url_cache.get_entries(cache_keys)
+        signed = {}
+        for cache_key, entry in zip(cache_keys, entries):
+            if entry is None and cache_key not in signed:
+                _, key, disposition, _ = cache_key
+                signed[cache_key] = (self._presign(key, disposition, expires_in), expires_at)
+        if signed:
+            self.url_cache.put_many([(k, url, at) for k, (url, at) in signed.items()])
+            logger.debug(f"预签名URL: 复用 {len(keys) - len(signed)} 个, 新签名 {len(signed)} 个")
+        return [entry or signed[cache_key] for cache_key, entry in zip(cache_keys, entries)]
     
     def file_exists(self, key: str) -> bool:
         """检查文件是否存在
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from loguru import logger
+
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+CacheKey = tuple[str, str, str, int]  # (bucket, 键名, Content-Disposition, 有效期秒数)
+
+
+class PresignedUrlCache:
+    """预签名 URL 缓存
+
+    按 (bucket, 键名, Content-Disposition, 有效期) 缓存 URL 及其过期时间，剩余有效期
+    超过 margin 秒时直接复用，同一文件发给多个收件人时链接保持不变。
+    有效期是键的一部分，要求短期链接的调用方不会拿到长期链接。
+    Redis 中的条目在剩余有效期不足 margin 时自动过期；Redis 出错时退回进程内缓存。
+    """
+
+    def __init__(
+        self,
+        margin: int = settings.UPLOAD_URL_CACHE_MARGIN,
+        backend: str = settings.UPLOAD_URL_CACHE_BACKEND,
+        prefix: str = "book_sender:presigned_url",
+        max_size: int = 10000,
+    ):
+        self.margin = margin
+        self.backend = backend
+        self.prefix = prefix
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._local: OrderedDict[CacheKey, tuple[str, float]] = OrderedDict()
+
+    def _key(self, cache_key: CacheKey) -> str:
+        return f"{self.prefix}:{hashlib.sha1(json.dumps(cache_key).encode()).hexdigest()}"
+
+    def _usable(self, expires_at: float) -> bool:
+        return expires_at - time.time() > self.margin
+
+    def _get_local(self, cache_key: CacheKey) -> tuple[str, float] | None:
+        with self._lock:
+            url, expires_at = self._local.get(cache_key, (None, 0))
+            if url is None:
+                return None
+            if not self._usable(expires_at):
+                del self._local[cache_key]
+                return None
+            self._local.move_to_end(cache_key)
+            return url, expires_at
+
+    def _put_local(self, cache_key: CacheKey, url: str, expires_at: float):
+        with self._lock:
+            self._local[cache_key] = (url, expires_at)
+            self._local.move_to_end(cache_key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def get_entries(self, cache_keys: list[CacheKey]) -> list[tuple[str, float] | None]:
+        """批量查询可复用的 (URL, 过期时间戳)，没有或即将过期时为 None"""
+        if self.backend == "redis" and cache_keys:
+            try:
+                values = get_redis().mget([self._key(k) for k in cache_keys])
+                entries = []
+                for value in values:
+                    entry = json.loads(value) if value else None
+                    if entry and self._usable(entry["expires_at"]):
+                        entries.append((entry["url"], entry["expires_at"]))
+                    else:
+                        entries.append(None)
+                return entries
+            except redis.RedisError as e:
+                logger.warning(f"Redis 预签名URL缓存不可用，使用进程内缓存: {e}")
+        return [self._get_local(k) for k in cache_keys]
+
+    def get_many(self, cache_keys: list[CacheKey]) -> list[str | None]:
+        """批量查询可复用的 URL，没有或即将过期时为 None"""
+        return [entry[0] if entry else None for entry in self.get_entries(cache_keys)]
+
+    def put_many(self, entries: list[tuple[CacheKey, str, float]]):
+        """缓存 (缓存键, URL, 过期时间戳) 列表，有效期不超过 margin 的 URL 不缓存"""
+        entries = [entry for entry in entries if self._usable(entry[2])]
+        if self.backend == "redis" and entries:
+            try:
+                pipe = get_redis().pipeline(transaction=False)
+                for cache_key, url, expires_at in entries:
+                    ttl = int(expires_at - time.time() - self.margin)
+                    value = json.dumps({"url": url, "expires_at": expires_at})
+                    pipe.set(self._key(cache_key), value, ex=max(ttl, 1))
+                pipe.execute()
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Redis 预签名URL缓存不可用，使用进程内缓存: {e}")
+        for cache_key, url, expires_at in entries:
+            self._put_local(cache_key, url, expires_at)
+
+    def get(self, cache_key: CacheKey) -> str | None:
+        return self.get_many([cache_key])[0]
+
+    def put(self, cache_key: CacheKey, url: str, expires_at: float):
+        self.put_many([(cache_key, url, expires_at)])
+
+
+_url_cache: PresignedUrlCache | None = None
+
+
+def get_url_cache() -> PresignedUrlCache:
+    """获取进程共享的预签名 URL 缓存"""
+    global _url_cache
+    if _url_cache is None:
+        _url_cache = PresignedUrlCache()
+    return _url_cache
@@ -1,86 +1,262 @@
-import py7zr
-from pathlib import Path
-from typing import Dict
+import asyncio
+import tarfile
 import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import py7zr
+import zstandard
 from loguru import logger
 
+from app.config import settings
+from app.utils.process_pool import ProcessPool
+
+MB = 1024 * 1024
+
+
+class CompressionProfile:
+    """压缩方式和级别，throughput 为预估的压缩速度（字节/秒），用于按时间预算选择"""
+
+    SUFFIXES = {"lzma2": ".7z", "zstd": ".tar.zst", "zip": ".zip"}
+
+    def __init__(self, codec: str, level: int, throughput: float):
+        if codec not in self.SUFFIXES:
+            raise ValueError(f"Unsupported codec: {codec}")
+        self.codec = codec
+        self.level = level
+        self.throughput = throughput
+
+    @property
+    def name(self) -> str:
+        return f"{self.codec}-{self.level}"
+
+    @property
+    def suffix(self) -> str:
+        return self.SUFFIXES[self.codec]
+
+    def estimate_seconds(self, size: int) -> float:
+        return size / self.throughput
+
+    def __repr__(self) -> str:
+        return f"CompressionProfile({self.name})"
+
+
+# 按压缩率从高到低排列；速度为单核压缩 PDF 的大致数值，可用 benchmarks.compression_benchmark 重新测量
+PROFILES: List[CompressionProfile] = [
+    CompressionProfile("lzma2", 9, 2 * MB),
+    CompressionProfile("zstd", 19, 4 * MB),
+    CompressionProfile("lzma2", 5, 6 * MB),
+    CompressionProfile("zstd", 9, 40 * MB),
+    CompressionProfile("zip", 6, 30 * MB),
+    CompressionProfile("zstd", 3, 150 * MB),
+    CompressionProfile("zip", 1, 80 * MB),
+]
+
+
+def get_profile(name: str) -> CompressionProfile:
+    """按名称（如 "lzma2-9"）获取压缩配置"""
+    for profile in PROFILES:
+        if profile.name == name:
+            return profile
+    codec, _, level = name.rpartition("-")
+    return CompressionProfile(codec, int(level), MB)
+
+
+def choose_profile(
+    size: int, time_budget: float, codecs: Iterable[str] | None = None
+) -> CompressionProfile:
+    """选择预计能在 time_budget 秒内压缩完 size 字节的压缩率最高的配置，都超时则选最快的"""
+    candidates = [p for p in PROFILES if codecs is None or p.codec in codecs]
+    if not candidates:
+        raise ValueError(f"Unsupported codecs: {codecs}")
+    for profile in candidates:
+        if profile.estimate_seconds(size) <= time_budget:
+            return profile
+    return max(candidates, key=lambda p: p.throughput)
+
+
+def compress_files(
+    input_paths: List[str | Path], output_path: str | Path, codec: str = "lzma2", level: int = 9
+) -> Dict:
+    """把文件压缩为一个压缩包
+
+    Args:
+        input_paths: 输入文件路径
+        output_path: 压缩包路径
+        codec: 压缩方式，lzma2 (7z)、zstd (tar.zst) 或 zip
+        level: 压缩级别
+
+    Returns:
+        Dict: 压缩统计信息
+    """
+    input_paths = [Path(p) for p in input_paths]
+    output_path = Path(output_path)
+    for input_path in input_paths:
+        if not input_path.exists():
+            raise FileNotFoundError(f"文件不存在: {input_path}")
+
+    start_time = time.perf_counter()
+    if codec == "lzma2":
+        with py7zr.SevenZipFile(
+            output_path, "w", filters=[{"id": py7zr.FILTER_LZMA2, "preset": level}]
+        ) as archive:
+            for input_path in input_paths:
+                archive.write(input_path, input_path.name)
+    elif codec == "zstd":
+        compressor = zstandard.ZstdCompressor(level=level, threads=-1)
+        with open(output_path, "wb") as f, compressor.stream_writer(f) as writer:
+            with tarfile.open(fileobj=writer, mode="w|") as archive:
+                for input_path in input_paths:
+                    archive.add(input_path, input_path.name)
+    elif codec == "zip":
+        with zipfile.ZipFile(
+            output_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level
+        ) as archive:
+            for input_path in input_paths:
+                archive.write(input_path, input_path.name)
+    else:
+        raise ValueError(f"Unsupported codec: {codec}")
+
+    original_size = sum(p.stat().st_size for p in input_paths)
+    compressed_size = output_path.stat().st_size
+    time_taken = time.perf_counter() - start_time
+    return {
+        "status": "success",
+        "input_paths": [str(p) for p in input_paths],
+        "output_path": str(output_path),
+        "codec": codec,
+        "level": level,
+        "original_size": original_size,
+        "compressed_size": compressed_size,
+        "compression_ratio": compressed_size / original_size if original_size else 1.0,
+        "time_taken_seconds": time_taken,
+        "throughput": original_size / time_taken if time_taken else 0.0,
+    }
+
+
 def compress_to_7z(input_path: str | Path, compression_level: int = 9) -> Dict:
     """
     将文件压缩为7z格式并测试压缩效果
-    
+
     Args:
         input_path: 输入文件路径
         compression_level: 压缩级别 (0-9)，默认9为最高压缩率
     """
-    if isinstance(input_path, str):
-        input_path = Path(input_path)
-
-    if not input_path.exists():
-        raise FileNotFoundError(f"文件不存在: {input_path}")
-        
-    # 构建输出文件路径
+    input_path = Path(input_path)
     output_path = input_path.parent / f"{input_path.stem}.7z"
-    
-    # 记录开始时间
-    start_time = time.time()
-    
     try:
-        # 配置7z压缩选项
-        filters = [
-            {
-                "id": py7zr.FILTER_LZMA2,
-                "preset": compression_level
-            }
-        ]
-        
-        # 执行压缩
-        with py7zr.SevenZipFile(
-            output_path,
-            'w',
-            filters=filters
-        ) as archive:
-            archive.write(input_path, input_path.name)
-        
-        # 计算压缩统计信息
-        original_size = input_path.stat().st_size
-        compressed_size = output_path.stat().st_size
-        compression_ratio = compressed_size / original_size
-        time_taken = time.time() - start_time
-        
-        result = {
-            "status": "success",
-            "input_path": str(input_path),
-            "output_path": str(output_path),
-            "original_size": original_size,
-            "compressed_size": compressed_size,
-            "compression_ratio": compression_ratio,
-            "time_taken_seconds": time_taken
-        }
-        
-        # 打印结果
-        logger.info(f"压缩结果:")
-        logger.info(f"原始文件: {result['input_path']}")
-        logger.info(f"压缩文件: {result['output_path']}")
-        logger.info(f"原始大小: {result['original_size'] / 1024 / 1024:.2f} MB")
-        logger.info(f"压缩大小: {result['compressed_size'] / 1024 / 1024:.2f} MB")
-        logger.info(f"压缩比例: {result['compression_ratio']:.2%}")
-        logger.info(f"耗时: {result['time_taken_seconds']:.2f} 秒")
-        
-        return result
-        
+        result = compress_files([input_path], output_path, "lzma2", compression_level)
+        result["input_path"] = str(input_path)
     except Exception as e:
         logger.error(f"压缩失败: {str(e)}")
         raise e
 
+    logger.info(f"压缩结果:")
+    logger.info(f"原始文件: {input_path}")
+    logger.info(f"压缩文件: {result['output_path']}")
+    logger.info(f"原始大小: {result['original_size'] / MB:.2f} MB")
+    logger.info(f"压缩大小: {result['compressed_size'] / MB:.2f} MB")
+    logger.info(f"压缩比例: {result['compression_ratio']:.2%}")
+    logger.info(f"耗时: {result['time_taken_seconds']:.2f} 秒")
+    return result
+
+
+class CompressionService:
+    """压缩服务
+
+    按文件大小和时间预算选择压缩方式，在进程池中压缩，多个压缩包可以同时进行。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.COMPRESS_WORKERS,
+        time_budget: float = settings.COMPRESS_TIME_BUDGET,
+    ):
+        self.max_workers = max_workers
+        self.time_budget = time_budget
+        self._executor: ProcessPool | None = None
+
+    @property
+    def executor(self) -> ProcessPool:
+        if self._executor is None:
+            self._executor = ProcessPool(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def compress(
+        self,
+        input_paths: List[str | Path],
+        output_path: str | Path,
+        profile: CompressionProfile | None = None,
+        codecs: Iterable[str] | None = None,
+    ) -> Dict:
+        """压缩文件为一个压缩包，output_path 不含扩展名，扩展名由压缩方式决定"""
+        if profile is None:
+            size = sum(Path(p).stat().st_size for p in input_paths)
+            profile = choose_profile(size, self.time_budget, codecs)
+        output_path = Path(output_path)
+        output_path = output_path.with_name(output_path.name + profile.suffix)
+
+        try:
+            result = await self.executor.run(
+                compress_files,
+                [str(p) for p in input_paths],
+                str(output_path),
+                profile.codec,
+                profile.level,
+            )
+        except Exception:
+            output_path.unlink(missing_ok=True)
+            raise
+
+        logger.info(
+            f"压缩完成: {output_path.name} ({profile.name}), "
+            f"{result['original_size'] / MB:.2f} MB -> {result['compressed_size'] / MB:.2f} MB "
+            f"({result['compression_ratio']:.2%}), {result['throughput'] / MB:.2f} MB/s"
+        )
+        return result
+
+    async def compress_many(
+        self, jobs: List[tuple[List[str | Path], str | Path]], codecs: Iterable[str] | None = None
+    ) -> List[Dict | BaseException]:
+        """同时压缩多组文件，jobs 为 (输入文件列表, 输出路径) 列表，失败的任务返回异常"""
+        return await asyncio.gather(
+            *(self.compress(input_paths, output_path, codecs=codecs) for input_paths, output_path in jobs),
+            return_exceptions=True,
+        )
+
+
+_compression_service: CompressionService | None = None
+
+
+def get_compression_service() -> CompressionService:
+    """获取进程共享的压缩服务"""
+    global _compression_service
+    if _compression_service is None:
+        _compression_service = CompressionService()
+    return _compression_service
+
+
+def shutdown_compression_service():
+    """关闭压缩服务的进程池"""
+    if _compression_service is not None:
+        _compression_service.shutdown()
+
+
 # 测试代码
 if __name__ == "__main__":
     # 测试不同压缩级别
     test_file = "downloads/The Economist Continental Europe Edition – 3-9 May 2025.pdf"  # 替换为你的PDF文件路径
-    
+
     print("测试不同压缩级别的效果...")
-    
+
     results = []
-    for level in [9]:  # 测试低、中、高三种压缩级别
+    for level in [1, 5, 9]:  # 测试低、中、高三种压缩级别
         print(f"\n使用压缩级别 {level}:")
         try:
             result = compress_to_7z(test_file, level)
@@ -88,13 +264,12 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"级别 {level} 测试失败: {str(e)}")
             continue
-    
+
     # 比较结果
     if results:
         print("\n压缩级别比较:")
         print("级别 | 压缩率 | 大小(MB) | 耗时(秒)")
         print("-" * 40)
-        for i, result in enumerate([9]):
-            if i < len(results):
-                r = results[i]
-                print(f"{result}    | {r['compression_ratio']:.2%} | {r['compressed_size_mb']:.2f} | {r['time_taken_seconds']:.2f}")
\ No newline at end of file
+        for r in results:
+            print(f"{r['level']}    | {r['compression_ratio']:.2%} | {r['compressed_size'] / MB:.2f} | {r['time_taken_seconds']:.2f}")
+    print("\n更完整的比较见: python -m benchmarks.compression_benchmark")
@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+from loguru import logger
+
+_clients: dict[str, httpx.AsyncClient] = {}
+_clients_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_client(name: str = "default", **kwargs) -> httpx.AsyncClient:
+    """获取按名称共享的 httpx.AsyncClient
+
+    同一事件循环内复用连接池；事件循环变化时（如 asyncio.run 多次调用）重新创建。
+    ``kwargs`` 只在首次创建该名称的客户端时生效。
+    """
+    global _clients_loop
+    loop = asyncio.get_running_loop()
+    if _clients_loop is not loop:
+        _clients.clear()
+        _clients_loop = loop
+
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        kwargs.setdefault("timeout", httpx.Timeout(30.0, connect=10.0))
+        kwargs.setdefault("follow_redirects", True)
+        kwargs.setdefault(
+            "limits", httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+        client = _clients[name] = httpx.AsyncClient(**kwargs)
+    return client
+
+
+async def close_http_clients():
+    """关闭当前事件循环中的所有共享客户端"""
+    for name, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭 HTTP 客户端 {name} 失败: {e}")
+    _clients.clear()
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pathlib import Path
 import cv2
 import numpy as np
@@ -15,41 +16,73 @@ class ImageProcessor:
         """
         self.debug = debug
 
-    def _save_debug_image(self, image: np.ndarray, mark: str, image_path: Path):
+    def _save_debug_image(self, image: np.ndarray, mark: str, name: str):
         """
         Save debug image to temporary directory
         :param image: The image to save
         :param mark: Image name
-        :param image_path: Original image path
+        :param name: Name of the original image
         """
         if not self.debug:
             return
             
         debug_dir = settings.TMP_DIR / "debug_images"
         debug_dir.mkdir(exist_ok=True, parents=True)
-        debug_path = debug_dir / f"{image_path.stem}_{mark}.png"
+        debug_path = debug_dir / f"{name}_{mark}.png"
         cv2.imwrite(str(debug_path), image)
         logger.debug(f"保存调试图像: {debug_path}")
 
-    def find_checkbox(self, image_path: str | Path) -> Tuple[int, int] | None:
+    def _load_image(self, image: str | Path | bytes | np.ndarray) -> np.ndarray | None:
+        """
+        Load a BGR image from a file path, encoded bytes or a NumPy array
+
+        :param image: Image file path, encoded image bytes (e.g. PNG) or decoded array
+        :return: BGR image, or None if it cannot be read
+        """
+        if isinstance(image, np.ndarray):
+            img = image
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            img = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                logger.error("Cannot decode image bytes")
+                return None
+        else:
+            image_path = Path(image)
+            if not image_path.exists():
+                logger.error(f"Image file does not exist: {image_path}")
+                return None
+            img = cv2.imread(str(image_path))
+            if img is None:
+                logger.error(f"Cannot read image: {image_path}")
+                return None
+
+        if img.ndim == 2:
+            return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        if img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        return img
+
+    def find_checkbox(
+        self, image: str | Path | bytes | np.ndarray, name: str | None = None
+    ) -> Tuple[int, int] | None:
         """
         Find checkbox in the image and return its center coordinates
 
-        :param image_path: Image file path
+        :param image: Image file path, encoded image bytes or a BGR NumPy array
+        :param name: Name used for debug images, defaults to the file stem or a timestamp
         :return: If checkbox is found, return its center coordinates (x, y); otherwise return None
         """
-        # Read image
-        if isinstance(image_path, str):
-            image_path = Path(image_path)
-        if not image_path.exists():
-            logger.error(f"Image file does not exist: {image_path}")
-            return None
-        
-        img = cv2.imread(str(image_path))
+        img = self._load_image(image)
         if img is None:
-            logger.error(f"Cannot read image: {image_path}")
             return None
 
+        if name is None:
+            name = (
+                Path(image).stem
+                if isinstance(image, (str, Path))
+                else datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            )
+
         # Convert to grayscale
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         # Apply adaptive thresholding
@@ -57,7 +90,7 @@ class ImageProcessor:
             gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
             cv2.THRESH_BINARY_INV, 11, 2
         )
-        self._save_debug_image(binary, "binary", image_path)
+        self._save_debug_image(binary, "binary", name)
 
         # Find contours
         contours, _ = cv2.findContours(
@@ -76,7 +109,7 @@ class ImageProcessor:
         # Build image with outer contour
         inner_contour_img = img.copy()
         cv2.drawContours(inner_contour_img, [contour], -1, (0, 255, 0), 2)
-        self._save_debug_image(inner_contour_img, "contours", image_path)
+        self._save_debug_image(inner_contour_img, "contours", name)
 
         # Extract ROI
         roi = binary[y:y+h, x:x+w]
@@ -95,7 +128,7 @@ class ImageProcessor:
 
         inner_contour_img = roi_img.copy()
         cv2.drawContours(inner_contour_img, inner_contours, -1, (0, 255, 0), 2)
-        self._save_debug_image(inner_contour_img, "inner_contours", image_path)
+        self._save_debug_image(inner_contour_img, "inner_contours", name)
 
         inner_x, inner_y, inner_w, inner_h = cv2.boundingRect(inner_contour)
 
@@ -110,7 +143,7 @@ class ImageProcessor:
                             (x+inner_x+inner_w, y+inner_y+inner_h), 
                             (255, 0, 0), 2)
         cv2.circle(result_img, (center_x, center_y), 3, (0, 0, 255), -1)
-        self._save_debug_image(result_img, "result", image_path)
+        self._save_debug_image(result_img, "result", name)
 
         logger.debug(f"Found checkbox at: ({center_x}, {center_y})")
         return center_x, center_y
@@ -0,0 +1,146 @@
+import hashlib
+import io
+import time
+from pathlib import Path
+from typing import Dict
+
+import pikepdf
+from loguru import logger
+from pikepdf.models.image import PdfImage, UnsupportedImageTypeError
+from PIL import Image
+
+from app.config import settings
+from app.utils.process_pool import ProcessPool
+
+MIN_IMAGE_BYTES = 16 * 1024  # 小于此大小的图片不值得重新压缩
+
+
+def _recompress_image(stream: pikepdf.Stream, quality: int, max_size: int) -> bool:
+    """把图片重新编码为 JPEG（必要时缩小），结果更小时替换原图片，返回是否替换"""
+    raw = stream.read_raw_bytes()
+    if len(raw) < MIN_IMAGE_BYTES or stream.get("/ImageMask") or "/Decode" in stream:
+        return False
+    try:
+        image = PdfImage(stream).as_pil_image()
+    except (NotImplementedError, UnsupportedImageTypeError, pikepdf.PdfError, OSError):
+        return False
+    # 索引色、CMYK 等颜色空间转换后可能失真，保持原样
+    if image.mode not in ("RGB", "L"):
+        return False
+
+    if max(image.size) > max_size:
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality, optimize=True)
+    data = buffer.getvalue()
+    if len(data) >= len(raw):
+        return False
+
+    stream.write(data, filter=pikepdf.Name.DCTDecode)
+    stream.Width, stream.Height = image.size
+    stream.ColorSpace = pikepdf.Name.DeviceRGB if image.mode == "RGB" else pikepdf.Name.DeviceGray
+    stream.BitsPerComponent = 8
+    if "/DecodeParms" in stream:
+        del stream.DecodeParms
+    return True
+
+
+def optimize_pdf(
+    input_path: str | Path,
+    output_path: str | Path,
+    image_quality: int = settings.PDF_IMAGE_QUALITY,
+    max_image_size: int = settings.PDF_MAX_IMAGE_SIZE,
+) -> Dict:
+    """重新压缩 PDF 中的图片并去除无用对象，写入 output_path，原文件保持不变
+
+    Args:
+        input_path: 原 PDF 路径
+        output_path: 输出路径
+        image_quality: 图片 JPEG 质量 (1-95)
+        max_image_size: 图片最长边的像素数，超过时缩小
+
+    Returns:
+        Dict: 原大小、优化后大小、优化后文件的 SHA-256、压缩比例、重新压缩的图片数和耗费的 CPU 秒数
+    """
+    start_time = time.process_time()
+    input_path, output_path = Path(input_path), Path(output_path)
+
+    with pikepdf.open(input_path) as pdf:
+        images = 0
+        for obj in pdf.objects:
+            if isinstance(obj, pikepdf.Stream) and obj.get("/Subtype") == "/Image":
+                images += _recompress_image(obj, image_quality, max_image_size)
+        pdf.remove_unreferenced_resources()
+        pdf.save(
+            output_path,
+            compress_streams=True,
+            recompress_flate=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+        )
+
+    original_size = input_path.stat().st_size
+    optimized_size = output_path.stat().st_size
+    hasher = hashlib.sha256()
+    with open(output_path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            hasher.update(block)
+    return {
+        "input_path": str(input_path),
+        "output_path": str(output_path),
+        "original_size": original_size,
+        "optimized_size": optimized_size,
+        "optimized_hash": hasher.hexdigest(),
+        "compression_ratio": optimized_size / original_size,
+        "images_recompressed": images,
+        "cpu_seconds": time.process_time() - start_time,
+    }
+
+
+_executor: ProcessPool | None = None
+
+
+def get_pdf_executor() -> ProcessPool:
+    """获取进程共享的 PDF 优化进程池"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPool(max_workers=settings.PDF_OPTIMIZE_WORKERS)
+    return _executor
+
+
+def shutdown_pdf_executor():
+    """关闭 PDF 优化进程池"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def optimized_path(file_path: str | Path) -> Path:
+    """优化结果的路径，与原文件放在同一目录"""
+    file_path = Path(file_path)
+    return file_path.with_name(f"{file_path.stem}.min{file_path.suffix}")
+
+
+async def optimize_pdf_in_pool(file_path: str | Path) -> Dict | None:
+    """在进程池中优化 PDF，保留原文件
+
+    优化后缩小不足 PDF_OPTIMIZE_MIN_REDUCTION 时丢弃结果并返回 None。
+    """
+    output_path = optimized_path(file_path)
+    try:
+        result = await get_pdf_executor().run(optimize_pdf, str(file_path), str(output_path))
+    except Exception:
+        output_path.unlink(missing_ok=True)
+        raise
+
+    logger.info(
+        f"PDF 优化: {Path(file_path).name}, "
+        f"{result['original_size'] / 1024 / 1024:.2f} MB -> {result['optimized_size'] / 1024 / 1024:.2f} MB "
+        f"({result['compression_ratio']:.2%}), 重新压缩 {result['images_recompressed']} 张图片, "
+        f"CPU {result['cpu_seconds']:.2f} 秒"
+    )
+    if 1 - result["compression_ratio"] < settings.PDF_OPTIMIZE_MIN_REDUCTION:
+        logger.info(f"PDF 优化效果不明显，保留原文件: {Path(file_path).name}")
+        output_path.unlink(missing_ok=True)
+        return None
+    return result
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Callable
+
+from billiard.pool import Pool
+from loguru import logger
+
+
+class ProcessPool:
+    """可在 asyncio 中等待结果的 billiard 进程池
+
+    Celery prefork worker 是 daemon 进程，标准库 multiprocessing（包括 ProcessPoolExecutor）
+    不允许它创建子进程；billiard 没有这个限制，因此 worker 中的 CPU 密集任务使用它。
+    进程池在首次使用时创建。
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Pool | None = None
+
+    @property
+    def pool(self) -> Pool:
+        if self._pool is None:
+            self._pool = Pool(processes=self.max_workers)
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """在子进程中执行 func(*args) 并等待结果，子进程中的异常原样抛出"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(setter: Callable[[Any], None], value: Any):
+            if not future.done():
+                setter(value)
+
+        def notify(setter: Callable[[Any], None], value: Any):
+            # 回调在进程池的结果线程中执行
+            try:
+                loop.call_soon_threadsafe(resolve, setter, value)
+            except RuntimeError:
+                logger.warning("事件循环已关闭，丢弃进程池任务结果")
+
+        self.pool.apply_async(
+            func,
+            args,
+            callback=lambda result: notify(future.set_result, result),
+            error_callback=lambda exc: notify(future.set_exception, exc),
+        )
+        return await future
+
+    def shutdown(self):
+        """等待进行中的任务完成后关闭进程池"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
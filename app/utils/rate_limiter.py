@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlparse
+
+import redis
+from loguru import logger
+
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+# 预约令牌：令牌数可以为负，返回调用方需要等待的秒数，使并发请求按顺序排队。
+# 使用 Redis 服务器时间，避免各 worker 时钟不一致。
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - requested
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((burst + wait * rate) / rate) + 60)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """进程内令牌桶，Redis 不可用或单进程运行时使用"""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """预约令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(
+                self.burst, self.tokens + max(0.0, now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= tokens
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class RateLimiter:
+    """按域名限流的令牌桶
+
+    默认存放在 Redis 中，所有 worker 的爬虫和下载器共享同一个速率；
+    Redis 出错时退回进程内令牌桶。
+    """
+
+    def __init__(
+        self,
+        rate: float = 1 / settings.CRAWLER_DELAY,
+        burst: float = settings.CRAWLER_RATE_BURST,
+        backend: str = settings.RATE_LIMIT_BACKEND,
+        prefix: str = "book_sender:rate",
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.backend = backend
+        self.prefix = prefix
+        self._buckets: dict[str, TokenBucket] = {}
+        self._script = None
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        """URL 对应的限流键（域名）"""
+        return urlparse(url).hostname or url
+
+    def _reserve_local(self, key: str, tokens: float) -> float:
+        if (bucket := self._buckets.get(key)) is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket.reserve(tokens)
+
+    def reserve(self, key: str, tokens: float = 1) -> float:
+        """预约令牌，返回需要等待的秒数"""
+        if self.backend == "redis":
+            try:
+                if self._script is None:
+                    self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+                return float(
+                    self._script(
+                        keys=[f"{self.prefix}:{key}"], args=[self.rate, self.burst, tokens]
+                    )
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Redis rate limit failed, fallback to memory: {e}")
+        return self._reserve_local(key, tokens)
+
+    async def acquire(self, url: str, tokens: float = 1) -> float:
+        """等待到允许请求 url 为止，返回等待的秒数"""
+        return await self.wait(self.key_for(url), tokens)
+
+    async def wait(self, key: str, tokens: float = 1) -> float:
+        """从 key 对应的令牌桶取出 tokens 个令牌，不足时等待，返回等待的秒数"""
+        wait = self.reserve(key, tokens)
+        if wait > 0:
+            logger.debug(f"Rate limit {key}: wait {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+
+_rate_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程共享的限流器"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -0,0 +1,40 @@
+import redis
+import redis.asyncio
+from loguru import logger
+
+from app.config import settings
+
+_redis_client: redis.Redis | None = None
+
+
+def get_redis() -> redis.Redis:
+    """获取进程共享的 Redis 客户端（与 Celery broker 使用同一实例）"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+        )
+    return _redis_client
+
+
+def create_async_redis() -> redis.asyncio.Redis:
+    """创建异步 Redis 客户端，用于在事件循环中订阅 pub/sub，用完需要关闭"""
+    return redis.asyncio.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        socket_connect_timeout=5,
+    )
+
+
+def redis_available() -> bool:
+    """检查 Redis 是否可用"""
+    try:
+        return bool(get_redis().ping())
+    except redis.RedisError as e:
+        logger.warning(f"Redis 不可用: {e}")
+        return False
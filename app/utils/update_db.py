@@ -13,23 +13,40 @@ db_params = {
     "user": settings.POSTGRES_USER,
 }
 
+# SQL statements, executed in order, each in its own transaction.
+# A statement that fails (e.g. already applied) is reported and skipped.
+alter_queries = [
+    # Rename the category column in the books table to series.
+    "ALTER TABLE books RENAME COLUMN category TO series;",
+    # SHA-256 of the downloaded file, used to find duplicate content.
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);",
+    "CREATE INDEX IF NOT EXISTS ix_books_content_hash ON books (content_hash);",
+    # Time the local copy was evicted; the book is then served from object storage.
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS evicted_at TIMESTAMP;",
+    # Smaller copy of the PDF produced by the optimisation stage.
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS optimized_path VARCHAR(500);",
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS optimized_size INTEGER;",
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS optimized_hash VARCHAR(64);",
+    # Last failed batch download; failing books are claimed after the others.
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS download_attempted_at TIMESTAMP;",
+]
+
 try:
     # Build the connection
     conn = psycopg2.connect(**db_params)
     # Create a cursor object
     cursor = conn.cursor()
 
-    # SQL statement: rename column
-    # This operation renames the category column in the books table to series.
-    # Prerequisites: The books table must exist, and the category column must also exist, otherwise an error will be reported.
-    alter_query = "ALTER TABLE books RENAME COLUMN category TO series;"
-
-    # Execute SQL statement
-    cursor.execute(alter_query)
-
-    # Commit changes
-    conn.commit()
-    print("Column name changed successfully: category -> series")
+    for alter_query in alter_queries:
+        try:
+            # Execute SQL statement
+            cursor.execute(alter_query)
+            # Commit changes
+            conn.commit()
+            print(f"Executed successfully: {alter_query}")
+        except Error as error:
+            conn.rollback()
+            print(f"Skipped: {alter_query} ({error})")
 
 except (Exception, Error) as error:
     print("Database operation error:", error)
@@ -0,0 +1,74 @@
+"""压缩服务基准测试
+
+对一组文件分别用每种压缩配置压缩，报告压缩速度（MB/s）和压缩比例，
+结果可用于校准 app.utils.compressor.PROFILES 中的预估速度。
+各配置在进程池中运行，--workers 1 时测得的是单核速度。
+
+用法::
+
+    python -m benchmarks.compression_benchmark
+    python -m benchmarks.compression_benchmark --files downloads/*.pdf --profiles lzma2-9 zstd-9 zip-6
+    python -m benchmarks.compression_benchmark --bundle --workers 4
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+def _compress(files: list[str], output_dir: str, profile_name: str) -> dict:
+    from app.utils.compressor import compress_files, get_profile
+
+    profile = get_profile(profile_name)
+    output_path = Path(output_dir) / f"{profile.name}-{Path(files[0]).stem}{profile.suffix}"
+    result = compress_files(files, output_path, profile.codec, profile.level)
+    output_path.unlink()
+    return {**result, "profile": profile.name}
+
+
+def main():
+    from app.config import settings
+    from app.utils.compressor import MB, PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="+", help="待压缩文件，默认使用下载目录中的 PDF")
+    parser.add_argument("--profiles", nargs="+", default=[p.name for p in PROFILES])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--bundle", action="store_true", help="把所有文件压缩为一个压缩包")
+    args = parser.parse_args()
+
+    files = args.files or [str(path) for path in sorted(settings.DOWNLOAD_DIR.glob("*.pdf"))]
+    if not files:
+        print(f"没有找到文件，请用 --files 指定或放入 {settings.DOWNLOAD_DIR}")
+        return
+
+    jobs = [files] if args.bundle else [[file] for file in files]
+    print(f"{len(files)} 个文件, {len(jobs)} 个压缩包, {args.workers} 个进程\n")
+    with tempfile.TemporaryDirectory() as output_dir, ProcessPoolExecutor(args.workers) as executor:
+        start_time = time.perf_counter()
+        futures = [
+            executor.submit(_compress, job, output_dir, profile)
+            for profile in args.profiles
+            for job in jobs
+        ]
+        results = [future.result() for future in futures]
+        wall_time = time.perf_counter() - start_time
+
+    print(f"{'配置':<10} | {'原大小(MB)':>10} | {'压缩后(MB)':>10} | {'比例':>7} | {'速度(MB/s)':>10}")
+    print("-" * 60)
+    for profile in args.profiles:
+        group = [r for r in results if r["profile"] == profile]
+        original = sum(r["original_size"] for r in group)
+        compressed = sum(r["compressed_size"] for r in group)
+        seconds = sum(r["time_taken_seconds"] for r in group)
+        print(
+            f"{profile:<10} | {original / MB:>10.2f} | {compressed / MB:>10.2f} | "
+            f"{compressed / original:>7.2%} | {original / MB / seconds:>10.2f}"
+        )
+    print(f"\n总耗时 {wall_time:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
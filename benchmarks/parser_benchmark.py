@@ -0,0 +1,119 @@
+"""HTML 解析后端基准测试
+
+对保存的 HTML 页面分别用各解析后端解析并提取数据，比较耗时和峰值内存。
+每个后端在独立进程中运行，避免内存统计相互影响。
+
+用法::
+
+    python -m benchmarks.parser_benchmark
+    python -m benchmarks.parser_benchmark --rounds 50 --parsers lxml selectolax
+    python -m benchmarks.parser_benchmark --fixtures /path/to/saved/pages
+"""
+
+import argparse
+import multiprocessing
+import resource
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).parent.parent / "tests" / "fixtures" / "html"
+PARSER_TYPES = ["html.parser", "lxml", "selectolax"]
+
+
+def _page_targets(name: str, crawler):
+    """根据文件名选择页面类型对应的部分解析目标和提取函数"""
+    from app.crawler.economist_crawler import (
+        BOOK_DETAIL_TARGETS,
+        BOOK_LIST_TARGETS,
+        DOWNLOAD_PAGE_TARGETS,
+    )
+
+    if "list" in name:
+        return BOOK_LIST_TARGETS, crawler.parse_books
+    if "detail" in name:
+        return BOOK_DETAIL_TARGETS, crawler.parse_download_page_link
+    return DOWNLOAD_PAGE_TARGETS, crawler.parse_download_link
+
+
+def _run_backend(parser_type: str, partial: bool, files: list[str], rounds: int, queue):
+    from loguru import logger
+
+    from app.crawler.economist_crawler import EconomistCrawler
+    from app.crawler.html_parser import create_html_parser
+
+    logger.remove()
+    crawler = EconomistCrawler(use_pool=False)
+    parser = create_html_parser(parser_type)
+    pages = [(Path(file).name, Path(file).read_text()) for file in files]
+    targets = {name: _page_targets(name, crawler) for name, _ in pages}
+
+    # 预热一轮，排除导入和首次分配的开销
+    for name, html in pages:
+        parse_only, extract = targets[name]
+        extract(parser.parse(html, parse_only if partial else None))
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    durations = []
+    for _ in range(rounds):
+        for name, html in pages:
+            parse_only, extract = targets[name]
+            start_time = time.perf_counter()
+            extract(parser.parse(html, parse_only if partial else None))
+            durations.append(time.perf_counter() - start_time)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    queue.put(
+        {
+            "parser": parser_type + (" (partial)" if partial else ""),
+            "mean_ms": statistics.mean(durations) * 1000,
+            "p95_ms": sorted(durations)[int(len(durations) * 0.95) - 1] * 1000,
+            "py_peak_mb": peak / 1024 / 1024,
+            "rss_growth_mb": (rss_after - rss_before) / 1024,
+        }
+    )
+
+
+def run_benchmark(parsers: list[str], files: list[Path], rounds: int) -> list[dict]:
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for parser_type in parsers:
+        # selectolax 不支持部分解析，只测完整解析
+        for partial in ([False, True] if parser_type != "selectolax" else [False]):
+            queue = ctx.Queue()
+            process = ctx.Process(
+                target=_run_backend,
+                args=(parser_type, partial, [str(f) for f in files], rounds, queue),
+            )
+            process.start()
+            results.append(queue.get())
+            process.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 解析后端基准测试")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURE_DIR, help="HTML 页面目录")
+    parser.add_argument("--rounds", type=int, default=20, help="每个页面解析次数")
+    parser.add_argument("--parsers", nargs="+", default=PARSER_TYPES, help="要比较的解析后端")
+    args = parser.parse_args()
+
+    files = sorted(args.fixtures.glob("*.html"))
+    if not files:
+        raise SystemExit(f"No html files in {args.fixtures}")
+
+    print(f"{len(files)} pages, {args.rounds} rounds")
+    print(f"{'parser':<24}{'mean ms':>10}{'p95 ms':>10}{'py peak MB':>12}{'rss +MB':>10}")
+    for result in run_benchmark(args.parsers, files, args.rounds):
+        print(
+            f"{result['parser']:<24}{result['mean_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['py_peak_mb']:>12.2f}{result['rss_growth_mb']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""PDF 优化基准测试
+
+用进程池优化一组 PDF，报告每个文件和每种图片质量的压缩比例与 CPU 耗时，
+以及优化后可以直接作为附件发送（不超过 10MB）的文件数。原文件不会被修改。
+
+用法::
+
+    python -m benchmarks.pdf_optimizer_benchmark
+    python -m benchmarks.pdf_optimizer_benchmark --files downloads/*.pdf --quality 40 60 80
+    python -m benchmarks.pdf_optimizer_benchmark --workers 4 --max-image-size 1600
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+MAX_ATTACHMENT_SIZE = 10 * 1024 * 1024
+
+
+def _optimize(file: str, output_dir: str, quality: int, max_image_size: int) -> dict:
+    from loguru import logger
+
+    from app.utils.pdf_optimizer import optimize_pdf
+
+    logger.remove()
+    output_path = Path(output_dir) / f"{quality}-{Path(file).name}"
+    result = optimize_pdf(file, output_path, quality, max_image_size)
+    output_path.unlink()
+    return {**result, "quality": quality}
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="+", help="PDF 文件，默认使用下载目录中的 PDF")
+    parser.add_argument("--quality", nargs="+", type=int, default=[settings.PDF_IMAGE_QUALITY])
+    parser.add_argument("--max-image-size", type=int, default=settings.PDF_MAX_IMAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=settings.PDF_OPTIMIZE_WORKERS)
+    args = parser.parse_args()
+
+    files = args.files or [
+        str(path)
+        for path in sorted(settings.DOWNLOAD_DIR.glob("*.pdf"))
+        if not path.name.endswith(".min.pdf")
+    ]
+    if not files:
+        print(f"没有找到 PDF 文件，请用 --files 指定或放入 {settings.DOWNLOAD_DIR}")
+        return
+
+    print(f"{len(files)} 个文件, 图片质量 {args.quality}, 最长边 {args.max_image_size}px, {args.workers} 个进程\n")
+    with tempfile.TemporaryDirectory() as output_dir, ProcessPoolExecutor(args.workers) as executor:
+        start_time = time.perf_counter()
+        futures = [
+            executor.submit(_optimize, file, output_dir, quality, args.max_image_size)
+            for quality in args.quality
+            for file in files
+        ]
+        results = [future.result() for future in futures]
+        wall_time = time.perf_counter() - start_time
+
+    print(f"{'质量':>4} | {'原大小(MB)':>10} | {'优化后(MB)':>10} | {'比例':>7} | {'图片':>4} | {'CPU(秒)':>7} | 文件")
+    print("-" * 80)
+    for r in results:
+        print(
+            f"{r['quality']:>4} | {r['original_size'] / 1024 / 1024:>10.2f} | "
+            f"{r['optimized_size'] / 1024 / 1024:>10.2f} | {r['compression_ratio']:>7.2%} | "
+            f"{r['images_recompressed']:>4} | {r['cpu_seconds']:>7.2f} | {Path(r['input_path']).name}"
+        )
+
+    print("\n汇总:")
+    for quality in args.quality:
+        group = [r for r in results if r["quality"] == quality]
+        original = sum(r["original_size"] for r in group)
+        optimized = sum(r["optimized_size"] for r in group)
+        attachable = sum(r["optimized_size"] <= MAX_ATTACHMENT_SIZE for r in group)
+        attachable_before = sum(r["original_size"] <= MAX_ATTACHMENT_SIZE for r in group)
+        print(
+            f"  质量 {quality}: 总比例 {optimized / original:.2%}, "
+            f"CPU {sum(r['cpu_seconds'] for r in group):.2f} 秒, "
+            f"可作为附件 {attachable_before} -> {attachable}/{len(group)}"
+        )
+    print(f"  总耗时 {wall_time:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
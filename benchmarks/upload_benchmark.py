@@ -0,0 +1,110 @@
+"""上传基准测试
+
+用不同的分片配置（分片阈值、分片大小、单文件并发数）和文件并发数上传一组文件，
+报告每种配置的上传速度（MB/s），结果可用于调整 UPLOAD_* 配置。
+默认使用 moto 在进程内模拟的 S3（需要安装 moto），没有网络延迟，结果主要反映客户端开销；
+比较并发的效果时用 --endpoint-url 指向本地的 MinIO 或 moto_server。
+
+用法::
+
+    python -m benchmarks.upload_benchmark
+    python -m benchmarks.upload_benchmark --files downloads/*.pdf --repeat 3
+    python -m benchmarks.upload_benchmark --endpoint-url http://localhost:9000 --bucket bench
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+MB = 1024 * 1024
+
+# (名称, 分片阈值, 分片大小, 单文件并发数, 文件并发数)
+PROFILES = [
+    ("single", 1024 * MB, 8 * MB, 1, 1),
+    ("boto3-default", 8 * MB, 8 * MB, 10, 1),
+    ("default", 16 * MB, 8 * MB, 4, 2),
+    ("small-parts", 8 * MB, 5 * MB, 8, 2),
+    ("large-parts", 16 * MB, 32 * MB, 4, 2),
+    ("many-files", 16 * MB, 8 * MB, 2, 8),
+]
+
+
+def _make_files(directory: str, count: int, size: int) -> list[str]:
+    files = []
+    for i in range(count):
+        path = Path(directory) / f"sample-{i}.pdf"
+        path.write_bytes(os.urandom(size))
+        files.append(str(path))
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="+", help="待上传文件，默认生成随机文件")
+    parser.add_argument("--count", type=int, default=6, help="生成的文件数")
+    parser.add_argument("--size", type=int, default=24, help="生成的文件大小（MB）")
+    parser.add_argument("--profiles", nargs="+", default=[p[0] for p in PROFILES])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--endpoint-url", help="S3 兼容服务地址，默认使用 moto 模拟")
+    parser.add_argument("--bucket", default="book-sender-benchmark")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+    from loguru import logger
+
+    from app.uploader import s3 as s3_uploader
+
+    logger.remove()
+    settings = s3_uploader.settings
+    settings.AWS_REGION = "eu-west-1"
+    settings.AWS_S3_BUCKET = args.bucket
+    settings.AWS_S3_ENDPOINT_URL = args.endpoint_url
+    settings.AWS_ACCESS_KEY_ID = os.environ["AWS_ACCESS_KEY_ID"]
+    settings.AWS_SECRET_ACCESS_KEY = os.environ["AWS_SECRET_ACCESS_KEY"]
+
+    if args.endpoint_url:
+        mock = contextlib.nullcontext()
+    else:
+        import moto
+
+        mock = moto.mock_aws()
+
+    with tempfile.TemporaryDirectory() as directory, mock:
+        files = args.files or _make_files(directory, args.count, args.size * MB)
+        total = sum(os.path.getsize(file) for file in files)
+        print(f"{len(files)} 个文件, 共 {total / MB:.2f} MB, 目标 {args.endpoint_url or 'moto'}\n")
+
+        print(f"{'配置':<14} | {'阈值(MB)':>8} | {'分片(MB)':>8} | {'分片并发':>8} | {'文件并发':>8} | {'速度(MB/s)':>10}")
+        print("-" * 76)
+        for name, threshold, chunksize, concurrency, files_concurrency in PROFILES:
+            if name not in args.profiles:
+                continue
+            settings.UPLOAD_FILES_CONCURRENCY = files_concurrency
+            settings.UPLOAD_MAX_CONCURRENCY = concurrency
+            uploader = s3_uploader.S3Uploader()
+            uploader.transfer_config = s3_uploader.transfer_config(threshold, chunksize, concurrency)
+
+            rates = []
+            for i in range(args.repeat):
+                keys = [f"benchmark/{name}/{i}/{Path(file).name}" for file in files]
+                start_time = time.perf_counter()
+                results = uploader.upload_files(files, keys)
+                elapsed = time.perf_counter() - start_time
+                if len(results) != len(files):
+                    raise RuntimeError(f"{name}: {len(files) - len(results)} 个文件上传失败")
+                rates.append(total / MB / elapsed)
+                uploader.delete_files(keys)
+
+            print(
+                f"{name:<14} | {threshold / MB:>8.0f} | {chunksize / MB:>8.0f} | "
+                f"{concurrency:>8} | {files_concurrency:>8} | {max(rates):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
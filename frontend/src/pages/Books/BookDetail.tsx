@@ -14,6 +14,7 @@ import {
     List,
     Modal,
     Input,
+    Progress,
 } from 'antd';
 import {
     DownloadOutlined,
@@ -23,10 +24,11 @@ import {
 import { useAppDispatch, useAppSelector, RootState } from '@/store';
 import { fetchBookById, setCurrentBookAction, fetchSeriesBooks, distributeBookAction } from '@/store/slices/bookSlice';
 import { addUserSubscription, deleteUserSubscription } from '@/store/slices/userSlice';
+import { progressReceived } from '@/store/slices/downloadSlice';
 import { fetchCurrentUser } from '@/store/slices/authSlice';
 import type { Book, UserSubscriptionParams, DistributeBookParams } from '@/types';
 import { renderSeries } from '@/utils';
-import { utilService } from '@/services/api';
+import { downloadService, utilService } from '@/services/api';
 import BookCard from '@/components/base/BookCard';
 const { Title, Text, Paragraph } = Typography;
 
@@ -37,7 +39,8 @@ const BookDetailPage = () => {
 
     const { currentBook: book, loading: bookLoading, error: bookError } = useAppSelector((state: RootState) => state.book);
     const { user: currentUser, loading: authLoading } = useAppSelector((state: RootState) => state.auth);
-    const { error: downloadError } = useAppSelector((state: RootState) => state.download);
+    const { error: downloadError, progress: downloadProgress } = useAppSelector((state: RootState) => state.download);
+    const bookProgress = book ? downloadProgress[book.id] : undefined;
     const { loading: userUpdateLoading, error: userUpdateError } = useAppSelector((state: RootState) => state.user);
     const { loading: bookActionLoading, error: bookActionError } = useAppSelector((state: RootState) => state.book);
     const [seriesBooks, setSeriesBooks] = useState<Book[]>([]);
@@ -52,6 +55,17 @@ const BookDetailPage = () => {
         };
     }, [id, dispatch]);
 
+    // Live download progress over SSE; refresh the book once its download finishes
+    useEffect(() => {
+        if (!id) return;
+        return downloadService.subscribeProgress((event) => {
+            dispatch(progressReceived(event));
+            if (event.status === 'completed' && event.book_id === Number(id)) {
+                dispatch(fetchBookById({ id: Number(id) }));
+            }
+        });
+    }, [id, dispatch]);
+
     useEffect(() => {
         if (book && book.series) {
             setSeriesLoading(true);
@@ -235,6 +249,13 @@ const BookDetailPage = () => {
                         }}
                     />
                     <Space direction="vertical" className="w-full mt-6">
+                        {bookProgress && (bookProgress.status === 'started' || bookProgress.status === 'progress') && (
+                            <Progress
+                                percent={bookProgress.total ? Math.floor((bookProgress.bytes_done / bookProgress.total) * 100) : 0}
+                                status="active"
+                                format={() => `${(bookProgress.rate / 1024 / 1024).toFixed(2)} MB/s`}
+                            />
+                        )}
                         <Button
                             type="primary"
                             icon={<DownloadOutlined />}
@@ -1,6 +1,7 @@
 import apiClient from './client';
 import type {
     BookQueryParams,
+    DownloadProgressEvent,
     ServiceResponseMessageOrError,
 } from '@/types';
 
@@ -12,4 +13,16 @@ export const downloadService = {
     async downloadBook(params: Partial<BookQueryParams>): Promise<ServiceResponseMessageOrError> {
         return apiClient.post('/download/book', null, { params });
     },
+
+    // Subscribe to live download progress (SSE); returns a function that closes the stream
+    subscribeProgress(onEvent: (event: DownloadProgressEvent) => void): () => void {
+        const source = new EventSource(`${import.meta.env.VITE_API_BASE_URL}/download/progress`, {
+            withCredentials: true,
+        });
+        const handler = (message: MessageEvent) => onEvent(JSON.parse(message.data));
+        for (const status of ['started', 'progress', 'completed', 'failed']) {
+            source.addEventListener(status, handler);
+        }
+        return () => source.close();
+    },
 }; 
\ No newline at end of file
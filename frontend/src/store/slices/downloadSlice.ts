@@ -1,6 +1,6 @@
 import { createSlice, createAsyncThunk, PayloadAction } from '@reduxjs/toolkit';
 import { downloadService } from '@/services/api';
-import type { ApiError, ServiceResponseMessageOrError } from '@/types';
+import type { ApiError, DownloadProgressEvent, ServiceResponseMessageOrError } from '@/types';
 
 interface DownloadBookParams {
     id: number;
@@ -12,6 +12,9 @@ interface DownloadState {
         [bookId: string]: boolean; // Track loading per book ID
     };
     error: string | null;
+    progress: {
+        [bookId: string]: DownloadProgressEvent; // Latest progress event per book ID (from SSE)
+    };
     // Store messages or status per download if needed
     // downloadStatus: { [bookId: string]: ServiceResponseMessageOrError } 
 }
@@ -19,6 +22,7 @@ interface DownloadState {
 const initialState: DownloadState = {
     loading: {},
     error: null,
+    progress: {},
     // downloadStatus: {}
 };
 
@@ -51,6 +55,12 @@ const downloadSlice = createSlice({
         clearDownloadError: (state) => {
             state.error = null;
         },
+        progressReceived: (state, action: PayloadAction<DownloadProgressEvent>) => {
+            const event = action.payload;
+            if (event.book_id !== null) {
+                state.progress[event.book_id] = event;
+            }
+        },
     },
     extraReducers: (builder) => {
         builder
@@ -73,5 +83,5 @@ const downloadSlice = createSlice({
     },
 });
 
-export const { clearDownloadError } = downloadSlice.actions;
+export const { clearDownloadError, progressReceived } = downloadSlice.actions;
 export default downloadSlice.reducer; 
\ No newline at end of file
@@ -225,4 +225,16 @@ export interface RegisterParams {
     email: string;
     password: string;
     username?: string;
-} 
\ No newline at end of file
+} 
+export interface DownloadProgressEvent {
+    status: 'started' | 'progress' | 'completed' | 'failed';
+    book_id: number | null;
+    file_name: string;
+    download_link: string;
+    bytes_done: number;
+    total: number;
+    rate: number;
+    eta: number | null;
+    timestamp: number;
+    error?: string;
+}
@@ -0,0 +1,58 @@
+"""不依赖 PostgreSQL 的共用 fixture，在测试模块中导入使用
+
+    from tests.helpers import db, uploader  # noqa: F401
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import BaseModel
+from app.downloader import storage
+from app.task import tasks
+from app.uploader import registry as upload_registry
+from app.uploader import s3 as s3_uploader
+from app.uploader.url_cache import PresignedUrlCache
+
+# 自行打开数据库会话的模块，测试时改用内存 SQLite
+DB_MODULES = (storage, upload_registry, tasks)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """内存 SQLite 会话，同时替换 DB_MODULES 使用的数据库"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    @contextmanager
+    def get_db():
+        yield session
+        session.commit()
+
+    for module in DB_MODULES:
+        monkeypatch.setattr(module, "get_denpend_db", get_db)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def uploader(monkeypatch):
+    """在 moto 模拟的 S3 中创建使用进程内URL缓存的上传器"""
+    moto = pytest.importorskip("moto")
+    monkeypatch.setattr(s3_uploader.settings, "AWS_REGION", "eu-west-1")
+    monkeypatch.setattr(s3_uploader.settings, "AWS_S3_BUCKET", "book-sender-test")
+    monkeypatch.setattr(s3_uploader.settings, "AWS_S3_ENDPOINT_URL", None)
+    monkeypatch.setattr(s3_uploader.settings, "AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setattr(s3_uploader.settings, "AWS_SECRET_ACCESS_KEY", "testing")
+    with moto.mock_aws():
+        uploader = s3_uploader.S3Uploader()
+        uploader.url_cache = PresignedUrlCache(backend="memory")
+        yield uploader
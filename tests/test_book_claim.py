@@ -0,0 +1,45 @@
+from app.database import Book
+from tests.helpers import db  # noqa: F401
+
+
+def test_claim_pending_books(db):
+    """测试只领取有下载链接且未下载的书籍，并按 limit 限制数量"""
+    Book.create(db, title="The Economist 1", download_link="https://example.com/1.pdf")
+    Book.create(db, title="The Economist 2", download_link="")
+    Book.create(
+        db,
+        title="The Economist 3",
+        download_link="https://example.com/3.pdf",
+        file_path="/downloads/3.pdf",
+        file_size=100,
+    )
+    Book.create(db, title="The Economist 4", download_link="https://example.com/4.pdf")
+    Book.create(db, title="The Economist 5", download_link="https://example.com/5.pdf")
+
+    books = Book.claim_pending(db, limit=2)
+    assert [book.title for book in books] == ["The Economist 1", "The Economist 4"]
+
+    books[0].downloaded("/downloads/1.pdf", 100, "pdf", commit=False)
+    db.commit()
+    assert [book.title for book in Book.claim_pending(db, limit=5)] == [
+        "The Economist 4",
+        "The Economist 5",
+    ]
+
+
+def test_failed_books_do_not_starve_others(db):
+    """测试下载失败的书籍排到后面，不会一直占住批次"""
+    for i in range(1, 5):
+        Book.create(db, title=f"The Economist {i}", download_link=f"https://example.com/{i}.pdf")
+    Book.create(db, title="The Economist 5", download_link="")
+    assert Book.count_pending(db) == 4
+
+    for book in Book.claim_pending(db, limit=2):
+        book.download_failed(commit=False)
+    db.commit()
+
+    assert [book.title for book in Book.claim_pending(db, limit=2)] == [
+        "The Economist 3",
+        "The Economist 4",
+    ]
+    assert Book.count_pending(db) == 4
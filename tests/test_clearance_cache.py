@@ -0,0 +1,41 @@
+import time
+
+from app.crawler.clearance_cache import ClearanceCache
+
+DOMAIN = "magazinelib.com"
+
+
+def _storage_state(expires: float) -> dict:
+    return {
+        "cookies": [
+            {"name": "cf_clearance", "value": "token", "domain": ".magazinelib.com",
+             "path": "/", "expires": expires},
+            {"name": "_ga", "value": "x", "domain": ".google.com", "path": "/", "expires": -1},
+        ],
+        "origins": [],
+    }
+
+
+def test_save_and_load_file(tmp_path):
+    """测试验证结果写入文件并读取"""
+    cache = ClearanceCache(backend="file", cache_dir=tmp_path, default_ttl=600)
+    assert cache.save(DOMAIN, _storage_state(time.time() + 300))
+
+    storage_state = cache.load(DOMAIN)
+    assert storage_state is not None
+    # 只保留该域名的 cookie
+    assert [c["name"] for c in storage_state["cookies"]] == ["cf_clearance"]
+
+
+def test_expired_clearance(tmp_path):
+    """测试过期的验证结果不会被读取"""
+    cache = ClearanceCache(backend="file", cache_dir=tmp_path, default_ttl=600)
+    assert not cache.save(DOMAIN, _storage_state(time.time() - 10))
+    assert cache.load(DOMAIN) is None
+
+
+def test_without_clearance_cookie(tmp_path):
+    """测试没有 cf_clearance cookie 时不缓存"""
+    cache = ClearanceCache(backend="file", cache_dir=tmp_path, default_ttl=600)
+    assert not cache.save(DOMAIN, {"cookies": [], "origins": []})
+    assert cache.load(DOMAIN) is None
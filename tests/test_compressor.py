@@ -0,0 +1,88 @@
+import asyncio
+import tarfile
+import zipfile
+
+import billiard.pool
+import py7zr
+import pytest
+import zstandard
+
+from app.utils.compressor import MB, CompressionService, choose_profile, compress_files
+
+CONTENT = b"The Economist " * 50_000
+
+
+def test_choose_profile_by_time_budget():
+    """测试按时间预算选择压缩方式：预算充足时选压缩率最高的，不足时选更快的"""
+    assert choose_profile(10 * MB, 60).name == "lzma2-9"
+    assert choose_profile(100 * MB, 10).name == "zstd-9"
+    assert choose_profile(100 * MB, 10, codecs=("lzma2", "zip")).name == "zip-6"
+    assert choose_profile(10_000 * MB, 1).name == "zstd-3"
+
+
+@pytest.mark.parametrize("codec", ["lzma2", "zstd", "zip"])
+def test_compress_files(tmp_path, codec):
+    """测试各压缩方式生成的压缩包可以解压出原文件"""
+    files = []
+    for name in ("a.pdf", "b.pdf"):
+        (path := tmp_path / name).write_bytes(CONTENT)
+        files.append(path)
+    output_path = tmp_path / "books.archive"
+
+    result = compress_files(files, output_path, codec, 3)
+    assert result["original_size"] == 2 * len(CONTENT)
+    assert result["compression_ratio"] < 0.1
+
+    if codec == "lzma2":
+        with py7zr.SevenZipFile(output_path) as archive:
+            assert sorted(archive.getnames()) == ["a.pdf", "b.pdf"]
+    elif codec == "zstd":
+        with open(output_path, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            with tarfile.open(fileobj=reader, mode="r|") as archive:
+                assert [member.name for member in archive] == ["a.pdf", "b.pdf"]
+    else:
+        with zipfile.ZipFile(output_path) as archive:
+            assert archive.read("b.pdf") == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_compress_many_in_process_pool(tmp_path):
+    """测试在进程池中同时压缩多个压缩包，失败的任务返回异常"""
+    (path := tmp_path / "a.pdf").write_bytes(CONTENT)
+    service = CompressionService(max_workers=2, time_budget=60)
+    try:
+        results = await service.compress_many(
+            [([path], tmp_path / "one"), ([path, path], tmp_path / "two"), ([tmp_path / "missing.pdf"], tmp_path / "bad")],
+            codecs=("zip",),
+        )
+    finally:
+        service.shutdown()
+
+    assert results[0]["output_path"].endswith("one.zip")
+    assert results[1]["original_size"] == 2 * len(CONTENT)
+    assert isinstance(results[2], FileNotFoundError)
+    assert not (tmp_path / "bad.zip").exists()
+
+
+def compress_in_worker(input_paths, output_path):
+    """在进程池子进程中调用压缩服务，与 Celery prefork worker 中的调用方式相同"""
+    service = CompressionService(max_workers=1, time_budget=60)
+    try:
+        return asyncio.run(service.compress(input_paths, output_path, codecs=("zip",)))
+    finally:
+        service.shutdown()
+
+
+def test_compress_in_celery_worker(tmp_path):
+    """测试在 Celery prefork worker（billiard 的 daemon 进程）中可以使用压缩服务的进程池"""
+    (path := tmp_path / "a.pdf").write_bytes(CONTENT)
+
+    pool = billiard.pool.Pool(1)
+    try:
+        result = pool.apply_async(compress_in_worker, ([str(path)], str(tmp_path / "books"))).get(timeout=60)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    with zipfile.ZipFile(result["output_path"]) as archive:
+        assert archive.read("a.pdf") == CONTENT
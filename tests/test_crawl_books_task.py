@@ -0,0 +1,83 @@
+import pytest
+
+from app.database import Book, BookSeries
+from app.task import tasks
+from tests.helpers import db  # noqa: F401
+
+
+class StubCrawler:
+    """按页返回固定书籍列表的爬虫，记录请求过的页码"""
+
+    def __init__(self, pages: dict[int, list[dict]]):
+        self.pages = pages
+        self.requested = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def get_books(self, page: int) -> list[dict]:
+        self.requested.append(page)
+        return [dict(book_dict) for book_dict in self.pages.get(page, [])]
+
+
+def book(title: str) -> dict:
+    return {"title": title, "date": "2025-05-17", "detail_link": f"https://example.com/{title}"}
+
+
+@pytest.fixture
+def enqueued(monkeypatch) -> dict[str, list]:
+    """记录创建的详情爬取任务，不发送到 Celery"""
+    enqueued = {"books": [], "series": []}
+    monkeypatch.setattr(
+        tasks.crawl_book_task, "delay", lambda series, book_dict: enqueued["books"].append(book_dict["title"])
+    )
+    monkeypatch.setattr(
+        tasks.crawl_series_books_task, "delay", lambda series: enqueued["series"].append(series)
+    )
+    return enqueued
+
+
+def use_crawler(monkeypatch, pages: dict[int, list[dict]]) -> StubCrawler:
+    crawler = StubCrawler(pages)
+    monkeypatch.setattr(tasks, "create_crawler", lambda series: crawler)
+    return crawler
+
+
+def test_incremental_crawl_stops_at_known_page(db, enqueued, monkeypatch):
+    """测试增量爬取在整页书籍都已入库时停止，只为新书或缺少下载链接的书籍创建详情任务"""
+    Book.create(db, **book("Foreign Affairs 2025-04"))
+    for title in ("The Economist UK 2025-05-10", "The Economist USA 2025-05-03", "Wired 2025-05"):
+        Book.create(db, **book(title), download_link=f"https://files.example.com/{title}.pdf")
+    crawler = use_crawler(
+        monkeypatch,
+        {
+            1: [book("The Economist USA 2025-05-17"), book("Foreign Affairs 2025-05"), book("Foreign Affairs 2025-04")],
+            2: [book("The Economist UK 2025-05-10"), book("The Economist Asia 2025-05-10")],
+            3: [book("The Economist USA 2025-05-03"), book("Wired 2025-05")],
+            4: [book("The Economist USA 2025-04-26")],
+        },
+    )
+
+    tasks.crawl_books_task.run("economist", incremental=True, max_pages=10)
+
+    assert crawler.requested == [1, 2, 3]
+    assert sorted(enqueued["books"]) == ["Foreign Affairs 2025-04", "Foreign Affairs 2025-05"]
+    assert sorted(enqueued["series"]) == [BookSeries.ECONOMIST_ASIA, BookSeries.ECONOMIST_USA]
+    assert Book.query_first(db, title="The Economist Asia 2025-05-10") is not None
+    assert Book.query_first(db, title="The Economist USA 2025-04-26") is None
+    assert len(Book.query(db, title="Foreign Affairs 2025-04")) == 1
+
+
+def test_incremental_crawl_honours_max_pages(db, enqueued, monkeypatch):
+    """测试增量爬取最多爬取 max_pages 页，非增量时只爬取指定页"""
+    crawler = use_crawler(monkeypatch, {page: [book(f"Wired 2025-0{page}")] for page in range(1, 6)})
+
+    tasks.crawl_books_task.run("economist", page=2, incremental=True, max_pages=2)
+    assert crawler.requested == [2, 3]
+    assert sorted(enqueued["books"]) == ["Wired 2025-02", "Wired 2025-03"]
+
+    tasks.crawl_books_task.run("economist", page=5)
+    assert crawler.requested == [2, 3, 5]
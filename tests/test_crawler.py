@@ -18,7 +18,7 @@ logging.basicConfig(
 @pytest_asyncio.fixture
 async def crawler() -> AsyncGenerator[EconomistCrawler, None]:
     """创建爬虫实例的 fixture"""
-    async with EconomistCrawler() as crawler:
+    async with EconomistCrawler(use_pool=False) as crawler:
         yield crawler
 
 
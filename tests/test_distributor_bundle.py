@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from app.distributor import base as distributor_base
+from app.distributor.smtp_distributor import SMTPDistributor
+from app.uploader.registry import UploadRegistry, file_sha256
+from app.utils.compressor import CompressionProfile, compress_files
+from tests.helpers import db, uploader  # noqa: F401
+
+
+class InlineCompressionService:
+    """在当前进程中压缩并记录调用次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def compress(self, input_paths, output_path, profile=None, codecs=None):
+        self.calls += 1
+        profile = CompressionProfile("zip", 1, 1)
+        return compress_files(input_paths, f"{output_path}{profile.suffix}", profile.codec, profile.level)
+
+
+@pytest.fixture
+def distributor(db, uploader, tmp_path, monkeypatch) -> SMTPDistributor:
+    monkeypatch.setattr(distributor_base, "create_uploader", lambda uploader_type: uploader)
+    monkeypatch.setattr(distributor_base.settings, "DISTRIBUTE_BUNDLE", True)
+    monkeypatch.setattr(distributor_base.settings, "TMP_DIR", tmp_path / "tmp")
+    return SMTPDistributor()
+
+
+def make_book(tmp_path, name: str, content: bytes) -> dict:
+    path = tmp_path / f"{name}.pdf"
+    path.write_bytes(content)
+    return {"title": name, "file_path": str(path), "file_size": len(content), "content_hash": file_sha256(path)}
+
+
+@pytest.mark.asyncio
+async def test_bundle_lists_only_packed_books(distributor, uploader, tmp_path, monkeypatch):
+    """测试只在压缩包中列出实际打包的书籍，本地已清理的书籍单独发送链接，同一组书籍只压缩一次"""
+    service = InlineCompressionService()
+    monkeypatch.setattr(distributor_base, "get_compression_service", lambda: service)
+
+    first = make_book(tmp_path, "Issue 1", b"first issue")
+    second = make_book(tmp_path, "Issue 2", b"second issue")
+    evicted = make_book(tmp_path, "Issue 3", b"third issue")
+    UploadRegistry(uploader).upload(evicted["file_path"])
+    (tmp_path / "Issue 3.pdf").unlink()
+
+    books = [first, second, evicted]
+    url, expires_at, packed = await distributor._get_bundle_url(books)
+    assert packed == [first, second]
+
+    msg = await distributor.create_books_email(books, "reader@example.com")
+    body = msg.get_payload()[0].get_payload(decode=True).decode()
+    bundle_part, links_part = body.split("以下书籍请单独下载")
+    assert "《Issue 1》" in bundle_part and "《Issue 2》" in bundle_part
+    assert "《Issue 3》" not in bundle_part and "《Issue 3》" in links_part
+
+    assert service.calls == 1
+    assert not list((tmp_path / "tmp").iterdir())
+
+
+@pytest.mark.asyncio
+async def test_email_states_expiry_of_cached_links(distributor, uploader, tmp_path, monkeypatch):
+    """测试复用缓存的链接时，邮件中写明链接实际的过期时间"""
+    monkeypatch.setattr(distributor_base.settings, "DISTRIBUTE_BUNDLE", False)
+    books = [make_book(tmp_path, "Issue 1", b"first issue"), make_book(tmp_path, "Issue 2", b"second issue")]
+    await distributor.create_books_email(books, "reader@example.com")
+
+    # 缓存中的链接只剩约两天有效期
+    expires_at = time.time() + 2 * 24 * 3600
+    for cache_key, (url, _) in list(uploader.url_cache._local.items()):
+        uploader.url_cache._local[cache_key] = (url, expires_at)
+
+    msg = await distributor.create_books_email(books, "reader@example.com")
+    body = msg.get_payload()[0].get_payload(decode=True).decode()
+    assert f"下载链接将于 {distributor._format_expiry(expires_at)} 过期" in body
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.downloader.governor import DownloadGovernor
+
+
+@pytest.mark.asyncio
+async def test_slot_limits_concurrency():
+    """测试下载槽位限制同时进行的下载数"""
+    governor = DownloadGovernor(max_concurrent=2, speed_limit=0, backend="memory")
+    active = 0
+    max_active = 0
+
+    async def download():
+        nonlocal active, max_active
+        async with governor.slot():
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+
+    await asyncio.gather(*(download() for _ in range(5)))
+    assert max_active == 2
+    assert governor.utilisation()["active_downloads"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_timeout():
+    """测试槽位被占满时超时"""
+    governor = DownloadGovernor(max_concurrent=1, speed_limit=0, slot_timeout=0, backend="memory")
+    async with governor.slot():
+        assert governor.utilisation()["slot_utilisation"] == 1
+        with pytest.raises(TimeoutError):
+            async with governor.slot():
+                pass
+
+
+@pytest.mark.asyncio
+async def test_throttle_bandwidth():
+    """测试总下载速度限制"""
+    governor = DownloadGovernor(max_concurrent=1, speed_limit=1000, backend="memory")
+    assert await governor.throttle(1000) == 0
+    assert await governor.throttle(100) == pytest.approx(0.1, abs=0.02)
+    assert governor.utilisation()["speed_limit"] == 1000
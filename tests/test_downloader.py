@@ -0,0 +1,332 @@
+import asyncio
+import hashlib
+import time
+
+import httpx
+import pytest
+
+from app.downloader import base as downloader_base
+from app.downloader.economist_downloader import FileDownloader
+from app.downloader.governor import DownloadGovernor
+from app.downloader.lease import DownloadLeases, LeaseLostError
+from app.downloader.progress import ProgressBroker
+from app.utils.rate_limiter import RateLimiter
+
+CONTENT = bytes(range(256)) * 4096  # 1MB
+CONTENT_HASH = hashlib.sha256(CONTENT).hexdigest()
+DOWNLOAD_LINK = "https://files.example.com/get/The_Economist_2025_05_17.pdf"
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch) -> FileDownloader:
+    """创建使用模拟服务器和临时目录的下载器"""
+    limiter = RateLimiter(rate=100, burst=100, backend="memory")
+    governor = DownloadGovernor(max_concurrent=2, speed_limit=0, backend="memory")
+    monkeypatch.setattr(downloader_base, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(downloader_base, "get_download_governor", lambda: governor)
+    monkeypatch.setattr(downloader_base.settings, "DOWNLOAD_DIR", tmp_path)
+    leases = DownloadLeases(backend="memory")
+    monkeypatch.setattr(downloader_base, "get_download_leases", lambda: leases)
+    broker = ProgressBroker(backend="memory")
+    monkeypatch.setattr(downloader_base, "get_progress_broker", lambda: broker)
+    return FileDownloader()
+
+
+def use_transport(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(downloader_base.BaseDownloader, "client", property(lambda self: client))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_download_book(downloader: FileDownloader, monkeypatch):
+    """测试流式下载并返回文件信息"""
+    use_transport(monkeypatch, lambda request: httpx.Response(200, content=CONTENT))
+
+    book_dict = await downloader.download_book(
+        {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+    )
+    assert book_dict["file_size"] == len(CONTENT)
+    assert book_dict["file_format"] == "pdf"
+    assert book_dict["downloaded_at"] is not None
+    assert (downloader.download_dir / "The Economist.pdf").read_bytes() == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_download_book_failed(downloader: FileDownloader, monkeypatch):
+    """测试下载失败时抛出异常"""
+    use_transport(monkeypatch, lambda request: httpx.Response(500))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await downloader.download_book(
+            {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+        )
+    assert not (downloader.download_dir / "The Economist.pdf").exists()
+
+
+@pytest.mark.asyncio
+async def test_download_book_progress_events(downloader: FileDownloader, monkeypatch):
+    """测试下载过程中广播进度事件"""
+    use_transport(monkeypatch, lambda request: httpx.Response(200, content=CONTENT))
+    downloader.chunk_size = 256 * 1024
+
+    events = []
+
+    async def collect():
+        async for event in downloader.progress.subscribe(heartbeat=1):
+            if event is None:
+                continue
+            events.append(event)
+            if event["status"] in ("completed", "failed"):
+                return
+
+    collector = asyncio.create_task(collect())
+    await asyncio.sleep(0)
+    await downloader.download_book(
+        {"id": 1, "title": "The Economist", "download_link": DOWNLOAD_LINK}
+    )
+    await asyncio.wait_for(collector, 1)
+
+    assert events[0]["status"] == "started"
+    assert events[-1]["status"] == "completed"
+    assert events[-1]["book_id"] == 1
+    assert events[-1]["bytes_done"] == events[-1]["total"] == len(CONTENT)
+    assert events[-1]["eta"] == 0
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """返回部分内容后连接中断的响应体"""
+
+    def __init__(self, content: bytes, fail_after: int):
+        self.content = content
+        self.fail_after = fail_after
+
+    async def __aiter__(self):
+        yield self.content[: self.fail_after]
+        raise httpx.ReadError("connection reset")
+
+
+def range_server(requests: list, etag: str = '"v1"', fail_after: int | None = None):
+    """模拟支持 Range/If-Range 的文件服务器，第一次请求可在中途断开"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers = {"etag": etag, "accept-ranges": "bytes"}
+        if request.method == "HEAD":
+            headers["content-length"] = str(len(CONTENT))
+            return httpx.Response(200, headers=headers)
+
+        requests.append(request)
+        range_header = request.headers.get("range")
+        if range_header and request.headers.get("if-range") == etag:
+            start, _, end = range_header.removeprefix("bytes=").partition("-")
+            start, end = int(start), int(end or len(CONTENT) - 1)
+            headers["content-range"] = f"bytes {start}-{end}/{len(CONTENT)}"
+            return httpx.Response(206, headers=headers, content=CONTENT[start : end + 1])
+        if fail_after is not None and len(requests) == 1:
+            headers["content-length"] = str(len(CONTENT))
+            return httpx.Response(200, headers=headers, stream=BrokenStream(CONTENT, fail_after))
+        return httpx.Response(200, headers=headers, content=CONTENT)
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_download_book_resume(downloader: FileDownloader, monkeypatch):
+    """测试下载中断后用 Range 从已写入位置续传"""
+    requests = []
+    use_transport(monkeypatch, range_server(requests, fail_after=300_000))
+    book_dict = {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+
+    with pytest.raises(httpx.ReadError):
+        await downloader.download_book(dict(book_dict))
+    part_path, manifest_path = downloader._part_paths(downloader.download_dir / "The Economist.pdf")
+    written = part_path.stat().st_size
+    assert 0 < written <= 300_000
+    assert manifest_path.exists()
+
+    book_dict = await downloader.download_book(dict(book_dict))
+    assert requests[1].headers["range"] == f"bytes={written}-"
+    assert book_dict["file_size"] == len(CONTENT)
+    assert book_dict["content_hash"] == CONTENT_HASH
+    assert (downloader.download_dir / "The Economist.pdf").read_bytes() == CONTENT
+    assert not part_path.exists() and not manifest_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_download_book_restart_when_changed(downloader: FileDownloader, monkeypatch):
+    """测试文件已变化（If-Range 不匹配）时重新完整下载"""
+    requests = []
+    use_transport(monkeypatch, range_server(requests, fail_after=300_000))
+    book_dict = {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+    with pytest.raises(httpx.ReadError):
+        await downloader.download_book(dict(book_dict))
+
+    use_transport(monkeypatch, range_server(requests, etag='"v2"'))
+    book_dict = await downloader.download_book(dict(book_dict))
+    assert book_dict["file_size"] == len(CONTENT)
+    assert (downloader.download_dir / "The Economist.pdf").read_bytes() == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_download_book_segmented(downloader: FileDownloader, monkeypatch):
+    """测试按字节范围分段并发下载"""
+    requests = []
+    use_transport(monkeypatch, range_server(requests))
+    downloader.segments = 4
+    downloader.min_segment_size = 200_000
+
+    book_dict = await downloader.download_book(
+        {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+    )
+    assert sorted(request.headers["range"] for request in requests) == [
+        "bytes=0-262143",
+        "bytes=262144-524287",
+        "bytes=524288-786431",
+        "bytes=786432-1048575",
+    ]
+    assert book_dict["file_size"] == len(CONTENT)
+    assert (downloader.download_dir / "The Economist.pdf").read_bytes() == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_download_book_segmented_resume(downloader: FileDownloader, monkeypatch):
+    """测试分段下载失败后只重新下载未完成的部分"""
+    requests = []
+    use_transport(monkeypatch, range_server(requests))
+    downloader.segments = 2
+    downloader.min_segment_size = 200_000
+    file_path = downloader.download_dir / "The Economist.pdf"
+    part_path, manifest_path = downloader._part_paths(file_path)
+
+    manifest = downloader._plan_segments(DOWNLOAD_LINK, len(CONTENT), '"v1"')
+    part_path.write_bytes(CONTENT[:600_000] + bytes(len(CONTENT) - 600_000))
+    manifest["segments"][0]["written"] = 524_288
+    manifest["segments"][1]["written"] = 600_000 - 524_288
+    downloader._save_manifest(manifest_path, manifest)
+
+    book_dict = await downloader.download_book(
+        {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+    )
+    assert [request.headers["range"] for request in requests] == ["bytes=600000-1048575"]
+    assert book_dict["file_size"] == len(CONTENT)
+    assert file_path.read_bytes() == CONTENT
+    assert not manifest_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_download_book_skip_when_leased(downloader: FileDownloader, monkeypatch):
+    """测试其他 worker 持有下载租约时立即跳过"""
+    requests = []
+    use_transport(monkeypatch, range_server(requests))
+    downloader.leases.try_acquire(DOWNLOAD_LINK, "other-worker")
+
+    book_dict = await downloader.download_book(
+        {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+    )
+    assert "file_path" not in book_dict
+    assert requests == []
+
+    downloader.leases.release(DOWNLOAD_LINK, "other-worker")
+    book_dict = await downloader.download_book(book_dict)
+    assert book_dict["file_size"] == len(CONTENT)
+    assert downloader.leases.owner_of(DOWNLOAD_LINK) is None
+
+
+@pytest.mark.asyncio
+async def test_download_aborted_when_lease_lost(downloader: FileDownloader, monkeypatch):
+    """测试下载期间租约被接管时停止下载，不写入文件"""
+    downloader.leases.ttl = 0.3
+    key = downloader.leases._key(DOWNLOAD_LINK)
+
+    class SlowStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            for i in range(0, len(CONTENT), 64 * 1024):
+                if i == 64 * 1024:
+                    # 模拟租约过期后被其他 worker 接管
+                    downloader.leases._local[key] = ("other-worker", time.time() + 60)
+                await asyncio.sleep(0.05)
+                yield CONTENT[i : i + 64 * 1024]
+
+    use_transport(
+        monkeypatch,
+        lambda request: httpx.Response(
+            200, headers={"content-length": str(len(CONTENT))}, stream=SlowStream()
+        ),
+    )
+
+    with pytest.raises(LeaseLostError):
+        await downloader.download_book({"title": "The Economist", "download_link": DOWNLOAD_LINK})
+    assert not (downloader.download_dir / "The Economist.pdf").exists()
+    assert downloader.leases.owner_of(DOWNLOAD_LINK) == "other-worker"
+
+
+@pytest.mark.asyncio
+async def test_segmented_download_aborted_when_lease_lost(downloader: FileDownloader, monkeypatch):
+    """测试分段下载期间租约被接管时取消所有分段，保留续传信息且不再写入"""
+    downloader.leases.ttl = 0.3
+    downloader.segments = 4
+    downloader.min_segment_size = 200_000
+    downloader.chunk_size = 16 * 1024
+    key = downloader.leases._key(DOWNLOAD_LINK)
+    chunks = []
+
+    class SlowRangeStream(httpx.AsyncByteStream):
+        def __init__(self, content: bytes):
+            self.content = content
+
+        async def __aiter__(self):
+            for i in range(0, len(self.content), 16 * 1024):
+                if len(chunks) == 8:
+                    # 模拟租约过期后被其他 worker 接管
+                    downloader.leases._local[key] = ("other-worker", time.time() + 60)
+                chunks.append(i)
+                await asyncio.sleep(0.05)
+                yield self.content[i : i + 16 * 1024]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers = {"etag": '"v1"', "accept-ranges": "bytes"}
+        if request.method == "HEAD":
+            headers["content-length"] = str(len(CONTENT))
+            return httpx.Response(200, headers=headers)
+        start, _, end = request.headers["range"].removeprefix("bytes=").partition("-")
+        start, end = int(start), int(end)
+        headers["content-range"] = f"bytes {start}-{end}/{len(CONTENT)}"
+        return httpx.Response(206, headers=headers, stream=SlowRangeStream(CONTENT[start : end + 1]))
+
+    use_transport(monkeypatch, handler)
+
+    with pytest.raises(LeaseLostError):
+        await downloader.download_book({"title": "The Economist", "download_link": DOWNLOAD_LINK})
+    received = len(chunks)
+    await asyncio.sleep(0.3)
+    assert len(chunks) == received
+
+    file_path = downloader.download_dir / "The Economist.pdf"
+    part_path, manifest_path = downloader._part_paths(file_path)
+    assert not file_path.exists()
+    manifest = downloader._load_manifest(DOWNLOAD_LINK, part_path, manifest_path)
+    assert 0 < sum(segment["written"] for segment in manifest["segments"]) < len(CONTENT)
+
+
+@pytest.mark.asyncio
+async def test_download_book_content_addressed(downloader: FileDownloader, monkeypatch):
+    """测试下载时计算 SHA-256，内容相同的文件只保存一份"""
+    requests = []
+    use_transport(monkeypatch, range_server(requests))
+    downloader.segments = 2
+    downloader.min_segment_size = 200_000
+
+    first = await downloader.download_book(
+        {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+    )
+    downloader.segments = 1
+    second = await downloader.download_book(
+        {"title": "The Economist UK", "download_link": DOWNLOAD_LINK + "?uk"}
+    )
+
+    assert first["content_hash"] == second["content_hash"] == CONTENT_HASH
+    blob_path = downloader.blob_path(CONTENT_HASH, "pdf")
+    assert blob_path.read_bytes() == CONTENT
+    for book_dict in (first, second):
+        file_path = downloader.download_dir / f"{book_dict['title']}.pdf"
+        assert file_path.samefile(blob_path)
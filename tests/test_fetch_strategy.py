@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.crawler import base as crawler_base
+from app.crawler.economist_crawler import EconomistCrawler
+from app.crawler.fetch_strategy import FetchStats, FetchStrategy, url_pattern
+from app.utils.rate_limiter import RateLimiter
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "html"
+
+
+def test_url_pattern():
+    """测试 URL 模式归一化"""
+    assert (
+        url_pattern("https://magazinelib.com/all/the-economist/page/2/")
+        == "magazinelib.com/all/*/*/{n}"
+    )
+    assert url_pattern("https://magazinelib.com/all/the-economist-uk-may-3-2025/") == url_pattern(
+        "https://magazinelib.com/all/the-economist-usa-april-5-2025/"
+    )
+
+
+def test_skip_http_after_failures():
+    """测试 HTTP 持续失败后直接走浏览器，并定期重新试探"""
+    stats = FetchStats(min_samples=3, min_success_rate=0.5, probe_interval=4)
+    pattern = "magazinelib.com/all/*"
+
+    for _ in range(3):
+        assert stats.should_try_http(pattern)
+        stats.record(pattern, FetchStrategy.HTTP, False)
+
+    decisions = [stats.should_try_http(pattern) for _ in range(4)]
+    assert decisions == [False, False, False, True]
+
+
+def test_keep_http_when_successful():
+    """测试 HTTP 成功率足够时继续使用快速路径"""
+    stats = FetchStats(min_samples=3, min_success_rate=0.5, probe_interval=4)
+    pattern = "magazinelib.com/all/*/*/{n}"
+
+    for success in (True, True, False):
+        stats.record(pattern, FetchStrategy.HTTP, success)
+
+    assert stats.should_try_http(pattern)
+    assert stats.snapshot()[pattern]["http_success_rate"] == 2 / 3
+
+
+@pytest.mark.asyncio
+async def test_fetch_falls_back_when_ready_selector_missing(monkeypatch):
+    """测试部分解析时 HTTP 页面缺少加载完成的标志元素，回退到浏览器"""
+    html = (FIXTURE_DIR / "economist_list.html").read_text()
+    # 去掉 div#page 但保留书籍列表，HTTP 结果必须被判定为失败
+    pages = {"http": html.replace('id="page"', 'id="other"')}
+    assert pages["http"] != html
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text=pages["http"]))
+    )
+    monkeypatch.setattr(crawler_base, "get_http_client", lambda name: client)
+
+    crawler = EconomistCrawler(use_pool=False)
+    crawler.http_fast_path = True
+    crawler.fetch_stats = FetchStats()
+    crawler.rate_limiter = RateLimiter(rate=100, burst=100, backend="memory")
+    browser_urls = []
+
+    async def get(url, loaded_selector=None, parse_only=None, **kwargs):
+        browser_urls.append(url)
+        return crawler.parse(html, parse_only)
+
+    monkeypatch.setattr(crawler, "get", get)
+
+    book_dicts = await crawler.get_books(1)
+    assert len(book_dicts) == 24
+    assert browser_urls == [crawler.base_url.format(1)]
+    pattern = url_pattern(crawler.base_url.format(1))
+    assert crawler.fetch_stats.http_success_rate(pattern) == 0
+
+    # 标志元素存在时直接使用 HTTP 结果
+    pages["http"] = html
+    assert len(await crawler.get_books(1)) == 24
+    assert len(browser_urls) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_book_when_download_page_fails(monkeypatch):
+    """测试下载页获取失败时记录日志并返回原书籍信息"""
+    crawler = EconomistCrawler(use_pool=False)
+    detail = crawler.parse((FIXTURE_DIR / "economist_detail.html").read_text())
+    pages = iter([detail, None])
+
+    async def fetch(url, **kwargs):
+        return next(pages)
+
+    monkeypatch.setattr(crawler, "fetch", fetch)
+
+    book_dict = {"title": "The Economist", "detail_link": "https://magazinelib.com/all/the-economist/"}
+    assert await crawler.get_book(book_dict) == book_dict
+    assert "download_link" not in book_dict
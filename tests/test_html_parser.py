@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from app.crawler.economist_crawler import (
+    BOOK_DETAIL_TARGETS,
+    BOOK_LIST_TARGETS,
+    DOWNLOAD_PAGE_TARGETS,
+    EconomistCrawler,
+)
+from app.crawler.html_parser import create_html_parser
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "html"
+PARSER_TYPES = ["html.parser", "lxml", "selectolax"]
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURE_DIR / name).read_text()
+
+
+@pytest.fixture
+def crawler() -> EconomistCrawler:
+    return EconomistCrawler(use_pool=False)
+
+
+@pytest.mark.parametrize("parser_type", PARSER_TYPES)
+def test_parse_books(crawler: EconomistCrawler, parser_type: str):
+    """测试各解析后端从列表页提取的书籍一致"""
+    parser = create_html_parser(parser_type)
+    html = read_fixture("economist_list.html")
+
+    book_dicts = crawler.parse_books(parser.parse(html, BOOK_LIST_TARGETS))
+    assert len(book_dicts) == 24
+    assert book_dicts == crawler.parse_books(create_html_parser("html.parser").parse(html))
+
+    book_dict = book_dicts[0]
+    assert book_dict["title"] == "The Economist UK Edition – 01.01.2025"
+    assert book_dict["date"] == "2025-01-01"
+    assert book_dict["detail_link"].startswith("https://magazinelib.com/all/the-economist/")
+    assert book_dict["cover_link"].endswith("-300x400.jpg")
+
+
+@pytest.mark.parametrize("parser_type", PARSER_TYPES)
+def test_parse_download_links(parser_type: str):
+    """测试各解析后端从详情页和下载页提取链接"""
+    parser = create_html_parser(parser_type)
+
+    detail = parser.parse(read_fixture("economist_detail.html"), BOOK_DETAIL_TARGETS)
+    assert EconomistCrawler.parse_download_page_link(detail) == (
+        "/downloads/?id=123456&file=The_Economist_UK_Edition_17_05_2025.pdf"
+    )
+
+    download = parser.parse(read_fixture("economist_download.html"), DOWNLOAD_PAGE_TARGETS)
+    assert EconomistCrawler.parse_download_link(download) == (
+        "https://files.magazinelib.com/get/The_Economist_UK_Edition_17_05_2025.pdf"
+    )
+
+
+def test_parse_only_keeps_needed_subtrees():
+    """测试部分解析只保留目标子树"""
+    soup = create_html_parser("lxml").parse(
+        read_fixture("economist_list.html"), BOOK_LIST_TARGETS
+    )
+    assert soup.select_one("div#page") is None
+    assert soup.select_one("script") is None
+    assert len(soup.select("article.category-all")) == 24
@@ -1,5 +1,9 @@
 import os
 import logging
+
+import cv2
+import numpy as np
+
 from app.utils.image_processor import ImageProcessor
 
 # 配置日志
@@ -64,5 +68,34 @@ def test_checkbox_detection():
             else:
                 print("✓ 正确识别为无 checkbox")
 
+def _draw_checkbox_widget() -> np.ndarray:
+    """绘制一个类似 Cloudflare 验证框的测试图像"""
+    img = np.full((300, 600, 3), 255, dtype=np.uint8)
+    cv2.rectangle(img, (100, 100), (400, 165), (80, 80, 80), 2)
+    cv2.rectangle(img, (120, 120), (146, 146), (80, 80, 80), 2)
+    return img
+
+
+def test_checkbox_detection_in_memory():
+    """测试从内存中的数组和 PNG 字节检测 checkbox"""
+    processor = ImageProcessor(debug=False)
+    img = _draw_checkbox_widget()
+
+    from_array = processor.find_checkbox(img)
+    assert from_array is not None
+    x, y = from_array
+    assert 120 <= x <= 146 and 120 <= y <= 146
+
+    ok, encoded = cv2.imencode(".png", img)
+    assert ok
+    assert processor.find_checkbox(encoded.tobytes()) == from_array
+
+
+def test_checkbox_detection_invalid_bytes():
+    """测试无法解码的字节"""
+    processor = ImageProcessor(debug=False)
+    assert processor.find_checkbox(b"not an image") is None
+
+
 if __name__ == "__main__":
     test_checkbox_detection() 
\ No newline at end of file
@@ -0,0 +1,101 @@
+import asyncio
+import random
+import zlib
+
+import billiard.pool
+import pytest
+
+pikepdf = pytest.importorskip("pikepdf")
+Image = pytest.importorskip("PIL.Image")
+
+from app.database import Book, BookFormat  # noqa: E402
+from app.task import tasks  # noqa: E402
+from app.utils.pdf_optimizer import (  # noqa: E402
+    optimize_pdf,
+    optimize_pdf_in_pool,
+    optimized_path,
+    shutdown_pdf_executor,
+)
+from tests.helpers import db  # noqa: E402, F401
+
+
+def make_pdf(path, width: int = 1200, height: int = 1600):
+    """生成一页包含 Flate 压缩照片式图片的 PDF"""
+    rng = random.Random(0)
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    pixels = bytearray(image.tobytes())
+    for i in range(0, len(pixels), 7):
+        pixels[i] = rng.randrange(256)
+
+    pdf = pikepdf.new()
+    xobject = pikepdf.Stream(pdf, zlib.compress(bytes(pixels)))
+    xobject.Type = pikepdf.Name.XObject
+    xobject.Subtype = pikepdf.Name.Image
+    xobject.Width, xobject.Height = width, height
+    xobject.ColorSpace = pikepdf.Name.DeviceRGB
+    xobject.BitsPerComponent = 8
+    xobject.Filter = pikepdf.Name.FlateDecode
+
+    pdf.add_blank_page(page_size=(width / 2, height / 2))
+    page = pdf.pages[0]
+    page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=xobject))
+    page.Contents = pdf.make_stream(f"q {width / 2} 0 0 {height / 2} 0 0 cm /Im0 Do Q".encode())
+    pdf.save(path)
+
+
+def test_optimize_pdf(tmp_path):
+    """测试重新压缩图片后 PDF 变小且原文件保持不变"""
+    input_path = tmp_path / "The Economist.pdf"
+    make_pdf(input_path)
+    original = input_path.read_bytes()
+    output_path = optimized_path(input_path)
+    assert output_path.name == "The Economist.min.pdf"
+
+    result = optimize_pdf(input_path, output_path, image_quality=60, max_image_size=800)
+
+    assert input_path.read_bytes() == original
+    assert result["images_recompressed"] == 1
+    assert result["optimized_size"] < result["original_size"] / 2
+    assert result["cpu_seconds"] > 0
+    with pikepdf.open(output_path) as pdf:
+        image = pdf.pages[0].Resources.XObject.Im0
+        assert image.Filter == pikepdf.Name.DCTDecode
+        assert max(int(image.Width), int(image.Height)) == 800
+
+
+def optimize_in_worker(path: str):
+    """在进程池子进程中调用 PDF 优化进程池，与 Celery prefork worker 中的调用方式相同"""
+    try:
+        return asyncio.run(optimize_pdf_in_pool(path))
+    finally:
+        shutdown_pdf_executor()
+
+
+def test_optimize_pdf_in_celery_worker(tmp_path):
+    """测试在 Celery prefork worker（billiard 的 daemon 进程）中可以使用 PDF 优化进程池"""
+    input_path = tmp_path / "The Economist.pdf"
+    make_pdf(input_path)
+
+    pool = billiard.pool.Pool(1)
+    try:
+        result = pool.apply_async(optimize_in_worker, (str(input_path),)).get(timeout=60)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    assert result["optimized_size"] < result["original_size"]
+    assert optimized_path(input_path).exists()
+
+
+def test_optimize_book_task_skips_missing_file(db, tmp_path, monkeypatch):
+    """测试本地文件不存在（同时上传且不保留本地文件）时跳过优化，不抛出异常重试"""
+    book = Book.create(
+        db, title="The Economist", file_path=str(tmp_path / "The Economist.pdf"), file_format=BookFormat.PDF
+    )
+
+    async def fail(file_path):
+        raise AssertionError("不应优化不存在的文件")
+
+    monkeypatch.setattr(tasks, "optimize_pdf_in_pool", fail)
+    tasks.optimize_book_task.run(book.id)
+    assert book.optimized_path is None
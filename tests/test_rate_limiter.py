@@ -0,0 +1,33 @@
+from app.utils.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_burst_and_wait():
+    """测试令牌桶突发请求和排队等待时间"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0.5
+    assert bucket.reserve() == 1.0
+
+    clock.now = 1.0
+    assert bucket.reserve() == 0.5
+
+
+def test_rate_limiter_keys_by_domain():
+    """测试内存限流器按域名分别计数"""
+    limiter = RateLimiter(rate=1, burst=1, backend="memory")
+    assert limiter.key_for("https://magazinelib.com/all/page/2/") == "magazinelib.com"
+
+    assert limiter.reserve("magazinelib.com") == 0
+    assert limiter.reserve("files.example.com") == 0
+    assert limiter.reserve("magazinelib.com") > 0
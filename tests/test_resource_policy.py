@@ -0,0 +1,30 @@
+from app.crawler.resource_policy import ResourcePolicy
+
+
+def test_should_block():
+    """测试按资源类型和域名拦截"""
+    policy = ResourcePolicy(
+        blocked_types=["image", "font"], blocked_domains=["doubleclick.net"]
+    )
+    assert policy.should_block("https://magazinelib.com/cover.jpg", "image")
+    assert policy.should_block("https://magazinelib.com/font.woff2", "font")
+    assert policy.should_block("https://ad.doubleclick.net/tag.js", "script")
+    assert not policy.should_block("https://magazinelib.com/app.js", "script")
+    assert not policy.should_block("https://notdoubleclick.net/app.js", "script")
+    assert not policy.should_block("data:image/gif;base64,R0lGOD", "image")
+
+
+def test_challenge_resources_allowed():
+    """测试 Cloudflare 验证资源和主文档不被拦截"""
+    policy = ResourcePolicy(
+        blocked_types=["image"], blocked_domains=["challenges.cloudflare.com"]
+    )
+    assert not policy.should_block(
+        "https://challenges.cloudflare.com/cdn-cgi/challenge-platform/h/b/img.png", "image"
+    )
+    assert not policy.should_block(
+        "https://magazinelib.com/cdn-cgi/challenge-platform/h/b/orchestrate/jsch/v1", "image"
+    )
+    assert not policy.should_block(
+        "https://magazinelib.com/page.png", "image", is_main_document=True
+    )
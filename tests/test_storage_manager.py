@@ -0,0 +1,94 @@
+import os
+
+from app.database import Book, Upload
+from app.downloader.storage import StorageManager
+from tests.helpers import db  # noqa: F401
+
+
+class FakeUploader:
+    bucket_name = "book-sender-test"
+
+    def __init__(self, keys: set[str]):
+        self.keys = keys
+
+    def file_exists(self, key: str) -> bool:
+        return key in self.keys
+
+
+def add_file(db, download_dir, name: str, used_at: float, blob: bool = False):
+    path = download_dir / name
+    if blob:
+        blob_path = download_dir / "blobs" / "ab" / f"ab{name}"
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        blob_path.write_bytes(b"x" * 100)
+        os.link(blob_path, path)
+    else:
+        path.write_bytes(b"x" * 100)
+    os.utime(path, (used_at, used_at))
+    Book.create(db, title=name, file_path=str(path), file_size=100)
+    return path
+
+
+def test_evict_least_recently_used_uploaded_files(db, tmp_path):
+    """测试超出预算时按最近使用时间清理已上传的文件，并标记书籍"""
+    old = add_file(db, tmp_path, "old.pdf", 1_000, blob=True)
+    local_only = add_file(db, tmp_path, "local.pdf", 2_000)
+    new = add_file(db, tmp_path, "new.pdf", 3_000)
+
+    manager = StorageManager(tmp_path, budget=250, min_free=0)
+    # old.pdf 已按内容摘要登记上传，new.pdf 是按文件名上传的旧文件
+    manager._uploader = FakeUploader({"new.pdf"})
+    Upload.register(db, "book-sender-test", "books/ab/abold.pdf", "abold")
+
+    assert manager.ensure_space()
+    assert not old.exists() and not (tmp_path / "blobs" / "ab" / "abold.pdf").exists()
+    assert local_only.exists() and new.exists()
+    assert Book.query_first(db, title="old.pdf").evicted_at is not None
+
+    # 未上传的文件不能清理，空间仍然不足
+    assert not manager.ensure_space(200)
+    assert local_only.exists() and not new.exists()
+    assert Book.query_first(db, title="local.pdf").evicted_at is None
+
+
+def test_evict_uploaded_optimized_copy(db, tmp_path):
+    """测试已登记上传的优化副本可以清理，并清除书籍的优化记录"""
+    original = add_file(db, tmp_path, "book.pdf", 2_000)
+    optimized = tmp_path / "book.min.pdf"
+    optimized.write_bytes(b"x" * 100)
+    os.utime(optimized, (1_000, 1_000))
+    book = Book.query_first(db, title="book.pdf")
+    book.optimized(str(optimized), 100, "minhash")
+    Upload.register(db, "book-sender-test", "books/mi/minhash.pdf", "minhash")
+
+    manager = StorageManager(tmp_path, budget=150, min_free=0)
+    manager._uploader = FakeUploader(set())
+
+    assert manager.ensure_space()
+    assert original.exists() and not optimized.exists()
+    book = Book.query_first(db, title="book.pdf")
+    assert book.optimized_path is None and book.evicted_at is None
+
+
+def test_evict_orphaned_blob(db, tmp_path):
+    """测试重新下载后内容变化、不再被任何书籍路径引用的旧 blob 无需上传即可清理"""
+    path = add_file(db, tmp_path, "book.pdf", 2_000, blob=True)
+    old_blob = tmp_path / "blobs" / "ab" / "abbook.pdf"
+    new_blob = tmp_path / "blobs" / "cd" / "cdbook.pdf"
+    new_blob.parent.mkdir(parents=True)
+    new_blob.write_bytes(b"y" * 100)
+    # 与 _store_blob 相同，用新内容的链接替换逻辑路径
+    os.link(new_blob, tmp_path / "book.pdf.link")
+    os.replace(tmp_path / "book.pdf.link", path)
+
+    manager = StorageManager(tmp_path, budget=150, min_free=0)
+    manager._uploader = FakeUploader(set())
+    # 刚变为孤立的 blob 可能正在建立链接，暂不清理
+    assert not manager.ensure_space()
+    assert old_blob.exists()
+
+    manager.ORPHAN_GRACE = 0
+    assert manager.ensure_space()
+    assert not old_blob.exists()
+    assert path.samefile(new_blob)
+    assert Book.query_first(db, title="book.pdf").evicted_at is None
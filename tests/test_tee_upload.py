@@ -0,0 +1,92 @@
+import hashlib
+
+import httpx
+import pytest
+
+from app.database import Upload
+from app.downloader import base as downloader_base
+from app.downloader.economist_downloader import FileDownloader
+from app.downloader.governor import DownloadGovernor
+from app.downloader.lease import DownloadLeases
+from app.downloader.progress import ProgressBroker
+from app.uploader import s3 as s3_uploader
+from app.utils.rate_limiter import RateLimiter
+from tests.helpers import db, uploader  # noqa: F401
+
+CONTENT = bytes(range(256)) * 4096 * 11  # 11MB，分为 3 个分片
+DOWNLOAD_LINK = "https://files.example.com/get/The_Economist_2025_05_17.pdf"
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch, uploader, db) -> FileDownloader:
+    """创建同时上传到模拟 S3 的下载器"""
+    limiter = RateLimiter(rate=100, burst=100, backend="memory")
+    governor = DownloadGovernor(max_concurrent=2, speed_limit=0, backend="memory")
+    leases = DownloadLeases(backend="memory")
+    monkeypatch.setattr(downloader_base, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(downloader_base, "get_download_governor", lambda: governor)
+    monkeypatch.setattr(downloader_base, "get_download_leases", lambda: leases)
+    broker = ProgressBroker(backend="memory")
+    monkeypatch.setattr(downloader_base, "get_progress_broker", lambda: broker)
+    monkeypatch.setattr(downloader_base.settings, "DOWNLOAD_DIR", tmp_path)
+    monkeypatch.setattr(s3_uploader.settings, "UPLOAD_PART_SIZE", PART_SIZE)
+
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=CONTENT))
+    )
+    monkeypatch.setattr(downloader_base.BaseDownloader, "client", property(lambda self: client))
+
+    downloader = FileDownloader()
+    downloader.tee_upload = True
+    downloader._uploader = uploader
+    return downloader
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("keep_local", [True, False])
+async def test_download_book_tee_upload(downloader: FileDownloader, uploader, db, keep_local):
+    """测试下载时同时分片上传到内容键名并登记，可选择不保留本地文件"""
+    downloader.keep_local = keep_local
+    book_dict = await downloader.download_book(
+        {"title": "The Economist", "download_link": DOWNLOAD_LINK}
+    )
+
+    assert book_dict["file_size"] == len(CONTENT)
+    content_hash = hashlib.sha256(CONTENT).hexdigest()
+    assert book_dict["content_hash"] == content_hash
+    key = uploader.content_key(content_hash, ".pdf")
+    obj = uploader.client.get_object(Bucket=uploader.bucket_name, Key=key)
+    assert obj["Body"].read() == CONTENT
+    assert Upload.lookup(db, uploader.bucket_name, content_hash).key == key
+    assert not uploader.list_files("incoming/")
+
+    file_path = downloader.download_dir / "The Economist.pdf"
+    assert file_path.exists() == keep_local
+    assert not file_path.with_name("The Economist.pdf.part").exists()
+
+
+@pytest.mark.asyncio
+async def test_tee_upload_aborted_on_failure(downloader: FileDownloader, uploader, monkeypatch):
+    """测试下载失败时放弃分片上传"""
+
+    class BrokenStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield CONTENT[: PART_SIZE + 1]
+            raise httpx.ReadError("connection reset")
+
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, headers={"content-length": str(len(CONTENT))}, stream=BrokenStream()
+            )
+        )
+    )
+    monkeypatch.setattr(downloader_base.BaseDownloader, "client", property(lambda self: client))
+
+    with pytest.raises(httpx.ReadError):
+        await downloader.download_book({"title": "The Economist", "download_link": DOWNLOAD_LINK})
+
+    assert not uploader.list_files()
+    uploads = uploader.client.list_multipart_uploads(Bucket=uploader.bucket_name)
+    assert not uploads.get("Uploads")
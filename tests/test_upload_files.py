@@ -0,0 +1,32 @@
+from app.uploader import s3 as s3_uploader
+from tests.helpers import uploader  # noqa: F401
+
+
+def test_upload_files_concurrently(uploader, tmp_path, monkeypatch):
+    """测试同时上传多个文件，大文件使用分片上传，失败的文件被跳过"""
+    monkeypatch.setattr(s3_uploader.settings, "UPLOAD_FILES_CONCURRENCY", 3)
+    uploader.transfer_config = s3_uploader.transfer_config(
+        multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024, max_concurrency=2
+    )
+    paths = []
+    for i, size in enumerate([1024, 11 * 1024 * 1024, 2048]):
+        path = tmp_path / f"book-{i}.pdf"
+        path.write_bytes(bytes([i]) * size)
+        paths.append(str(path))
+    missing = str(tmp_path / "missing.pdf")
+
+    results = uploader.upload_files(paths + [missing], [f"books/{i}.pdf" for i in range(4)])
+
+    assert results == {path: f"books/{i}.pdf" for i, path in enumerate(paths)}
+    info = uploader.get_file_info("books/1.pdf")
+    assert info["size"] == 11 * 1024 * 1024
+    assert info["etag"].endswith("-3")
+
+
+def test_upload_progress_counts_bytes():
+    """测试上传进度回调累计字节数"""
+    progress = s3_uploader.UploadProgress("book.pdf", 300, interval=0)
+    for _ in range(3):
+        progress(100)
+    assert progress.bytes_done == 300
+    assert progress.rate > 0
@@ -0,0 +1,41 @@
+from app.database import Upload
+from app.uploader.registry import UploadRegistry, file_sha256
+from tests.helpers import db, uploader  # noqa: F401
+
+
+def test_same_basename_different_content(db, uploader, tmp_path):
+    """测试文件名相同、内容不同的文件使用不同的键名"""
+    first = tmp_path / "a" / "The Economist.pdf"
+    second = tmp_path / "b" / "The Economist.pdf"
+    for path, content in ((first, b"first issue"), (second, b"second issue")):
+        path.parent.mkdir()
+        path.write_bytes(content)
+
+    registry = UploadRegistry(uploader)
+    first_key, second_key = registry.upload(first), registry.upload(second)
+
+    assert first_key != second_key
+    assert first_key == uploader.content_key(file_sha256(first), ".pdf")
+    assert uploader.client.get_object(Bucket="book-sender-test", Key=second_key)["Body"].read() == b"second issue"
+    assert Upload.lookup(db, "book-sender-test", file_sha256(second)).size == len(b"second issue")
+
+
+def test_resolve_registered_without_network(db, uploader, tmp_path, monkeypatch):
+    """测试已登记的内容不访问云存储，本地文件已清理也能获取键名"""
+    path = tmp_path / "book.pdf"
+    path.write_bytes(b"content")
+    content_hash = file_sha256(path)
+    registry = UploadRegistry(uploader)
+    key = registry.upload(path)
+    path.unlink()
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("不应访问云存储")
+
+    for name in ("upload_file", "file_exists", "get_file_info"):
+        monkeypatch.setattr(uploader, name, no_network)
+    monkeypatch.setattr(uploader.client, "head_object", no_network)
+
+    assert registry.resolve(path, content_hash) == key
+    assert registry.upload(tmp_path / "book.pdf", content_hash) == key
+    assert registry.lookup_many([content_hash, "missing"]) == {content_hash: key}
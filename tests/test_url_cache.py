@@ -0,0 +1,52 @@
+import time
+
+from app.uploader.url_cache import PresignedUrlCache
+from tests.helpers import uploader  # noqa: F401
+
+
+def test_cache_respects_margin():
+    """测试剩余有效期不足 margin 的URL不再复用"""
+    cache = PresignedUrlCache(margin=60, backend="memory")
+    key = ("bucket", "books/ab/ab.pdf", 'attachment; filename="a.pdf"', 3600)
+
+    cache.put(key, "https://example.com/long", time.time() + 3600)
+    assert cache.get(key) == "https://example.com/long"
+
+    cache.put(key, "https://example.com/short", time.time() + 30)
+    assert cache.get(key) == "https://example.com/long"
+
+    cache._local[key] = ("https://example.com/short", time.time() + 30)
+    assert cache.get(key) is None
+
+
+def test_generate_urls_reuses_signed_urls(uploader, monkeypatch):
+    """测试批量生成URL时复用缓存，只为新的 (键名, 文件名) 签名"""
+    uploader.url_cache = PresignedUrlCache(margin=3600, backend="memory")
+    signed = []
+    presign = uploader._presign
+
+    def counting_presign(key, disposition, expires_in):
+        signed.append(key)
+        return presign(key, disposition, expires_in)
+
+    monkeypatch.setattr(uploader, "_presign", counting_presign)
+
+    first = uploader.generate_urls(["books/aa/a.pdf", "books/bb/b.pdf"], filenames=["A.pdf", "B.pdf"])
+    assert len(signed) == 2
+
+    second = uploader.generate_urls(
+        ["books/aa/a.pdf", "books/bb/b.pdf", "books/aa/a.pdf"], filenames=["A.pdf", "B.pdf", "Other.pdf"]
+    )
+    assert second[:2] == first
+    # 复用的URL返回首次签名时记录的过期时间
+    (url, expires_at), = uploader.generate_urls_with_expiry(["books/aa/a.pdf"], filenames=["A.pdf"])
+    assert url == first[0]
+    assert expires_at < time.time() + 604800
+    assert second[2] != first[0]
+    assert uploader.generate_url("books/bb/b.pdf", filename="B.pdf") == first[1]
+    assert len(signed) == 3
+
+    # 有效期不同的请求不复用，短期链接不会拿到 7 天的链接
+    short = uploader.generate_urls(["books/aa/a.pdf"], expires_in=2 * 3600 + 1, filenames=["A.pdf"])
+    assert short[0] != first[0]
+    assert len(signed) == 4